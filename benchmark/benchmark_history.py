@@ -0,0 +1,56 @@
+import os
+import os.path as op
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.utils_path.utils_path import ROOT
+
+HISTORY_FILENAME = 'benchmark_history.csv'
+HISTORY_COLUMNS = ['date', 'commit', 'scenario', 'nb_samples', 'duration', 'threshold', 'is_regression']
+#  A duration is a regression if it exceeds REGRESSION_FACTOR times the median duration of the NB_PREVIOUS_RUNS
+#  previous runs of the same scenario with the same number of samples
+REGRESSION_FACTOR = 1.5
+NB_PREVIOUS_RUNS = 5
+#  Durations below this value (s) are too noisy to detect a regression
+MIN_REGRESSION_DURATION = 0.05
+
+
+def load_history(filepath: str) -> pd.DataFrame:
+    if op.isfile(filepath):
+        return pd.read_csv(filepath)
+    return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+
+def get_regression_threshold(df_history: pd.DataFrame, scenario_name: str, nb_samples: int) -> float:
+    """Return the duration above which a run is a regression (nan if the scenario has never been run)"""
+    is_same_scenario = (df_history['scenario'] == scenario_name) & (df_history['nb_samples'] == nb_samples)
+    previous_durations = df_history.loc[is_same_scenario, 'duration'].values[-NB_PREVIOUS_RUNS:]
+    if len(previous_durations) == 0:
+        return np.nan
+    return max(REGRESSION_FACTOR * float(np.median(previous_durations)), MIN_REGRESSION_DURATION)
+
+
+def record_result(filepath: str, scenario_name: str, nb_samples: int, duration: float) -> bool:
+    """Append the duration of a run to the history, and return whether it is a regression"""
+    df_history = load_history(filepath)
+    threshold = get_regression_threshold(df_history, scenario_name, nb_samples)
+    is_regression = bool(duration > threshold)
+    row = [datetime.now().isoformat(timespec='seconds'), get_git_commit(), scenario_name, nb_samples, duration,
+           threshold, is_regression]
+    df_row = pd.DataFrame([row], columns=HISTORY_COLUMNS)
+    df_history = df_row if df_history.empty else pd.concat([df_history, df_row], ignore_index=True)
+    os.makedirs(op.dirname(filepath), exist_ok=True)
+    df_history.to_csv(filepath + '.tmp', index=False)
+    os.replace(filepath + '.tmp', filepath)
+    return is_regression
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
@@ -0,0 +1,200 @@
+import os
+import os.path as op
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from benchmark.synthetic_watershed import create_synthetic_watershed, SYNTHETIC_WATERSHED_NAME
+from bifurcation.bifurcation_data.bifurcation_data import BifurcationData
+from bifurcation.bifurcation_data.stability_detection_function import compute_stability_detection
+from bifurcation.regime import compute_regime_from_bifurcation_data, RegimeDef
+from calibration.calibration import Calibration
+from calibration.dynamical_model.dynamical_model import DynamicalModel
+from calibration.dynamical_model.one_state.tiphyc_annual import DynamicalModelTipHycAnnual
+from calibration.forcing_function.rain.watershed_rain_forcing_function import RainObsForcingFunction
+from calibration.observation_constraint.runoff.runoff_coefficient_constraint import \
+    RunoffCoefficientObservationConstraint
+from calibration.utils_calibration.convert import load_times
+from calibration.utils_calibration.load_sample import sampling_to_load_function
+from calibration.utils_calibration.sampling import Sampling
+from calibration.utils_calibration.solve import SolverIvp, SolverMethod, solver_method_to_str
+from calibration.utils_calibration.utils_sample import get_df_parameters_sampled
+from continuation.get_continuation import compute_continuation, ContinuationError
+from utils.utils_path.utils_path import BENCHMARK_DATA_PATH
+
+#  Numbers of samples of the scenarios
+SCALES = (10, 1000, 100000)
+#  Forcing range of the bifurcation diagrams (same as the default range of Bifurcation)
+MIN_FORCING = 1.
+MAX_FORCING = 4000.
+#  Size of the calibration used by the scenarios that need solved trajectories (composite rmse and regimes)
+NB_CALIBRATION_SAMPLES = 10
+#  Number of ensemble members whose bifurcation data is computed for the regime scenario
+NB_BIFURCATION_SAMPLES = 2
+
+
+@dataclass
+class BenchmarkContext(object):
+    """Synthetic watershed, and the objects shared by the scenarios (they are not included in the durations)"""
+    watershed_name: str = SYNTHETIC_WATERSHED_NAME
+    dynamical_model_type: type = DynamicalModelTipHycAnnual
+    solver_method: SolverMethod = SolverMethod.RK45
+    path: str = BENCHMARK_DATA_PATH
+
+    def __post_init__(self):
+        create_synthetic_watershed(self.watershed_name, self.path)
+
+    @cached_property
+    def forcing_function(self) -> RainObsForcingFunction:
+        return RainObsForcingFunction(self.watershed_name)
+
+    @cached_property
+    def observation_constraint(self) -> RunoffCoefficientObservationConstraint:
+        return RunoffCoefficientObservationConstraint(self.watershed_name)
+
+    @cached_property
+    def dynamical_model(self) -> DynamicalModel:
+        return self.dynamical_model_type(self.forcing_function)
+
+    @cached_property
+    def calibration(self) -> Calibration:
+        #  The calibration is saved in the benchmark folder, with its reports and its catalog
+        return Calibration(self.observation_constraint, self.forcing_function, self.dynamical_model,
+                           NB_CALIBRATION_SAMPLES, NB_CALIBRATION_SAMPLES, sampling=Sampling.V2_INITIAL,
+                           solver_method=self.solver_method, data_path=self.path)
+
+    @cached_property
+    def ensemble_id_to_bifurcation_data(self) -> dict[int, BifurcationData]:
+        return {ensemble_id: BifurcationData.from_dynamical_model(self.dynamical_model,
+                                                                  self.calibration.ensemble_id_to_params[ensemble_id],
+                                                                  MIN_FORCING, MAX_FORCING, self.solver_method)
+                for ensemble_id in self.calibration.ensemble_ids[:NB_BIFURCATION_SAMPLES]}
+
+    def get_params_list(self, nb_samples: int) -> list[dict[str, float]]:
+        params_vector_list = get_df_parameters_sampled(self.dynamical_model, nb_samples).values[:nb_samples]
+        return [self.dynamical_model.get_params(params_vector) for params_vector in params_vector_list]
+
+
+#  A scenario prepares its inputs for a number of samples, and returns the function whose duration is measured
+
+def get_sampling_scenario(context: BenchmarkContext, nb_samples: int) -> Callable[[], None]:
+    initial_year = context.forcing_function.initial_year
+    initial_forcings = context.forcing_function.get_forcings_for_year(initial_year)
+    load_function = sampling_to_load_function[Sampling.V2_INITIAL]
+
+    def run():
+        load_function(context.dynamical_model, nb_samples, initial_year, initial_forcings,
+                      context.observation_constraint, Sampling.V2_INITIAL, context.solver_method)
+    return run
+
+
+def get_solve_scenario(solver_method: SolverMethod) -> Callable[[BenchmarkContext, int], Callable[[], None]]:
+    def get_scenario(context: BenchmarkContext, nb_samples: int) -> Callable[[], None]:
+        params_list = context.get_params_list(nb_samples)
+        times = load_times(context.forcing_function.initial_year, context.forcing_function.final_year)
+        initial_state = np.array(context.dynamical_model.extremal_initial_states[0], dtype=float)
+
+        def run():
+            for params in params_list:
+                SolverIvp.solve(context.dynamical_model, initial_state, times, params, solver_method)
+        return run
+    return get_scenario
+
+
+def get_composite_rmse_scenario(context: BenchmarkContext, nb_samples: int) -> Callable[[], None]:
+    #  The trajectories of the ensemble members are reused to reach the number of samples
+    calibration = context.calibration
+    state_vectors_and_params_list = [(calibration.ensemble_id_to_state_vectors[i % calibration.ensemble_size],
+                                      calibration.ensemble_id_to_params[i % calibration.ensemble_size])
+                                     for i in range(nb_samples)]
+
+    def run():
+        for state_vectors_and_params in state_vectors_and_params_list:
+            calibration.compute_composite_rmse(state_vectors_and_params)
+    return run
+
+
+def get_stability_detection_scenario(context: BenchmarkContext, nb_samples: int) -> Callable[[], None]:
+    params_list = context.get_params_list(nb_samples)
+
+    def run():
+        for params in params_list:
+            compute_stability_detection(context.dynamical_model, params, MIN_FORCING, MAX_FORCING,
+                                        context.solver_method)
+    return run
+
+
+def get_continuation_scenario(context: BenchmarkContext, nb_samples: int) -> Callable[[], None]:
+    params_list = context.get_params_list(nb_samples)
+
+    def run():
+        for params in params_list:
+            #  A continuation that stops before the max forcing is still part of the measured cost
+            try:
+                compute_continuation(context.dynamical_model, params, MIN_FORCING, MAX_FORCING)
+            except ContinuationError:
+                pass
+    return run
+
+
+def get_csv_scenario(context: BenchmarkContext, nb_samples: int) -> Callable[[], None]:
+    #  Table with the layout of a saved calibration: the parameters, the error, then the trajectory
+    dynamical_model = context.dynamical_model
+    times = load_times(context.forcing_function.initial_year, context.forcing_function.final_year)
+    params_vector_list = get_df_parameters_sampled(dynamical_model, nb_samples).values[:nb_samples]
+    d = OrderedDict(zip(dynamical_model.parameter_names, params_vector_list.T))
+    d['Error'] = np.random.default_rng(0).uniform(size=nb_samples)
+    for time in times:
+        for state_name in dynamical_model.state_names:
+            d[state_name + str(time)] = np.random.default_rng(int(time)).uniform(size=nb_samples)
+    df = pd.DataFrame(d)
+    filepath = op.join(context.path, 'csv', f'calibration_{nb_samples}.csv')
+    os.makedirs(op.dirname(filepath), exist_ok=True)
+
+    def run():
+        df.to_csv(filepath, index=False)
+        pd.read_csv(filepath)
+    return run
+
+
+def get_regime_scenario(context: BenchmarkContext, nb_samples: int) -> Callable[[], None]:
+    calibration = context.calibration
+    ensemble_id_to_bifurcation_data = context.ensemble_id_to_bifurcation_data
+    ensemble_ids = list(ensemble_id_to_bifurcation_data.keys())
+    years = calibration.years
+    ensemble_id_and_year_list = [(ensemble_ids[i % len(ensemble_ids)], years[i % len(years)])
+                                 for i in range(nb_samples)]
+    state_name = calibration.dynamical_model.unique_state_name
+
+    def run():
+        for ensemble_id, year in ensemble_id_and_year_list:
+            state_value = calibration.get_model_variable(year, state_name, ensemble_id)
+            forcing = calibration.forcing_function.year_to_forcing[year]
+            for regime_def in RegimeDef:
+                compute_regime_from_bifurcation_data(ensemble_id_to_bifurcation_data[ensemble_id], state_value,
+                                                     forcing, regime_def)
+    return run
+
+
+scenario_name_to_get_scenario = {
+    'sampling': get_sampling_scenario,
+    **{f'solve_{solver_method_to_str[solver_method]}': get_solve_scenario(solver_method)
+       for solver_method in SolverMethod},
+    'composite_rmse': get_composite_rmse_scenario,
+    'stability_detection': get_stability_detection_scenario,
+    'continuation': get_continuation_scenario,
+    'csv': get_csv_scenario,
+    'regime': get_regime_scenario,
+}
+
+#  Largest number of samples of the slowest scenarios (a stability detection takes seconds for a single sample),
+#  they only run at larger scales on demand
+scenario_name_to_max_nb_samples = {
+    **{f'solve_{solver_method_to_str[solver_method]}': SCALES[1] for solver_method in SolverMethod},
+    'stability_detection': SCALES[0],
+    'continuation': SCALES[0],
+}
@@ -0,0 +1,54 @@
+import logging
+import os.path as op
+import time
+from typing import Optional
+
+import pandas as pd
+
+from benchmark.benchmark_history import record_result, HISTORY_FILENAME
+from benchmark.benchmark_scenarios import BenchmarkContext, SCALES, scenario_name_to_get_scenario, \
+    scenario_name_to_max_nb_samples
+from utils.utils_instrumentation import span, get_report, save_report
+from utils.utils_log import log_info
+from utils.utils_path.utils_path import BENCHMARK_DATA_PATH
+
+
+def run_benchmark(scenario_names: Optional[list[str]] = None, scales: tuple[int, ...] = SCALES,
+                  all_scales: bool = False, path: str = BENCHMARK_DATA_PATH) -> pd.DataFrame:
+    """Run the timed scenarios on a synthetic watershed, and record their durations in the history.
+    By default, the slowest scenarios skip the scales above scenario_name_to_max_nb_samples (unless all_scales)
+    :return: A table with the duration of each run, and whether it is a regression"""
+    if scenario_names is None:
+        scenario_names = list(scenario_name_to_get_scenario.keys())
+    report_at_start = get_report()
+    context = BenchmarkContext(path=path)
+    history_filepath = op.join(path, HISTORY_FILENAME)
+    rows = []
+    for scenario_name in scenario_names:
+        for nb_samples in scales:
+            if not all_scales and nb_samples > scenario_name_to_max_nb_samples.get(scenario_name, max(scales)):
+                continue
+            run = scenario_name_to_get_scenario[scenario_name](context, nb_samples)
+            with span(f'benchmark.{scenario_name}'):
+                start = time.perf_counter()
+                run()
+                duration = time.perf_counter() - start
+            is_regression = record_result(history_filepath, scenario_name, nb_samples, duration)
+            log_info(f'{scenario_name} with {nb_samples} samples: {duration:.3f}s')
+            if is_regression:
+                logging.warning(f'Regression of {scenario_name} with {nb_samples} samples ({duration:.3f}s)')
+            rows.append((scenario_name, nb_samples, duration, is_regression))
+    #  Report of the stages and counters of the scenarios (e.g. the number of rhs evaluations of the solver)
+    save_report(op.join(path, 'report.json'), since=report_at_start)
+    return pd.DataFrame(rows, columns=['scenario', 'nb_samples', 'duration', 'is_regression'])
+
+
+def main_benchmark():
+    df = run_benchmark()
+    print(df.to_string(index=False))
+    if df['is_regression'].any():
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main_benchmark()
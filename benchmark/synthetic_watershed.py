@@ -0,0 +1,63 @@
+import os
+import os.path as op
+
+import numpy as np
+import pandas as pd
+
+from utils.utils_path.utils_path import BENCHMARK_DATA_PATH
+from utils.utils_random import get_generator, BENCHMARK_STREAM
+from utils.utils_watershed import watershed_name_to_csv_filepath
+
+SYNTHETIC_WATERSHED_NAME = 'Synthetic_Watershed'
+#  Synthetic observations (same period and orders of magnitude as the Sahelian watersheds)
+INITIAL_YEAR = 1955
+FINAL_YEAR = 2020
+AREA = 7000.  # area of the watershed (km2)
+MEAN_RAINFALL = 600.  # mean annual rainfall (mm) outside the drought
+DROUGHT_RAINFALL_DEFICIT = 150.  # rainfall deficit (mm) during the drought
+DROUGHT_YEARS = (1970, 1990)
+STD_RAINFALL = 100.
+#  The runoff coefficient shifts from a low regime to a high regime (Sahelian paradox)
+LOWER_RUNOFF_COEFFICIENT = 0.05
+UPPER_RUNOFF_COEFFICIENT = 0.2
+SHIFT_YEARS = (1970, 1995)
+STD_RUNOFF_COEFFICIENT = 0.02
+#  Fraction of the years without runoff observation
+MISSING_RUNOFF_FRACTION = 0.1
+
+
+def get_df_synthetic_rainfall_runoff(initial_year: int = INITIAL_YEAR, final_year: int = FINAL_YEAR,
+                                     seed: int = 0) -> pd.DataFrame:
+    """Annual table with the schema of the Christophe2024/*_Rainfall_Runoff.csv files:
+    the rainfall P (mm), the rainfall volume Pv (hm3), the runoff volume Q (hm3), and the runoff coefficient Ke"""
+    rng = get_generator(BENCHMARK_STREAM, seed)
+    years = np.arange(initial_year, final_year + 1)
+    is_drought = (DROUGHT_YEARS[0] <= years) & (years <= DROUGHT_YEARS[1])
+    rainfall = MEAN_RAINFALL - DROUGHT_RAINFALL_DEFICIT * is_drought + rng.normal(0, STD_RAINFALL, len(years))
+    rainfall = np.maximum(rainfall, 0.1 * MEAN_RAINFALL)
+    #  Linear shift of the runoff coefficient between the two regimes
+    shift = np.clip((years - SHIFT_YEARS[0]) / (SHIFT_YEARS[1] - SHIFT_YEARS[0]), 0, 1)
+    runoff_coefficient = LOWER_RUNOFF_COEFFICIENT + shift * (UPPER_RUNOFF_COEFFICIENT - LOWER_RUNOFF_COEFFICIENT)
+    runoff_coefficient = np.clip(runoff_coefficient + rng.normal(0, STD_RUNOFF_COEFFICIENT, len(years)), 0.01, 0.9)
+    rainfall_volume = rainfall * AREA / 1000
+    runoff_volume = runoff_coefficient * rainfall_volume
+    #  Remove some runoff observations
+    is_missing = rng.uniform(size=len(years)) < MISSING_RUNOFF_FRACTION
+    runoff_volume[is_missing], runoff_coefficient[is_missing] = np.nan, np.nan
+    return pd.DataFrame({'P': rainfall, 'Pv': rainfall_volume, 'Q': runoff_volume, 'Ke': runoff_coefficient},
+                        index=pd.Index(years, name='year'))
+
+
+def create_synthetic_watershed(watershed_name: str = SYNTHETIC_WATERSHED_NAME, path: str = BENCHMARK_DATA_PATH,
+                               seed: int = 0, **kwargs) -> str:
+    """Save the synthetic table, and register the watershed so that it can be used as any observed watershed
+    (e.g. by RainObsForcingFunction and RunoffCoefficientObservationConstraint)"""
+    filepath = op.join(path, 'observations', f'{watershed_name.upper()}_Rainfall_Runoff.csv')
+    df = get_df_synthetic_rainfall_runoff(seed=seed, **kwargs)
+    #  The file is not rewritten if it has not changed (the parsed table stays in the cache of load_table)
+    if not op.isfile(filepath) or not pd.read_csv(filepath, index_col=0).equals(df):
+        os.makedirs(op.dirname(filepath), exist_ok=True)
+        df.to_csv(filepath + '.tmp')
+        os.replace(filepath + '.tmp', filepath)
+    watershed_name_to_csv_filepath[watershed_name] = filepath
+    return filepath
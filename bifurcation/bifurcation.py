@@ -8,12 +8,13 @@ from typing import Any, Optional
 import pandas as pd
 
 from bifurcation.bifurcation_data.bifurcation_data import BifurcationData
+from bifurcation.ensemble_statistics import EnsembleThresholds, get_lower_bound
 from calibration.calibration import Calibration
 from calibration.utils_calibration.sampling import sampling_to_str
 from calibration.utils_calibration.solve import solver_method_to_str
-from continuation.get_continuation_bifurcation_attributes import get_bifurcation_attributes
+from continuation.get_continuation_bifurcation_attributes import get_bifurcation_attributes_list
+from utils.utils_instrumentation import span, get_report, save_report
 from utils.utils_log import log_info
-from utils.utils_multiprocessing import parallelize
 from utils.utils_path.filename_manager.bifurcation_filename_manager import BifurcationFilenameManager
 from utils.utils_path.path_manager import PathManager
 from utils.utils_path.utils_path import BIFURCATION_DATA_PATH, CONTINUATION_BIFURCATION_DATA_PATH
@@ -53,8 +54,12 @@ class Bifurcation(object):
         if self.bifurcation_data_ensemble_has_been_saved:
             bifurcation_data_list = self._load_bifurcation_data_list()
         else:
+            report_at_start = get_report()
             bifurcation_data_list = self._compute_bifurcation_data_list()
             self._save_bifurcation_data_list(bifurcation_data_list)
+            #  Report of the stages that computed and saved the bifurcation data
+            save_report(self.path_manager.report_filepath, since=report_at_start,
+                        filename=self.path_manager.filename_to_save, nb_members=len(self.ensemble_ids))
         return bifurcation_data_list
 
     @cached_property
@@ -66,6 +71,11 @@ class Bifurcation(object):
         log_info(f'{len(monostable_ensemble_ids)} monostable solutions: {monostable_ensemble_ids}')
         return monostable_ensemble_ids
 
+    @cached_property
+    def lower_bound_thresholds(self) -> EnsembleThresholds:
+        """Lower bounds of the bistable ranges, a member is bistable for a maximum forcing above its lower bound"""
+        return EnsembleThresholds.from_bifurcation_data_list(self.bifurcation_data_list, get_lower_bound)
+
     @property
     def bistable_ensemble_ids(self) -> list[int]:
         s = set(self.monostable_ensemble_ids)
@@ -94,6 +104,7 @@ class Bifurcation(object):
     #
     ###########################################
 
+    @span('bifurcation.load')
     def _load_bifurcation_data_list(self) -> list[BifurcationData]:
         log_info('Loading bifurcation data list...')
         df = pd.read_csv(self.path_manager.filepath_to_load, index_col=0, dtype=str,
@@ -106,10 +117,31 @@ class Bifurcation(object):
         return bifurcation_data_list
 
     def _compute_bifurcation_data_list(self) -> list[BifurcationData]:
-        # Compute bifurcation_data
+        """
+        Compute bifurcation_data: stability detection, stability ranges, bistability, and threshold for regime shift
+        """
         log_info(f'Compute bifurcation data for all ensemble members ({self.calibration.ensemble_size} members)')
-        return parallelize(self._compute_bifurcation_data, self.ensemble_ids)
+        #  Continuations are computed in parallel from the parameters of this calibration, which is thus shared
+        params_list = [self.calibration.ensemble_id_to_params[ensemble_id] for ensemble_id in self.ensemble_ids]
+        bifurcation_attributes_list = get_bifurcation_attributes_list(self.calibration.dynamical_model, params_list,
+                                                                      self.min_forcing, self.max_forcing)
+        bifurcation_data_list = []
+        with span('bifurcation.bifurcation_data'):
+            for ensemble_id, bifurcation_attributes in zip(self.ensemble_ids, bifurcation_attributes_list):
+                #  A member whose continuation failed is kept in the ensemble, without any threshold
+                if bifurcation_attributes is None:
+                    logging.warning(f'Continuation failed for the member {ensemble_id}')
+                    bifurcation_data_list.append(BifurcationData.from_failed_continuation(self.min_forcing,
+                                                                                          self.max_forcing))
+                    continue
+                forcing_to_attractors, forcing_to_repulsor, stability_ranges, stability_detection = \
+                    bifurcation_attributes
+                bifurcation_data = BifurcationData(stability_ranges, stability_detection, self.min_forcing,
+                                                   self.max_forcing, forcing_to_attractors, forcing_to_repulsor)
+                bifurcation_data_list.append(bifurcation_data)
+        return bifurcation_data_list
 
+    @span('bifurcation.save')
     def _save_bifurcation_data_list(self, bifurcation_data_list: list[BifurcationData]):
         stability_filepath_to_save = self.path_manager.filepath_to_save
         if op.isfile(stability_filepath_to_save):
@@ -126,20 +158,4 @@ class Bifurcation(object):
             df = pd.DataFrame(ensemble_id_to_series).transpose()
             df.index.name = 'ensemble_id'
             df.to_csv(stability_filepath_to_save)
-
-    def _compute_bifurcation_data(self, ensemble_id: int) -> BifurcationData:
-        """
-        Compute bifurcation_data: stability detection, stability ranges, bistability, and threshold for regime shift
-        """
-        watershed_name = self.filename_manager.forcing_function_name
-        bifurcation_attributes = get_bifurcation_attributes(watershed_name, ensemble_id, self.min_forcing, self.max_forcing)
-        forcing_to_attractors, forcing_to_repulsor, stability_ranges, stability_detection = bifurcation_attributes
-        bifurcation_data = BifurcationData(stability_ranges, stability_detection, self.min_forcing, self.max_forcing,
-                                           forcing_to_attractors, forcing_to_repulsor)
-
-
-        if ensemble_id == 0:
-            log_info('Computing bifurcation_data...')
-        if ensemble_id % 10 == 0:
-            log_info(ensemble_id)
-        return bifurcation_data
+            self.path_manager.add_to_catalog()
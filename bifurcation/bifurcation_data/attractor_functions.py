@@ -6,6 +6,7 @@ from calibration.dynamical_model.dynamical_model import DynamicalModel
 from calibration.forcing_function.constant_forcing_function import RainConstantForcingOnlyForSolver
 from calibration.utils_calibration.convert import load_times
 from calibration.utils_calibration.solve import SolverIvp, SolverMethod
+from utils.utils_instrumentation import increment
 
 
 def get_forcing_to_attractors(stability_detection):
@@ -63,13 +64,17 @@ def get_upper_attractor(dynamical_model: DynamicalModel, params: dict[str, float
 def get_attractor(dynamical_model: DynamicalModel, params: dict[str, float], forcing: float,
                   initial_state: np.ndarray, solver_method: SolverMethod) -> np.ndarray:
     assert isinstance(forcing, float)
+    increment('attractor.nb_searches')
     for nb_iterations in [20, 40, 60, 80, 100, 200, 1000, 2000, 10000]:
+        #  Depth of the convergence ladder (summed over the searches)
+        increment('attractor.ladder_depth')
         attractor, has_converged = _get_attractor(dynamical_model, params, forcing, initial_state, nb_iterations,
                                                   solver_method)
         #  If process has converged we return the attractor
         if has_converged:
             return attractor
     #  We return the final state for the longest trajectory
+    increment('attractor.nb_not_converged')
     return attractor
 
 
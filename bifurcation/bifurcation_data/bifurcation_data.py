@@ -6,7 +6,7 @@ from typing import Union
 import numpy as np
 import pandas as pd
 
-from bifurcation.bifurcation_data.attractor_functions import compute_forcing_to_attractors
+from bifurcation.bifurcation_data.attractor_functions import compute_forcing_to_attractors, get_attractors
 from bifurcation.bifurcation_data.bistability_functions import compute_is_bistable
 from bifurcation.bifurcation_data.repulsor_functions import compute_empty_forcing_to_repulsor
 from bifurcation.bifurcation_data.stability_detection_function import compute_stability_detection
@@ -26,6 +26,9 @@ class BifurcationData(object):
     max_forcing: float
     forcing_to_attractors: dict[float, list[np.ndarray]] = field(default_factory=dict)
     forcing_to_repulsor: dict[float, float] = field(default_factory=dict)
+    #  Attractors solved on demand for forcings that are not stored (they are never saved)
+    _forcing_to_solved_attractors: dict[float, list[np.ndarray]] = field(default_factory=dict, init=False,
+                                                                          repr=False, compare=False)
 
     def __post_init__(self):
         #  Check data
@@ -40,6 +43,31 @@ class BifurcationData(object):
     def is_bistable(self) -> bool:
         return compute_is_bistable(self.stability_detection)
 
+    @cached_property
+    def attractor_tensor(self) -> tuple[np.ndarray, np.ndarray]:
+        """Attractors as arrays: the sorted forcings, and a tensor (forcings x 2 x states) with the lower
+        and the upper attractor for each forcing (both are equal if the forcing has a single attractor)"""
+        forcing_to_attractors = {**self._forcing_to_solved_attractors, **self.forcing_to_attractors}
+        forcings = np.array(sorted(forcing_to_attractors.keys()), dtype=float)
+        tensor = np.array([[forcing_to_attractors[forcing][0], forcing_to_attractors[forcing][-1]]
+                           for forcing in forcings], dtype=float)
+        return forcings, tensor
+
+    def get_attractor_tensor(self, forcings: np.ndarray, dynamical_model: DynamicalModel, params: dict[str, float],
+                             solver_method: SolverMethod) -> np.ndarray:
+        """Load the lower and upper attractors (forcings x 2 x states) for a list of forcings.
+        Only the attractors of the forcings that are not stored are solved, then they are cached"""
+        forcings = np.asarray(forcings, dtype=float)
+        stored_forcings, tensor = self.attractor_tensor
+        missing_forcings = np.unique(forcings[~np.isin(forcings, stored_forcings)])
+        if len(missing_forcings) > 0:
+            for forcing in missing_forcings:
+                self._forcing_to_solved_attractors[float(forcing)] = get_attractors(dynamical_model, params,
+                                                                                    float(forcing), solver_method)
+            del self.attractor_tensor
+            stored_forcings, tensor = self.attractor_tensor
+        return tensor[np.searchsorted(stored_forcings, forcings)]
+
     @classmethod
     def from_dynamical_model(cls, dynamical_model: DynamicalModel, params: dict[str, float], min_forcing: float,
                              max_forcing: float, solver_method: SolverMethod):
@@ -57,6 +85,12 @@ class BifurcationData(object):
         return cls(stability_ranges, stability_detection, min_forcing, max_forcing,
                    forcing_to_attractors, forcing_to_repulsor)
 
+    @classmethod
+    def from_failed_continuation(cls, min_forcing: float, max_forcing: float):
+        #  Nan stability ranges and no attractor, thus the member is monostable and it has no threshold
+        stability_ranges = ((np.nan, np.nan), (np.array([np.nan]), np.array([np.nan])))
+        return cls(stability_ranges, OrderedDict(), min_forcing, max_forcing)
+
     def to_series(self) -> pd.Series:
         #  First columns the ranges
         columns = ['ranges {}'.format(i) for i in range(4)]
@@ -0,0 +1,96 @@
+import fcntl
+import os
+import os.path as op
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from calibration.utils_calibration.solve import SolverMethod, solver_method_to_str
+from utils.utils_path.utils_path import DEGENERACY_DATA_PATH
+
+#  Constants of the 64-bit FNV-1a hash
+FNV_OFFSET_BASIS = np.uint64(14695981039346656037)
+FNV_PRIME = np.uint64(1099511628211)
+
+
+def hash_params_vector_list(params_vector_list: np.ndarray) -> np.ndarray:
+    """Hash each vector of parameters (each row) into a 64-bit integer.
+    The hash relies on the exact binary representation of the parameters, and it is computed for all rows at once"""
+    words = np.ascontiguousarray(params_vector_list, dtype=np.float64).view(np.uint64)
+    hashes = np.full(len(words), FNV_OFFSET_BASIS, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for j in range(words.shape[1]):
+            hashes ^= words[:, j]
+            hashes *= FNV_PRIME
+    return hashes
+
+
+@dataclass
+class DegeneracyCache(object):
+    """Persistent degeneracy flags of a dynamical model (solved with a solver method)
+
+    The degeneracy only depends on the parameters, thus the flags are keyed by the hash of the vector of parameters.
+    The hashes are sorted, and the lookup of a batch of hashes relies on a binary search"""
+    model_name: str
+    solver_method: SolverMethod
+    path: str = DEGENERACY_DATA_PATH
+    _hashes: np.ndarray = field(default=None, init=False, repr=False)
+    _is_degenerate: np.ndarray = field(default=None, init=False, repr=False)
+
+    @property
+    def filepath(self) -> str:
+        return op.join(self.path, f'{self.model_name}_{solver_method_to_str[self.solver_method]}.npz')
+
+    def __len__(self) -> int:
+        self._load_if_needed()
+        return len(self._hashes)
+
+    def lookup(self, hashes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return for each hash whether it has been found, and its degeneracy flag (False if not found)"""
+        self._load_if_needed()
+        indices = np.minimum(np.searchsorted(self._hashes, hashes), max(len(self._hashes) - 1, 0))
+        if len(self._hashes) == 0:
+            is_found = np.zeros(len(hashes), dtype=bool)
+        else:
+            is_found = self._hashes[indices] == hashes
+        is_degenerate = np.zeros(len(hashes), dtype=bool)
+        is_degenerate[is_found] = self._is_degenerate[indices[is_found]]
+        return is_found, is_degenerate
+
+    def update(self, hashes: np.ndarray, is_degenerate: np.ndarray) -> None:
+        """Add new flags, and save them with the flags saved by other processes in the meantime"""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.filepath + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                saved_hashes, saved_is_degenerate = self._load()
+                all_hashes = np.concatenate([saved_hashes, np.asarray(hashes, dtype=np.uint64)])
+                all_is_degenerate = np.concatenate([saved_is_degenerate, np.asarray(is_degenerate, dtype=bool)])
+                all_hashes, indices = np.unique(all_hashes, return_index=True)
+                self._hashes, self._is_degenerate = all_hashes, all_is_degenerate[indices]
+                tmp_filepath = f'{self.filepath}.{os.getpid()}.tmp.npz'
+                np.savez(tmp_filepath, hashes=self._hashes, is_degenerate=self._is_degenerate)
+                os.replace(tmp_filepath, self.filepath)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_if_needed(self) -> None:
+        if self._hashes is None:
+            self._hashes, self._is_degenerate = self._load()
+
+    def _load(self) -> tuple[np.ndarray, np.ndarray]:
+        if not op.exists(self.filepath):
+            return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+        with np.load(self.filepath, allow_pickle=False) as data:
+            return data['hashes'], data['is_degenerate']
+
+
+#  Caches loaded in this process
+_key_to_degeneracy_cache = {}
+
+
+def get_degeneracy_cache(model_name: str, solver_method: SolverMethod) -> DegeneracyCache:
+    key = (model_name, solver_method)
+    if key not in _key_to_degeneracy_cache:
+        _key_to_degeneracy_cache[key] = DegeneracyCache(model_name, solver_method)
+    return _key_to_degeneracy_cache[key]
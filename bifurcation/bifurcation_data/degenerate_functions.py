@@ -1,9 +1,38 @@
+from functools import partial
+
+import numpy as np
+
 from bifurcation.bifurcation_data.attractor_functions import get_lower_attractor
+from bifurcation.bifurcation_data.degeneracy_cache import get_degeneracy_cache, hash_params_vector_list
 from calibration.dynamical_model.dynamical_model import DynamicalModel
 from calibration.utils_calibration.solve import SolverMethod
-from tests.bifurcation.test_stability_ranges import solver_method
+from utils.utils_log import log_info
+from utils.utils_multiprocessing import parallelize
 
 
 def compute_is_degenerate(dynamical_model: DynamicalModel, params: dict[str, float], solver_method: SolverMethod) -> bool:
     attractor = get_lower_attractor(dynamical_model, params, 2000., solver_method)
     return attractor[0] < 0.1
+
+
+def compute_is_degenerate_list(dynamical_model: DynamicalModel, params_vector_list: np.ndarray,
+                               solver_method: SolverMethod, parallel: bool = True) -> np.ndarray:
+    """Compute the degeneracy of each vector of parameters (in the order of dynamical_model.parameter_names).
+    The degeneracy only depends on the parameters, thus the flags are cached on disk,
+    and only the vectors of parameters that have never been screened are solved"""
+    params_vector_list = np.asarray(params_vector_list, dtype=float)
+    hashes = hash_params_vector_list(params_vector_list)
+    degeneracy_cache = get_degeneracy_cache(dynamical_model.name, solver_method)
+    is_found, is_degenerate = degeneracy_cache.lookup(hashes)
+    log_info(f'Degeneracy screen: {int(is_found.sum())} cached and {int((~is_found).sum())} new parameters')
+    if not is_found.all():
+        new_indices = np.nonzero(~is_found)[0]
+        function = partial(_compute_is_degenerate_from_params_vector, dynamical_model, solver_method)
+        is_degenerate[new_indices] = parallelize(function, list(params_vector_list[new_indices]), parallel=parallel)
+        degeneracy_cache.update(hashes[new_indices], is_degenerate[new_indices])
+    return is_degenerate
+
+
+def _compute_is_degenerate_from_params_vector(dynamical_model: DynamicalModel, solver_method: SolverMethod,
+                                              params_vector: np.ndarray) -> bool:
+    return compute_is_degenerate(dynamical_model, dynamical_model.get_params(params_vector), solver_method)
@@ -7,7 +7,6 @@ import numpy as np
 from calibration.dynamical_model.dynamical_model import DynamicalModel
 from bifurcation.bifurcation_data.attractor_functions import get_attractor
 from calibration.utils_calibration.solve import SolverMethod
-from tests.bifurcation.test_stability_ranges import solver_method
 
 
 def compute_empty_forcing_to_repulsor(stability_ranges, max_forcing):
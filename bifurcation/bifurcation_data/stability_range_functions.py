@@ -1,3 +1,4 @@
+import math
 from typing import Union
 
 import numpy as np
@@ -54,6 +55,32 @@ def compute_stability_ranges(forcing_to_attractors: dict[float, list[np.ndarray]
     return stability_forcing_range, stability_state_range
 
 
+def compute_stability_ranges_from_fold_forcings(forcing_to_attractors: dict[float, list[np.ndarray]],
+                                                stability_detection: Union[float, dict[float, np.ndarray]],
+                                                lower_fold_forcings: list[float], upper_fold_forcings: list[float],
+                                                min_forcing: float, max_forcing: float) -> tuple[tuple[float, float], tuple[np.ndarray, np.ndarray]]:
+    """
+    Compute the range of stability (see compute_stability_ranges) from the limit points located by the continuation.
+    The bistable range lies between the limit point where the forcing reaches a local minimum (lower fold)
+    and the limit point where it reaches a local maximum (upper fold).
+    Close to a limit point, the continuation may oscillate and detect several limit points,
+    thus we consider the lowest lower fold and the largest upper fold.
+
+    We fall back on the binary search when the limit points disagree with the attractors.
+    """
+    if compute_is_bistable(stability_detection) and len(lower_fold_forcings) > 0 and len(upper_fold_forcings) > 0:
+        #  Largest forcing below the range and lowest forcing above the range
+        lower_bound = float(math.ceil(min(lower_fold_forcings)) - 1)
+        upper_bound = float(math.floor(max(upper_fold_forcings)) + 1)
+        if (min_forcing <= lower_bound < stability_detection < upper_bound <= max_forcing) \
+                and (not is_bistable(forcing_to_attractors.get(lower_bound, [None, None]))) \
+                and (not is_bistable(forcing_to_attractors.get(upper_bound, [None, None]))):
+            stability_forcing_range = lower_bound, upper_bound
+            stability_state_range = forcing_to_attractors[lower_bound][0], forcing_to_attractors[upper_bound][0]
+            return stability_forcing_range, stability_state_range
+    return compute_stability_ranges(forcing_to_attractors, stability_detection, min_forcing, max_forcing)
+
+
 class StabilityRangeError(ValueError):
     pass
 
@@ -3,9 +3,7 @@ import numpy as np
 
 from bifurcation.regime import Regime, regime_to_name
 from bifurcation.bifurcation import Bifurcation
-from bifurcation.bifurcation_data.attractor_functions import get_attractors
 from bifurcation.bifurcation_data.bifurcation_data import BifurcationData
-from bifurcation.bifurcation_data.bistability_functions import is_bistable
 from bifurcation.shift_range.shift_range import ShiftRange
 from bifurcation.shift_range.shift_range_visualisation import plot_shift_range_marker, \
     plot_ticks_shift_range
@@ -76,9 +74,8 @@ def _plot_shift_range_our_definition(ax, shift_range, forcing_list, calibration,
         plot_ticks_shift_range(ax, shift_range, size=15)
         points = [shift_range.middle_state_value for _ in forcing_list]
     else:
-        points = [
-            calibration.get_variable(variable_name, ensemble_id, forcing, np.array([shift_range.middle_state_value]))
-            for forcing in forcing_list]
+        state_vectors = np.full((len(forcing_list), 1), shift_range.middle_state_value)
+        points = calibration.get_variables(variable_name, ensemble_id, forcing_list, state_vectors)
 
     ax.plot(forcing_list, points, linestyle='dashed', color='orange', linewidth=2, label='Separation of the two regimes')
     #  Plot regime names
@@ -101,7 +98,9 @@ def _plot_bifurcation_graph(calibration: Calibration, ax,
     #  Setting to plot attractor/repulsor lines
     color, linewidth, label = 'k', 3, 'Attractors'
     params = calibration.ensemble_id_to_params[ensemble_id]
-    attractors_list = [get_attractors(calibration.dynamical_model, params, forcing, calibration.solver_method) for forcing in forcing_list]
+    #  Attractors are loaded from the bifurcation data (only the forcings which are not stored are solved)
+    attractor_tensor = bifurcation_data.get_attractor_tensor(forcing_list, calibration.dynamical_model, params,
+                                                             calibration.solver_method)
     if bifurcation_data.is_bistable:
         lower_bound, upper_bound = bifurcation_data.stability_ranges[0]
         if np.isnan(upper_bound):
@@ -110,40 +109,33 @@ def _plot_bifurcation_graph(calibration: Calibration, ax,
                      'the bistability range ({} {})'.format(lower_bound, upper_bound)
         assert max(forcing_list) > lower_bound, error_name
         assert min(forcing_list) < upper_bound, error_name
-        plot_attractor_branch(attractors_list, ax, calibration, color, ensemble_id, forcing_list, linewidth,
+        plot_attractor_branch(attractor_tensor, ax, calibration, color, ensemble_id, forcing_list, linewidth,
                               lower_bound, upper_bound, variable_name, label)
         #  Repulsor
         forcings_for_repulsors = list(bifurcation_data.forcing_to_repulsor.keys())
-        repulsors = list(bifurcation_data.forcing_to_repulsor.values())
-        variables = [calibration.get_variable(variable_name, ensemble_id, forcing, np.array([repulsor]))
-                     for forcing, repulsor in zip(forcings_for_repulsors, repulsors)]
+        repulsors = np.array(list(bifurcation_data.forcing_to_repulsor.values()))
+        variables = calibration.get_variables(variable_name, ensemble_id, forcings_for_repulsors,
+                                              repulsors.reshape(-1, 1))
         ax.plot(forcings_for_repulsors, variables, color=color, linestyle="dotted", linewidth=linewidth,
                 label='Repellers')
     else:
-        state_vectors = [attractors[0] for attractors in attractors_list]
-        states_list = [calibration.dynamical_model.create_states(state_vector) for state_vector in state_vectors]
-        forcings_list = [calibration.forcing_function.create_forcings([forcing]) for forcing in forcing_list]
-        variables = [calibration.dynamical_model.get_variable(variable_name, forcings, states, params)
-                     for forcings, states in zip(forcings_list, states_list)]
+        variables = calibration.get_variables(variable_name, ensemble_id, forcing_list, attractor_tensor[:, 0])
         ax.plot(forcing_list, variables, color='k', linewidth=linewidth, label=label)
     ax.legend(loc='upper left')
 
 
-def plot_attractor_branch(attractors_list, ax, calibration, color, ensemble_id, forcing_list, linewidth, lower_bound,
+def plot_attractor_branch(attractor_tensor, ax, calibration, color, ensemble_id, forcing_list, linewidth, lower_bound,
                           upper_bound, variable_name, label):
+    forcing_list = np.asarray(forcing_list)
     bistability_branch_to_data = dict()
-    #  Lower branch
-    bistability_branch_to_data[False] = [(attractors[0], forcing)
-                                         for attractors, forcing in zip(attractors_list, forcing_list) if
-                                         forcing < upper_bound]
-    #  Upper branch
-    bistability_branch_to_data[True] = [
-        (attractors[1], forcing) if is_bistable(attractors) else (attractors[0], forcing)
-        for attractors, forcing in zip(attractors_list, forcing_list) if lower_bound < forcing]
-    for bistability_branch, branch_data in bistability_branch_to_data.items():
-        state_vectors, branch_forcings = list(zip(*branch_data))
-        variables = [calibration.get_variable(variable_name, ensemble_id, forcing, state_vector)
-                     for forcing, state_vector in zip(branch_forcings, state_vectors)]
+    #  Lower branch
+    is_lower_branch = forcing_list < upper_bound
+    bistability_branch_to_data[False] = (attractor_tensor[is_lower_branch, 0], forcing_list[is_lower_branch])
+    #  Upper branch (the upper attractor equals the lower attractor when there is a single attractor)
+    is_upper_branch = lower_bound < forcing_list
+    bistability_branch_to_data[True] = (attractor_tensor[is_upper_branch, 1], forcing_list[is_upper_branch])
+    for bistability_branch, (state_vectors, branch_forcings) in bistability_branch_to_data.items():
+        variables = calibration.get_variables(variable_name, ensemble_id, branch_forcings, state_vectors)
         actual_label = label if bistability_branch else None
         ax.plot(branch_forcings, variables, color=color, linewidth=linewidth, label=actual_label)
 
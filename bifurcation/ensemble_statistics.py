@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable
+
+import numpy as np
+
+from bifurcation.bifurcation_data.bifurcation_data import BifurcationData
+
+
+@dataclass
+class EnsembleThresholds(object):
+    """Forcing threshold of each ensemble member, e.g. the lower bound of its bistable range
+    (np.nan if the member has no threshold, it is never counted but it belongs to the ensemble).
+    The thresholds are sorted once, then the fraction of the members whose threshold is below a forcing
+    is computed for a whole grid of forcings with a binary search"""
+    thresholds: np.ndarray
+
+    @classmethod
+    def from_bifurcation_data_list(cls, bifurcation_data_list: list[BifurcationData],
+                                   get_threshold: Callable[[BifurcationData], float]) -> 'EnsembleThresholds':
+        return cls(np.array([get_threshold(bifurcation_data) for bifurcation_data in bifurcation_data_list],
+                            dtype=float))
+
+    @cached_property
+    def sorted_thresholds(self) -> np.ndarray:
+        return np.sort(self.thresholds[~np.isnan(self.thresholds)])
+
+    def compute_fractions_below(self, forcings: np.ndarray, strict: bool = True) -> np.ndarray:
+        """Fraction of the members whose threshold is lower than each forcing (or equal, if not strict)"""
+        counts = np.searchsorted(self.sorted_thresholds, np.asarray(forcings, dtype=float),
+                                 side='left' if strict else 'right')
+        return counts / len(self.thresholds)
+
+    def compute_percentages_below(self, forcings: np.ndarray, strict: bool = True) -> np.ndarray:
+        return 100 * self.compute_fractions_below(forcings, strict)
+
+
+def get_lower_bound(bifurcation_data: BifurcationData) -> float:
+    """First forcing of the bistable range (np.nan for a monostable member)"""
+    return bifurcation_data.stability_ranges[0][0]
+
+
+def get_shift_range_forcing_upper_state(bifurcation_data: BifurcationData) -> float:
+    """Forcing at the start of the upper branch of the shift range (np.nan for a monostable member)"""
+    return bifurcation_data.shift_range.forcing_upper_state if bifurcation_data.is_bistable else np.nan
+
+
+def get_shift_range_forcing_lower_state(bifurcation_data: BifurcationData) -> float:
+    """Forcing at the end of the lower branch of the shift range (np.nan for a monostable member)"""
+    return bifurcation_data.shift_range.forcing_lower_state if bifurcation_data.is_bistable else np.nan
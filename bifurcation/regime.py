@@ -36,6 +36,11 @@ def compute_regime(bifurcation: Bifurcation, calibration: Calibration, ensemble_
     bifurcation_data = bifurcation.ensemble_id_to_bifurcation_data[ensemble_id]
     state_value = calibration.get_model_variable(year, calibration.dynamical_model.unique_state_name, ensemble_id)
     forcing = calibration.forcing_function.year_to_forcing[year]
+    return compute_regime_from_bifurcation_data(bifurcation_data, state_value, forcing, regime_def)
+
+
+def compute_regime_from_bifurcation_data(bifurcation_data: BifurcationData, state_value: float, forcing: float,
+                                         regime_def: RegimeDef = RegimeDef.threshold) -> Regime:
     if bifurcation_data.is_bistable:
         if regime_def is RegimeDef.threshold:
             return compute_bistable_regime_with_threshold(bifurcation_data, state_value, forcing)
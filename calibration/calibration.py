@@ -1,8 +1,9 @@
+import os
 import os.path as op
 from collections import OrderedDict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import cached_property
-from operator import itemgetter
+from typing import Optional
 
 import numpy as np
 import pandas as pd
@@ -10,15 +11,24 @@ import pandas as pd
 from calibration.dynamical_model.dynamical_model import DynamicalModel
 from calibration.forcing_function.forcing_function import ForcingFunction
 from calibration.observation_constraint.vegetation.ortonde_vegetation_constraint import ObservationConstraint
+from calibration.utils_calibration.checkpoint import CalibrationCheckpoint, get_ensemble_sample_ids
 from calibration.utils_calibration.convert import get_year_from_time, load_times, get_time_from_year
-from calibration.utils_calibration.load_sample import sampling_to_load_function
+from calibration.utils_calibration.emulation import Emulator, get_nb_training_samples
+from calibration.utils_calibration.load_sample import sampling_to_load_function, SharedSampling
+from calibration.utils_calibration.metrics import get_df_metrics
 from calibration.utils_calibration.sampling import Sampling, sampling_to_str
 from calibration.utils_calibration.solve import SolverIvp, SolverMethod, solver_method_to_str
+from calibration.utils_calibration.solver_statistics import SolverStatistics, get_df_solver_statistics, \
+    get_solver_statistics_histograms
+from utils.utils_instrumentation import span, get_report, save_report
 from utils.utils_log import log_info
 from utils.utils_multiprocessing import parallelize
 from utils.utils_path.filename_manager.calibration_filename_manager import CalibrationFilenameManager
 from utils.utils_path.path_manager import PathManager
-from utils.utils_path.utils_path import CALIBRATION_DATA_PATH
+from utils.utils_path.utils_path import CALIBRATION_DATA_PATH, CALIBRATION_SNAPSHOT_PATH, CHECKPOINT_DATA_PATH, \
+    EMULATION_DATA_PATH, DATA_PATH, get_path_in_data_tree
+from utils.utils_run import use_calibration_snapshot
+from utils.utils_snapshot import load_snapshot, save_snapshot, get_snapshot_filepath
 
 
 @dataclass
@@ -35,8 +45,17 @@ class Calibration(object):
     nb_years_for_initial_state: int = 1
     sampling: Sampling = Sampling.V1
     solver_method: SolverMethod = SolverMethod.RK45
+    checkpoint_chunk_size: Optional[int] = None  #  if not None, the samples are solved and checkpointed by chunks
+    calibration_to_extend: Optional['Calibration'] = None  #  if not None, extend its ensemble to new years
+    shared_sampling: Optional[SharedSampling] = None  #  sampling shared with the calibrations of other watersheds
+    emulation: bool = False  #  if True, an emulator of the error selects the samples that are solved
+    max_nfev: Optional[int] = None  #  if not None, budget of rhs evaluations of a trajectory (see SolverIvp)
+    data_path: str = DATA_PATH  #  root of the data tree where the calibration and its reports are saved
+    #  Statistics of the solver for the samples solved by this calibration (they are not sent to the processes)
+    _solver_statistics_dfs: list[pd.DataFrame] = field(default_factory=list, init=False, repr=False)
 
     def __post_init__(self):
+        report_at_start = get_report()
         #   Default value for the initial year for loading
         if self.initial_year_for_loading is None:
             self.initial_year_for_loading = self._initial_year_without_loading
@@ -56,23 +75,38 @@ class Calibration(object):
         #  Save calibration
         if not self.loading_calibration_with_same_forcing:
             self.save_calibration()
+            solver_statistics_histograms = self.save_solver_statistics()
+            #  Report of the stages that computed and saved this calibration
+            save_report(self.path_manager.report_filepath, since=report_at_start,
+                        filename=self.path_manager.filename_to_save, nb_samples=self.nb_samples,
+                        ensemble_size=self.ensemble_size, solver_statistics=solver_statistics_histograms)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_solver_statistics_dfs'] = []
+        return state
 
     def create_managers(self):
         filename_manager = CalibrationFilenameManager(self.observation_constraint.name, self.nb_samples,
                                                       self.forcing_function.name, self.ensemble_size,
                                                       self.initial_year_for_loading, self.nb_years_for_initial_state,
                                                       self.sampling_str, self.solver_method_str)
-        path_manager = PathManager(op.join(CALIBRATION_DATA_PATH, self.dynamical_model.name),
-                                   filename_manager)
+        path_manager = PathManager(op.join(get_path_in_data_tree(CALIBRATION_DATA_PATH, self.data_path),
+                                           self.dynamical_model.name), filename_manager, self.data_path)
         return filename_manager, path_manager
 
     @property
     def sampling_str(self) -> str:
-        return sampling_to_str[self.sampling]
+        #  Calibrations with emulation are saved separately since some samples have not been solved,
+        #  and extended calibrations too since their ensemble is only ranked among the extended members
+        return sampling_to_str[self.sampling] + ('e' if self.emulation else '') \
+            + ('x' if self.calibration_to_extend is not None else '')
 
     @property
     def solver_method_str(self):
-        return solver_method_to_str[self.solver_method]
+        #  Calibrations with a budget of rhs evaluations are saved separately since some samples are solved
+        #  with cheaper settings
+        return solver_method_to_str[self.solver_method] + ('' if self.max_nfev is None else f'max{self.max_nfev}')
 
     @property
     def initial_year(self) -> int:
@@ -116,16 +150,33 @@ class Calibration(object):
             -If self.loading_calibration is True, we load parameters, and we either:
                 -solve state trajectories, compute error (if self.loading_same_calibration is False)
                 -load state trajectories, load error (if self.loading_same_calibration is True)
+            -If self.calibration_to_extend is not None, we extend its trajectories and errors to the new years
         """
+        if self.calibration_to_extend is not None and not self.loading_calibration:
+            return self._extend_solve_data()
+        if self.sampling is Sampling.SMC and not self.loading_calibration:
+            return self._solve_data_with_adaptive_sampling()
         #  Load calibration and sample parameters
         if self.loading_calibration:
             params_vector_list, state_vectors_list, error_list, _ = self._loaded_calibration
+        elif self.checkpoint is not None and self.checkpoint.load_params_vector_list() is not None:
+            #  Resume with the parameters sampled before the interruption
+            params_vector_list = self.checkpoint.load_params_vector_list()
+            log_info(f'Resume calibration from {len(self.checkpoint.completed_chunk_ids)}/{self.checkpoint.nb_chunks} '
+                     f'completed chunks')
+            state_vectors_list, error_list = None, None
         else:
-            load_function = sampling_to_load_function[self.sampling]
-            params_vector_list = load_function(self.dynamical_model, self.nb_samples, self.initial_year,
-                                               self.get_forcings(self.initial_year), self.observation_constraint,
-                                               self.sampling, self.solver_method)
+            if self.shared_sampling is not None:
+                load_function = self.shared_sampling.load_params_vector_list
+            else:
+                load_function = sampling_to_load_function[self.sampling]
+            with span('calibration.sampling'):
+                params_vector_list = load_function(self.dynamical_model, self.nb_samples, self.initial_year,
+                                                   self.get_forcings(self.initial_year), self.observation_constraint,
+                                                   self.sampling, self.solver_method)
             state_vectors_list, error_list = None, None
+            if self.checkpoint is not None:
+                self.checkpoint.save_params_vector_list(params_vector_list)
         #   Load params dictionary
         params_list = [self.dynamical_model.get_params(params_vector) for params_vector in params_vector_list]
         assert len(params_list) >= self.ensemble_size, \
@@ -139,26 +190,198 @@ class Calibration(object):
                 return params_list, state_vectors_list, error_list
             else:
                 #  Solve only the end trajectory (from the year self.final_year_for_loading + 1)
-                state_vectors_list = parallelize(self.solve_end_trajectory, list(zip(params_list, state_vectors_list)))
+                with span('calibration.integration'):
+                    state_vectors_list = parallelize(self.solve_end_trajectory,
+                                                     list(zip(params_list, state_vectors_list)))
                 #  Replace errors by nan values, as we do not need to compute error when we load from other calibration
                 error_list = [np.nan for _ in range(len(error_list))]
                 return params_list, state_vectors_list, error_list
+        elif self.checkpoint is not None:
+            return self._solve_data_by_chunk(params_list)
+        elif self.emulation:
+            return self._solve_data_with_emulation(params_list)
         else:
             #  Solve the full trajectory (parallelize here because this is called when we have lots of samples)
-            state_vectors_list = parallelize(self.solve_full_trajectory, enumerate(params_list))
+            state_vectors_list = self._solve_full_trajectories(np.arange(len(params_list)), params_list)
             #  Compute the error
-            error_list = parallelize(self.compute_composite_rmse, list(zip(state_vectors_list, params_list)))
-            # Sort the results, compute the ensemble sample ids (that correspond to the sample with the lowest error)
-            sample_id_to_error = dict(list(enumerate(error_list)))
-            sorted_sample_ids = [k for k, v in sorted(sample_id_to_error.items(), key=itemgetter(1))]
-            ensemble_sample_ids = sorted_sample_ids[:self.ensemble_size]
+            with span('calibration.rmse'):
+                error_list = parallelize(self.compute_composite_rmse, list(zip(state_vectors_list, params_list)))
+            #  Compute the ensemble sample ids (that correspond to the sample with the lowest error) as the
+            #  checkpointed calibration (nan errors are ranked last), thus a resumed run selects the same ensemble
+            ensemble_sample_ids = get_ensemble_sample_ids(np.arange(len(error_list)), error_list, self.ensemble_size)
             #  Order the solutions according to their error (the first correspond to the lowest error)
             ensemble_params_list = [params_list[i] for i in ensemble_sample_ids]
             ensemble_state_vectors_list = [state_vectors_list[i] for i in ensemble_sample_ids]
             ensemble_error_list = [error_list[i] for i in ensemble_sample_ids]
             return ensemble_params_list, ensemble_state_vectors_list, ensemble_error_list
 
-    def solve_full_trajectory(self, sample_id_and_params: tuple[int, dict[str, float]]):
+    @cached_property
+    def checkpoint(self) -> Optional[CalibrationCheckpoint]:
+        if self.checkpoint_chunk_size is None or self.loading_calibration:
+            return None
+        assert not self.emulation, 'checkpoints are not available with emulation'
+        return CalibrationCheckpoint(self._get_folder(CHECKPOINT_DATA_PATH), self.nb_samples,
+                                     self.checkpoint_chunk_size)
+
+    def _get_folder(self, path: str) -> str:
+        """Folder of path dedicated to the intermediate data of this calibration"""
+        return op.join(get_path_in_data_tree(path, self.data_path), self.dynamical_model.name,
+                       self.filename_manager.folder, op.splitext(op.basename(self.filename_manager.filename))[0])
+
+    def _solve_samples(self, sample_ids: np.ndarray, params_list: list[dict[str, float]]) \
+            -> tuple[list[np.ndarray], list[float]]:
+        """Solve the full trajectories of some samples, and compute their errors"""
+        samples_params_list = [params_list[i] for i in sample_ids]
+        state_vectors_list = self._solve_full_trajectories(sample_ids, params_list)
+        with span('calibration.rmse'):
+            error_list = parallelize(self.compute_composite_rmse, list(zip(state_vectors_list, samples_params_list)))
+        return state_vectors_list, error_list
+
+    def _solve_full_trajectories(self, sample_ids: np.ndarray, params_list: list[dict[str, float]]) \
+            -> list[np.ndarray]:
+        """Solve the full trajectories of some samples, and keep the statistics of the solver for each sample"""
+        samples_params_list = [params_list[i] for i in sample_ids]
+        with span('calibration.integration'):
+            state_vectors_and_statistics_list = parallelize(self.solve_full_trajectory,
+                                                            list(zip(sample_ids, samples_params_list)))
+        params_vector_list = [self.dynamical_model.get_params_vector(params) for params in samples_params_list]
+        self._solver_statistics_dfs.append(get_df_solver_statistics(
+            sample_ids, params_vector_list, self.dynamical_model.parameter_names,
+            [statistics for _, statistics in state_vectors_and_statistics_list]))
+        return [state_vectors for state_vectors, _ in state_vectors_and_statistics_list]
+
+    def _solve_data_by_chunk(self, params_list: list[dict[str, float]]) \
+            -> tuple[list[dict[str, float]], list[np.ndarray], list[float]]:
+        """Solve the samples chunk by chunk. Each completed chunk is checkpointed with its best samples,
+        thus an interrupted calibration resumes from the last completed chunk and selects the same ensemble"""
+        completed_chunk_ids = set(self.checkpoint.completed_chunk_ids)
+        for chunk_id in range(self.checkpoint.nb_chunks):
+            if chunk_id in completed_chunk_ids:
+                continue
+            sample_ids = self.checkpoint.get_chunk_sample_ids(chunk_id)
+            state_vectors_list, error_list = self._solve_samples(sample_ids, params_list)
+            #  Only the best samples of the chunk can be selected in the ensemble
+            kept_indices = get_ensemble_sample_ids(np.arange(len(sample_ids)), error_list, self.ensemble_size)
+            self.checkpoint.save_chunk(chunk_id, sample_ids[kept_indices],
+                                       np.array([state_vectors_list[i] for i in kept_indices]),
+                                       np.array(error_list)[kept_indices])
+            log_info(f'Checkpointed chunk {chunk_id + 1}/{self.checkpoint.nb_chunks}')
+        #  Merge the chunks and select the samples with the lowest errors
+        sample_id_to_state_vectors_and_error = {}
+        for chunk_id in range(self.checkpoint.nb_chunks):
+            for sample_id, state_vectors, error in zip(*self.checkpoint.load_chunk(chunk_id)):
+                sample_id_to_state_vectors_and_error[int(sample_id)] = (state_vectors, float(error))
+        sample_ids = list(sample_id_to_state_vectors_and_error.keys())
+        errors = [sample_id_to_state_vectors_and_error[sample_id][1] for sample_id in sample_ids]
+        ensemble_sample_ids = get_ensemble_sample_ids(sample_ids, errors, self.ensemble_size)
+        ensemble_params_list = [params_list[i] for i in ensemble_sample_ids]
+        ensemble_state_vectors_list = [sample_id_to_state_vectors_and_error[i][0] for i in ensemble_sample_ids]
+        ensemble_error_list = [sample_id_to_state_vectors_and_error[i][1] for i in ensemble_sample_ids]
+        return ensemble_params_list, ensemble_state_vectors_list, ensemble_error_list
+
+    def _solve_data_with_emulation(self, params_list: list[dict[str, float]]) \
+            -> tuple[list[dict[str, float]], list[np.ndarray], list[float]]:
+        """Solve the first samples to train an emulator of the error, then only solve the remaining samples
+        that the emulator considers as promising, i.e. that could be selected in the ensemble"""
+        params_vector_list = np.array([self.dynamical_model.get_params_vector(params) for params in params_list])
+        nb_training_samples = get_nb_training_samples(len(params_list), self.ensemble_size)
+        training_sample_ids = np.arange(nb_training_samples)
+        state_vectors_list, error_list = self._solve_samples(training_sample_ids, params_list)
+        emulator = Emulator.from_training_samples(params_vector_list[training_sample_ids], error_list,
+                                                  self.ensemble_size)
+        emulator.save(self._get_folder(EMULATION_DATA_PATH))
+        #  Solve the promising samples
+        remaining_sample_ids = np.arange(nb_training_samples, len(params_list))
+        if len(remaining_sample_ids) > 0:
+            promising_sample_ids = remaining_sample_ids[emulator.is_promising(params_vector_list[remaining_sample_ids])]
+        else:
+            promising_sample_ids = remaining_sample_ids
+        log_info(f'Emulator selected {len(promising_sample_ids)} of the {len(remaining_sample_ids)} remaining samples')
+        promising_state_vectors_list, promising_error_list = self._solve_samples(promising_sample_ids, params_list)
+        #  Select the solved samples with the lowest errors
+        solved_sample_ids = np.concatenate([training_sample_ids, promising_sample_ids])
+        state_vectors_list, error_list = state_vectors_list + promising_state_vectors_list, \
+            error_list + promising_error_list
+        ensemble_indices = get_ensemble_sample_ids(np.arange(len(solved_sample_ids)), error_list, self.ensemble_size)
+        return ([params_list[solved_sample_ids[i]] for i in ensemble_indices],
+                [state_vectors_list[i] for i in ensemble_indices], [error_list[i] for i in ensemble_indices])
+
+    def _solve_data_with_adaptive_sampling(self) -> tuple[list[dict[str, float]], list[np.ndarray], list[float]]:
+        """Sample the parameters generation by generation. The samples of each generation are solved to compute
+        the errors that guide the sampling, then the ensemble is selected among all the solved samples"""
+        assert self.checkpoint_chunk_size is None and not self.emulation and self.shared_sampling is None, \
+            'the adaptive sampling cannot be combined with checkpoints, emulation or a shared sampling'
+        params_list, state_vectors_list, error_list = [], [], []
+
+        def error_function(params_vector_list: np.ndarray) -> list[float]:
+            sample_ids = np.arange(len(params_list), len(params_list) + len(params_vector_list))
+            params_list.extend([self.dynamical_model.get_params(params_vector) for params_vector in params_vector_list])
+            generation_state_vectors_list, generation_error_list = self._solve_samples(sample_ids, params_list)
+            state_vectors_list.extend(generation_state_vectors_list)
+            error_list.extend(generation_error_list)
+            return generation_error_list
+
+        load_function = sampling_to_load_function[self.sampling]
+        #  The sampling span includes the integration and rmse spans of the samples
+        with span('calibration.sampling'):
+            load_function(self.dynamical_model, self.nb_samples, self.initial_year,
+                          self.get_forcings(self.initial_year), self.observation_constraint, self.sampling,
+                          self.solver_method, error_function=error_function)
+        assert len(params_list) == self.nb_samples
+        ensemble_sample_ids = get_ensemble_sample_ids(np.arange(len(error_list)), error_list, self.ensemble_size)
+        return ([params_list[i] for i in ensemble_sample_ids], [state_vectors_list[i] for i in ensemble_sample_ids],
+                [error_list[i] for i in ensemble_sample_ids])
+
+    def _extend_solve_data(self) -> tuple[list[dict[str, float]], list[np.ndarray], list[float]]:
+        """Extend the ensemble of calibration_to_extend to new years of forcing and/or of observations.
+        The stored trajectories are only solved for the new years, from their last stored state.
+        The stored errors give the sums of squared errors (error^2 x number of observations),
+        thus only the residuals of the new observations are computed before ranking the ensemble again"""
+        other = self.calibration_to_extend
+        assert other.dynamical_model.name == self.dynamical_model.name
+        assert (other.nb_samples, other.initial_year, other.nb_years_for_initial_state, other.sampling,
+                other.solver_method) == (self.nb_samples, self.initial_year, self.nb_years_for_initial_state,
+                                         self.sampling, self.solver_method), 'incompatible calibration to extend'
+        assert self.ensemble_size <= other.ensemble_size
+        params_list, stored_state_vectors_list, stored_error_list = other.solve_data
+        assert not np.isnan(stored_error_list).all(), 'the errors of the calibration to extend have not been computed'
+        #  Observations already included in the stored errors
+        nb_stored_times = len(stored_state_vectors_list[0])
+        assert nb_stored_times <= len(self.times)
+        stored_observations = self.get_observations(other.observation_constraint, self.times[:nb_stored_times])
+        assert set(stored_observations).issubset(set(self.observations)), 'stored observations have changed'
+        stored_observation_keys = set([(constraint_name, i) for constraint_name, i, _ in stored_observations])
+        new_observations = [observation for observation in self.observations
+                            if observation[:2] not in stored_observation_keys]
+        log_info(f'Extend {len(params_list)} members by {len(self.times) - nb_stored_times} time steps '
+                 f'and {len(new_observations)} observations')
+        with span('calibration.integration'):
+            state_vectors_list = parallelize(self.solve_extended_trajectory,
+                                             list(zip(params_list, stored_state_vectors_list)))
+        error_list = []
+        for params, state_vectors, stored_error in zip(params_list, state_vectors_list, stored_error_list):
+            new_sum_of_squared_errors, nb_new_obs = self.compute_sum_of_squared_errors(state_vectors, params,
+                                                                                       new_observations)
+            sum_of_squared_errors = stored_error ** 2 * len(stored_observations) + new_sum_of_squared_errors
+            error_list.append(float(np.sqrt(sum_of_squared_errors / (len(stored_observations) + nb_new_obs))))
+        #  Rank the ensemble again
+        ensemble_ids = get_ensemble_sample_ids(np.arange(len(error_list)), error_list, self.ensemble_size)
+        return ([params_list[i] for i in ensemble_ids], [state_vectors_list[i] for i in ensemble_ids],
+                [error_list[i] for i in ensemble_ids])
+
+    def solve_extended_trajectory(self, params_and_state_vectors: tuple[dict[str, float], np.ndarray]) -> np.ndarray:
+        """Solve the trajectory from the last stored state to the final year"""
+        params, state_vectors = params_and_state_vectors
+        state_vectors = np.array(state_vectors)
+        nb_stored_times = len(state_vectors)
+        if nb_stored_times == len(self.times):
+            return state_vectors
+        end_state_vectors = SolverIvp.solve(self.dynamical_model, state_vectors[-1], self.times[nb_stored_times - 1:],
+                                            params, self.solver_method, self.max_nfev)
+        return np.concatenate([state_vectors, np.array(end_state_vectors)[1:]])
+
+    def solve_full_trajectory(self, sample_id_and_params: tuple[int, dict[str, float]]) \
+            -> tuple[np.ndarray, SolverStatistics]:
         """Solve the full trajectory, and print the progress at some specific steps"""
         sample_id, params = sample_id_and_params
         #  Print the progress at some specific steps
@@ -166,7 +389,8 @@ class Calibration(object):
         if (self.nb_samples >= 100) and (sample_id % (self.nb_samples // nb_prints) == 0):
             percent = (sample_id * 100 / nb_prints) // (self.nb_samples // nb_prints)
             log_info(f'solved ~{int(percent)}% of {self.nb_samples} samples')
-        return SolverIvp.solve(self.dynamical_model, self.compute_initial_state(params), self.times, params, self.solver_method)
+        return SolverIvp.solve_with_statistics(self.dynamical_model, self.compute_initial_state(params), self.times,
+                                               params, self.solver_method, self.max_nfev)
 
     def compute_initial_state(self, params) -> np.ndarray:
         """Compute the initial state"""
@@ -187,30 +411,48 @@ class Calibration(object):
         initial_index = loaded_times.index(get_time_from_year(self.initial_year_for_loading))
         initial_state_vector = state_vectors[initial_index]
         #  Solve the trajectory
-        return SolverIvp.solve(self.dynamical_model, initial_state_vector, self.times, params, self.solver_method)
+        return SolverIvp.solve(self.dynamical_model, initial_state_vector, self.times, params, self.solver_method,
+                               self.max_nfev)
 
     def compute_composite_rmse(self, state_vectors_and_params: tuple[np.ndarray, dict[str, float]]) -> float:
         state_vectors, params = state_vectors_and_params
-        sum_of_squared_errors = 0
-        nb_obs = 0
-        #  Loop on the constraints
-        for constraint_name in self.observation_constraint.constraint_names:
-            for time, state_vector in zip(self.times, state_vectors):
-                year = get_year_from_time(time)
-                if year in self.observation_constraint.year_to_index:
-                    constraint_value = self.observation_constraint.get_constraint_value(constraint_name, year)
-                    if not np.isnan(constraint_value):
-                        model_value = self.dynamical_model.get_variable(constraint_name, self.get_forcings(year),
-                                                                        self.dynamical_model.create_states(
-                                                                            state_vector), params)
-                        assert isinstance(model_value, float)
-                        sum_of_squared_errors += (model_value - constraint_value) ** 2
-                        nb_obs += 1
+        sum_of_squared_errors, nb_obs = self.compute_sum_of_squared_errors(state_vectors, params, self.observations)
         assert nb_obs > 0
         return np.sqrt(sum_of_squared_errors / nb_obs)
 
+    @cached_property
+    def observations(self) -> list[tuple[str, int, float]]:
+        return self.get_observations(self.observation_constraint, self.times)
+
+    @staticmethod
+    def get_observations(observation_constraint: ObservationConstraint, times: np.ndarray) \
+            -> list[tuple[str, int, float]]:
+        """Return the constraint name, the index of the time and the value of each (non-nan) observation"""
+        observations = []
+        #  Loop on the constraints
+        for constraint_name in observation_constraint.constraint_names:
+            for i, time in enumerate(times):
+                year = get_year_from_time(time)
+                if year in observation_constraint.year_to_index:
+                    constraint_value = observation_constraint.get_constraint_value(constraint_name, year)
+                    if not np.isnan(constraint_value):
+                        observations.append((constraint_name, i, constraint_value))
+        return observations
+
+    def compute_sum_of_squared_errors(self, state_vectors: np.ndarray, params: dict[str, float],
+                                      observations: list[tuple[str, int, float]]) -> tuple[float, int]:
+        sum_of_squared_errors = 0
+        for constraint_name, i, constraint_value in observations:
+            year = get_year_from_time(self.times[i])
+            model_value = self.dynamical_model.get_variable(constraint_name, self.get_forcings(year),
+                                                            self.dynamical_model.create_states(state_vectors[i]),
+                                                            params)
+            assert isinstance(model_value, float)
+            sum_of_squared_errors += (model_value - constraint_value) ** 2
+        return sum_of_squared_errors, len(observations)
+
     def get_forcings(self, year: int) -> dict[str, float]:
-        return self.forcing_function.get_forcings(get_time_from_year(year))
+        return self.forcing_function.get_forcings_for_year(year)
 
     ###########################################
     #
@@ -251,6 +493,33 @@ class Calibration(object):
         params = self.ensemble_id_to_params[ensemble_id]
         return self.dynamical_model.get_variable(variable_name, forcings, states, params)
 
+    def get_variables(self, variable_name: str, ensemble_id: int, forcing_values: np.ndarray,
+                      state_vectors: np.ndarray) -> np.ndarray:
+        params = self.ensemble_id_to_params[ensemble_id]
+        return self.dynamical_model.get_variables(variable_name, forcing_values, state_vectors, params)
+
+    def get_ensemble_simulated_and_observed(self, constraint_name: str) \
+            -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the simulated values of the constraint (members x times), the observed values (times)
+        and the observation mask (times). The variable of each member is computed at once for all the times"""
+        observed = np.full(len(self.times), np.nan)
+        for name, i, constraint_value in self.observations:
+            if name == constraint_name:
+                observed[i] = constraint_value
+        forcing_values = self.forcing_function.get_forcings_at(self.times)[:, 0]
+        simulated = np.array([self.get_variables(constraint_name, ensemble_id, forcing_values,
+                                                 self.ensemble_id_to_state_vectors[ensemble_id])
+                              for ensemble_id in self.ensemble_ids])
+        return simulated, observed, ~np.isnan(observed)
+
+    def get_df_ensemble_metrics(self, constraint_name: Optional[str] = None, bootstrap: bool = False,
+                                **bootstrap_kwargs) -> pd.DataFrame:
+        """Table with the skill metrics (nse, mse, rmse, bias) of each member for a constraint (by default the first)"""
+        if constraint_name is None:
+            constraint_name = self.observation_constraint.constraint_names[0]
+        simulated, observed, mask = self.get_ensemble_simulated_and_observed(constraint_name)
+        return get_df_metrics(simulated, observed, mask, self.ensemble_ids, bootstrap, **bootstrap_kwargs)
+
     def get_all_variables(self, variable_name: str, initial_year: int, final_year: int):
         times = [get_time_from_year(year) for year in range(initial_year, final_year + 1)]
         indices_to_keep = [j for j, time in enumerate(self.times) if
@@ -280,6 +549,7 @@ class Calibration(object):
         else:
             return False
 
+    @span('calibration.save')
     def save_calibration(self) -> None:
         model_filepath_to_save = self.path_manager.filepath_to_save
         if op.isfile(model_filepath_to_save):
@@ -307,15 +577,50 @@ class Calibration(object):
             df = pd.concat([df, df_states], axis=1)
             df.to_csv(model_filepath_to_save, index=False)
             assert op.isfile(model_filepath_to_save)
+            self.path_manager.add_to_catalog()
+            #  The checkpoints are not needed once the calibration is saved
+            if self.checkpoint is not None:
+                self.checkpoint.remove()
+
+    def save_solver_statistics(self) -> dict:
+        """Save the statistics of the solver for each solved sample next to the report of the calibration,
+        and return their histograms (empty if no sample has been solved)"""
+        if len(self._solver_statistics_dfs) == 0:
+            return {}
+        df = pd.concat(self._solver_statistics_dfs).sort_index()
+        filepath = self.path_manager.get_report_filepath('_solver_statistics.csv')
+        os.makedirs(op.dirname(filepath), exist_ok=True)
+        df.to_csv(filepath + '.tmp')
+        os.replace(filepath + '.tmp', filepath)
+        return get_solver_statistics_histograms(df)
 
     @cached_property
     def _loaded_calibration(self) -> tuple[list[dict[str, float]], list[np.ndarray], list[float], list[float]]:
         return self.load_calibration()
 
+    @span('calibration.load')
     def load_calibration(self) -> tuple[list[dict[str, float]], list[np.ndarray], list[float], list[float]]:
         model_filepath_to_load = self.path_manager.filepath_to_load
         log_info(f'Loading from {op.basename(model_filepath_to_load)} with settings {self.filename_manager.folder}')
         assert op.isfile(model_filepath_to_load), model_filepath_to_load
+        if use_calibration_snapshot:
+            snapshot_filepath = get_snapshot_filepath(model_filepath_to_load,
+                                                      get_path_in_data_tree(CALIBRATION_DATA_PATH, self.data_path),
+                                                      get_path_in_data_tree(CALIBRATION_SNAPSHOT_PATH, self.data_path),
+                                                      suffix=f'.{self.ensemble_size}')
+            arrays = load_snapshot(model_filepath_to_load, snapshot_filepath)
+            if arrays is None:
+                params_vector, state_vectors_list, error_list, times = self._load_calibration_from_csv()
+                save_snapshot(model_filepath_to_load, snapshot_filepath, params_vector=params_vector,
+                              state_vectors=np.array(state_vectors_list), errors=np.array(error_list),
+                              times=np.array(times))
+                return params_vector, state_vectors_list, error_list, times
+            return (arrays['params_vector'], list(arrays['state_vectors']), arrays['errors'].tolist(),
+                    arrays['times'].tolist())
+        return self._load_calibration_from_csv()
+
+    def _load_calibration_from_csv(self) -> tuple[list[dict[str, float]], list[np.ndarray], list[float], list[float]]:
+        model_filepath_to_load = self.path_manager.filepath_to_load
         df = pd.read_csv(model_filepath_to_load, nrows=self.ensemble_size)
         assert len(df) == self.ensemble_size
         params_vector = df.loc[:, self.dynamical_model.parameter_names].values
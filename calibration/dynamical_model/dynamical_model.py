@@ -10,7 +10,6 @@ import numpy as np
 
 from calibration.forcing_function.forcing_function import ForcingFunction
 from calibration.observation_constraint.observation_constraint import ObservationConstraint
-from calibration.utils_calibration.convert import get_time_from_year
 from utils.utils_exception import MissingConstraintValue
 
 
@@ -27,12 +26,19 @@ class DynamicalModel(ABC):
         self.back_up_original_forcing_function = deepcopy(self.forcing_function)
         self.check_types()
 
-    def model_function(self, time: float, state_vector: np.ndarray) -> float:
-        """Compute dy/dt the derivative of y with respect to t"""
+    def model_function(self, time: float, state_vector: np.ndarray) -> np.ndarray:
+        """Compute dy/dt the derivative of y with respect to t
+        (as an array, since the finite difference jacobians of the stiff solvers do not handle scalars)"""
         #  Transform np.ndarray as dictionaries and call derivative function
         forcings = self.forcing_function.get_forcings_for_ivt_solver(time)
         states = self.create_states(state_vector)
-        return self.derivative(states, forcings, self.params_for_model_function)
+        return np.atleast_1d(self.derivative(states, forcings, self.params_for_model_function))
+
+    def model_jacobian(self, time: float, state_vector: np.ndarray) -> np.ndarray:
+        """Compute the jacobian of dy/dt with respect to y (states x states)"""
+        forcings = self.forcing_function.get_forcings_for_ivt_solver(time)
+        states = self.create_states(state_vector)
+        return self.jacobian(states, forcings, self.params_for_model_function)
 
     ###########################################
     #
@@ -44,6 +50,16 @@ class DynamicalModel(ABC):
         """Compute dy/dt the derivative of y with respect to t. This function must be defined in the child classes"""
         pass
 
+    def jacobian(self, states: dict[str, float], forcings: dict[str, float], params: dict[str, float]) -> np.ndarray:
+        """Compute the jacobian of dy/dt with respect to y (states x states). This function may be defined
+        in the child classes, otherwise the stiff solvers and the continuation rely on finite differences"""
+        raise NotImplementedError
+
+    @property
+    def has_jacobian(self) -> bool:
+        """Whether the child class defines an analytic jacobian"""
+        return type(self).jacobian is not DynamicalModel.jacobian
+
     def get_variable(self, variable_name: str, forcings: dict[str, float], states: dict[str, float],
                      params: dict[str, float]) -> float:
         """Compute a variable for a given forcing/state/parameters of the models"""
@@ -54,6 +70,15 @@ class DynamicalModel(ABC):
         else:
             raise NotImplementedError('variable_name={}'.format(variable_name))
 
+    def get_variables(self, variable_name: str, forcing_values: np.ndarray, state_vectors: np.ndarray,
+                      params: dict[str, float]) -> np.ndarray:
+        """Compute a variable for an array of forcing values and an array of state vectors (forcings x states)
+        All the points are computed at once, since get_variable only relies on array operations"""
+        forcings = self.forcing_function.create_forcings([np.asarray(forcing_values, dtype=float)])
+        states = self.create_states(np.asarray(state_vectors, dtype=float).T)
+        variables = self.get_variable(variable_name, forcings, states, params)
+        return np.broadcast_to(variables, (len(forcing_values),)).copy()
+
     @abstractmethod
     def get_state(self, forcings: dict[str, float], year: int, params: dict[str, float],
                   observation_constraint: ObservationConstraint) -> list[float]:
@@ -68,7 +93,7 @@ class DynamicalModel(ABC):
 
     def get_initial_state(self, years: list[int], params: dict[str, float],
                           observation_constraint: ObservationConstraint) -> list[float]:
-        initial_forcings = self.forcing_function.get_forcings(get_time_from_year(years[0]))
+        initial_forcings = self.forcing_function.get_forcings_for_year(years[0])
         if len(years) == 1:
             return self.get_state(initial_forcings, years[0], params, observation_constraint)
         else:
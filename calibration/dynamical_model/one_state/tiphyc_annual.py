@@ -50,6 +50,30 @@ class DynamicalModelTipHycAnnual(DynamicalModel):
         dcdt = first_term - second_term + third_term
         return dcdt
 
+    def jacobian(self, states: dict[str, float], forcings: dict[str, float], params: dict[str, float]) -> np.ndarray:
+        """Closed form of d(dc/dt)/dc. Outside of [0, 1], c_t is cast to the range thus the derivative is 0"""
+        c_t = states[self.WATER_HOLDING_STATE_STR]
+        if not 0 <= c_t <= 1:
+            return np.zeros((1, 1))
+        p_t = forcings[RAIN_STR]
+        a, b = params['a'], params['b']
+        #  Derivatives of the intermediate values with respect to c_t (chain rule through p_0, ratio and ke_l)
+        p_0 = params['p_ini'] + c_t * (params['p_0max'] - params['p_ini'])
+        sum_of_powers = p_t ** a + p_0 ** a
+        ratio = p_t ** a / sum_of_powers
+        dratio_dc = -p_t ** a * a * p_0 ** (a - 1) / sum_of_powers ** 2 * (params['p_0max'] - params['p_ini'])
+        dke_l_dc = b * ratio ** (b - 1) * params['Ke_max'] * dratio_dc
+        i_l = self.compute_i(ratio ** b * params['Ke_max'], forcings)
+        di_l_dc = -p_t * dke_l_dc
+        #  Derivative of each term of the derivative
+        growth = c_t * (1 - c_t / params['c_max'])
+        first_term = params['c_croiss'] * (params['i_croiss'] / (i_l + params['i_croiss']) ** 2 * di_l_dc * growth
+                                           + i_l / (i_l + params['i_croiss']) * (1 - 2 * c_t / params['c_max']))
+        second_term = params['c_mort'] * params['i_mort'] * (1 / (i_l + params['i_mort'])
+                                                             - c_t * di_l_dc / (i_l + params['i_mort']) ** 2)
+        third_term = -params['mu_c']
+        return np.array([[first_term - second_term + third_term]])
+
     def compute_ke_l(self, states: dict[str, float], forcings: dict[str, float], params: dict[str, float]) -> float:
         p_0 = params['p_ini'] + states[self.WATER_HOLDING_STATE_STR] * (params['p_0max'] - params['p_ini'])
         #  At the local scale
@@ -60,6 +60,33 @@ class DynamicalModelWendling2019(DynamicalModel):
         #  Return the tuple of derivatives
         return dwdt, dbdt
 
+    def jacobian(self, states, forcings, params):
+        """Closed form of the derivatives of (dw/dt, db/dt) with respect to (w, b). Only b acts on ke"""
+        b_t = states[self.BARE_STR]
+        w_t = states[self.WOODY_STR]
+        p_t = forcings[RAIN_STR]
+        h_t = 1 - w_t - b_t
+        ke = self.compute_ke(states, params)
+        dke_db = params['ke_b'] * self.compute_fl_star_derivative(states, params)
+        i_t = p_t * (1 - ke)
+        r_t = p_t * ke
+        di_db = -p_t * dke_db
+        dr_db = p_t * dke_db
+        i_r = params['i_g']
+        #  Derivatives of intermediary2_t
+        di2_dw = params['r_r'] * i_t * b_t / (i_t + i_r)
+        di2_db = params['r_r'] * w_t * (i_t / (i_t + i_r) + b_t * i_r / (i_t + i_r) ** 2 * di_db)
+        #  Derivatives of dw/dt
+        dwdt_dw = params['r_g'] * i_t / (i_t + params['i_g']) * (h_t - w_t) + di2_dw
+        dwdt_dw -= params['r_d'] * params['i_d'] / (i_t + params['i_d'])
+        dwdt_db = params['r_g'] * w_t * (params['i_g'] / (i_t + params['i_g']) ** 2 * di_db * h_t
+                                         - i_t / (i_t + params['i_g'])) + di2_db
+        dwdt_db += params['r_d'] * params['i_d'] * w_t * di_db / (i_t + params['i_d']) ** 2
+        #  Derivatives of db/dt
+        dbdt_dw = -params['alpha_p'] * p_t - params['alpha_r'] * r_t - di2_dw
+        dbdt_db = -params['alpha_p'] * p_t + params['alpha_r'] * (h_t * dr_db - r_t) - di2_db
+        return np.array([[dwdt_dw, dwdt_db], [dbdt_dw, dbdt_db]])
+
     def compute_ke(self, states, params):
         fl_star = self.compute_fl_star(states, params)
         ke = params['ke_b'] * fl_star
@@ -70,6 +97,14 @@ class DynamicalModelWendling2019(DynamicalModel):
         fl_star = 2 * states[self.BARE_STR] * (intermediary_t - 1 + np.exp(-intermediary_t)) / (intermediary_t ** 2)
         return fl_star
 
+    def compute_fl_star_derivative(self, states, params):
+        """Derivative of fl_star with respect to b"""
+        intermediary_t = params['l'] * (1 - states[self.BARE_STR])
+        g = (intermediary_t - 1 + np.exp(-intermediary_t)) / (intermediary_t ** 2)
+        dg = ((1 - np.exp(-intermediary_t)) * intermediary_t - 2 * (intermediary_t - 1 + np.exp(-intermediary_t))) \
+            / (intermediary_t ** 3)
+        return 2 * g - 2 * states[self.BARE_STR] * params['l'] * dg
+
     def get_variable(self, variable_name: str, forcings: dict[str, float], states: dict[str, float], params: dict[str, float]) -> float:
         if variable_name == 'Ke':
             return self.compute_ke(states, params)
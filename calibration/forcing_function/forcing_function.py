@@ -1,3 +1,4 @@
+import math
 from abc import ABC, abstractmethod
 from collections.abc import Iterable
 from dataclasses import dataclass
@@ -5,7 +6,7 @@ from functools import cached_property
 
 import numpy as np
 
-from calibration.utils_calibration.convert import get_year_from_time, get_time_from_year
+from calibration.utils_calibration.convert import get_years_from_times
 from utils.utils_run import CustomizedValueError
 
 
@@ -21,6 +22,15 @@ class ForcingFunction(ABC):
     def __post_init__(self):
         self.year_to_forcing_vector = dict(zip(self.years, self.forcing_vector_list))
         self.check_types()
+        #  Contiguous array (years x forcings) from the first to the last year, the row of a year is year - offset.
+        #  Missing years (if any) are filled with nan values
+        self._offset = self.years[0]
+        self._forcing_vector_array = np.full((self.years[-1] - self._offset + 1, len(self.forcing_names)), np.nan)
+        self._forcing_vector_array[np.array(self.years) - self._offset] = np.array(self.forcing_vector_list)
+        #  Forcings are created once for each year, so that loading a forcing does not allocate anything
+        self._forcings_list = [None for _ in range(len(self._forcing_vector_array))]
+        for year, forcing_vector in self.year_to_forcing_vector.items():
+            self._forcings_list[year - self._offset] = self.create_forcings(forcing_vector)
 
     @cached_property
     def year_to_forcing(self) -> dict[int, float]:
@@ -32,24 +42,29 @@ class ForcingFunction(ABC):
 
     def get_forcings_for_ivt_solver(self, time: float) -> dict[str, float]:
         """Load forcings - this function should be used only for the ivt solver"""
-        year = get_year_from_time(time)
-        if year > self.final_year:
-            #  This case might happen due to a bug in the select_initial_step functions of ivt solver
-            #  As a fix, when it occurs, we return the last value of the forcing instead
-            #   This fix does not impact the solution of the solver, but only the design of the initial step size
-            #  see https://github.com/scipy/scipy/issues/9198 for more details
-            time = get_time_from_year(self.final_year)
-        return self.get_forcings(time)
+        #  Equivalent to get_year_from_time for a float time
+        index = math.ceil(time) - 1 - self._offset
+        if index >= len(self._forcings_list):
+            #  This case might happen due to a bug in the select_initial_step functions of ivt solver
+            #  As a fix, when it occurs, we return the last value of the forcing instead
+            #   This fix does not impact the solution of the solver, but only the design of the initial step size
+            #  see https://github.com/scipy/scipy/issues/9198 for more details
+            index = len(self._forcings_list) - 1
+        return self._get_forcings_from_index(index)
 
     def get_forcings(self, time: float) -> dict[str, float]:
         """Load a dictionary that map each forcing name to its value"""
-        year = get_year_from_time(time)
-        #  Forcing is a function where the value is valid for the whole year, i.e. a step function
-        if not (self.initial_year <= year <= self.final_year):
-            raise CustomizedValueError(
-                '{} is beyond the range of the forcing ({}, {})'
-                .format(year, self.initial_year, self.final_year))
-        return self.create_forcings(self.year_to_forcing_vector[year])
+        assert isinstance(time, float)
+        #  Equivalent to get_year_from_time
+        return self.get_forcings_for_year(math.ceil(time) - 1)
+
+    def get_forcings_for_year(self, year: int) -> dict[str, float]:
+        #  Forcing is a function where the value is valid for the whole year, i.e. a step function
+        return self._get_forcings_from_index(year - self._offset)
+
+    def get_forcings_at(self, times: Iterable[float]) -> np.ndarray:
+        """Load the forcing vectors corresponding to a list of time, as an array (times x forcings)"""
+        return self._forcing_vector_array[self._get_indices(times)]
 
     def create_forcings(self, forcing_vector: Iterable[float]) -> dict[str, float]:
         """Function that creates a forcings from a forcing_vector"""
@@ -57,7 +72,26 @@ class ForcingFunction(ABC):
 
     def get_forcings_list(self, times: Iterable[float]) -> list[dict[str, float]]:
         """Load the list of forcings corresponding to a list of time"""
-        return [self.get_forcings(time) for time in times]
+        return [self._forcings_list[index] for index in self._get_indices(times)]
+
+    def _get_forcings_from_index(self, index: int) -> dict[str, float]:
+        if not (0 <= index < len(self._forcings_list)):
+            raise CustomizedValueError(
+                '{} is beyond the range of the forcing ({}, {})'
+                .format(index + self._offset, self._offset, self._offset + len(self._forcings_list) - 1))
+        forcings = self._forcings_list[index]
+        if forcings is None:
+            raise KeyError(index + self._offset)
+        return forcings
+
+    def _get_indices(self, times: Iterable[float]) -> np.ndarray:
+        indices = get_years_from_times(times) - self._offset
+        for index in indices[(indices < 0) | (indices >= len(self._forcings_list))][:1]:
+            self._get_forcings_from_index(index)
+        #  Missing years have nan values (nan values are also possible for other years, e.g. in aggregated forcings)
+        for index in indices[np.isnan(self._forcing_vector_array[indices, 0])]:
+            self._get_forcings_from_index(index)
+        return indices
 
     @property
     def initial_year(self) -> int:
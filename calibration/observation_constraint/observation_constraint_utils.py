@@ -1,5 +1,18 @@
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
+from utils.utils_path.utils_path import OBSERVATION_PATH, OBSERVATION_SNAPSHOT_PATH
+from utils.utils_run import use_observation_snapshot
+from utils.utils_snapshot import load_snapshot, save_snapshot, get_snapshot_filepath
+
+#  Process-wide cache of the parsed tables, it maps a filepath to the modification time of the file and its table
+TABLE_CACHE_MAX_SIZE = 32
+_filepath_to_mtime_and_table = OrderedDict()
+
 
 def load_csv_with_constraint(column_index, constraint_name, filepath):
     # Load data from the file
@@ -10,12 +23,55 @@ def load_csv_with_constraint(column_index, constraint_name, filepath):
 
 
 def load_series(column_index, filepath):
-    df = pd.read_csv(filepath, sep=",", header=0, index_col=0)
+    df = load_table(filepath)
     s = df.iloc[:, column_index]
     s = s.loc[~s.isnull()]
     return s
 
 
+def load_table(filepath: str, snapshot: Optional[bool] = None) -> pd.DataFrame:
+    """Load a csv table, the table is parsed only once as long as the file is not modified.
+    The returned table is shared, thus it must not be modified in place"""
+    mtime = os.stat(filepath).st_mtime_ns
+    if filepath in _filepath_to_mtime_and_table:
+        cached_mtime, df = _filepath_to_mtime_and_table[filepath]
+        if cached_mtime == mtime:
+            _filepath_to_mtime_and_table.move_to_end(filepath)
+            return df
+    snapshot = use_observation_snapshot if snapshot is None else snapshot
+    df = _load_table_from_snapshot(filepath) if snapshot else None
+    if df is None:
+        df = pd.read_csv(filepath, sep=",", header=0, index_col=0)
+        if snapshot:
+            _save_table_to_snapshot(filepath, df)
+    _filepath_to_mtime_and_table[filepath] = (mtime, df)
+    _filepath_to_mtime_and_table.move_to_end(filepath)
+    while len(_filepath_to_mtime_and_table) > TABLE_CACHE_MAX_SIZE:
+        _filepath_to_mtime_and_table.popitem(last=False)
+    return df
+
+
+def get_observation_snapshot_filepath(filepath: str) -> str:
+    return get_snapshot_filepath(filepath, OBSERVATION_PATH, OBSERVATION_SNAPSHOT_PATH)
+
+
+def _load_table_from_snapshot(filepath: str) -> Optional[pd.DataFrame]:
+    arrays = load_snapshot(filepath, get_observation_snapshot_filepath(filepath))
+    if arrays is None:
+        return None
+    return pd.DataFrame(arrays['values'], index=pd.Index(arrays['index'], name=str(arrays['index_name'])),
+                        columns=arrays['columns'])
+
+
+def _save_table_to_snapshot(filepath: str, df: pd.DataFrame) -> None:
+    #  Only tables of floats (with a numeric index) are stored as snapshots, so that loading them is exact
+    if not all([pd.api.types.is_float_dtype(dtype) for dtype in df.dtypes]) \
+            or not pd.api.types.is_numeric_dtype(df.index.dtype) or not isinstance(df.index.name, str):
+        return None
+    save_snapshot(filepath, get_observation_snapshot_filepath(filepath), values=df.values, index=df.index.values,
+                  index_name=np.array(df.index.name), columns=np.array([str(c) for c in df.columns]))
+
+
 #  In the *fcover_all.csv files, the vegetation is available for the entire year and correspond to the NDVI
 #  the vegetation is always extracted for the largest contour fo the watershed
 #  for the place 'KoriDantiandou' we have the vegetation but not the runoff because it is an Endorheic basin
@@ -0,0 +1,112 @@
+import json
+import os
+import os.path as op
+import shutil
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from utils.utils_log import log_info
+
+MANIFEST_FILENAME = 'manifest.json'
+PARAMS_FILENAME = 'params.npz'
+
+
+def get_ensemble_sample_ids(sample_ids: np.ndarray, errors: np.ndarray, ensemble_size: int) -> np.ndarray:
+    """Return the sample ids with the lowest errors (the first correspond to the lowest error)
+    Equal errors are ordered by sample id, thus the selection does not depend on the order of the samples"""
+    sample_ids, errors = np.asarray(sample_ids), np.asarray(errors)
+    return sample_ids[np.lexsort((sample_ids, errors))[:ensemble_size]]
+
+
+@dataclass
+class CalibrationCheckpoint(object):
+    """Checkpoints of a calibration solved by chunks of samples
+
+    The folder contains the sampled parameters, one npz file per completed chunk, and a manifest with the list of
+    completed chunks. Each chunk only keeps the ensemble_size samples with the lowest errors, which always contain
+    the samples selected for the whole calibration."""
+    folder: str
+    nb_samples: int
+    chunk_size: int
+
+    def __post_init__(self):
+        assert isinstance(self.chunk_size, int) and self.chunk_size > 0
+        manifest = self._load_manifest()
+        if manifest is not None and (manifest['nb_samples'], manifest['chunk_size']) != (self.nb_samples,
+                                                                                            self.chunk_size):
+            log_info(f'Discard the checkpoints of {self.folder} computed with other settings')
+            self.remove()
+
+    @property
+    def nb_chunks(self) -> int:
+        return (self.nb_samples + self.chunk_size - 1) // self.chunk_size
+
+    def get_chunk_sample_ids(self, chunk_id: int) -> np.ndarray:
+        return np.arange(chunk_id * self.chunk_size, min((chunk_id + 1) * self.chunk_size, self.nb_samples))
+
+    @property
+    def completed_chunk_ids(self) -> list[int]:
+        manifest = self._load_manifest()
+        return [] if manifest is None else manifest['completed_chunk_ids']
+
+    def load_params_vector_list(self) -> Optional[np.ndarray]:
+        filepath = op.join(self.folder, PARAMS_FILENAME)
+        if not op.exists(filepath):
+            return None
+        with np.load(filepath, allow_pickle=False) as data:
+            return data['params_vector_list']
+
+    def save_params_vector_list(self, params_vector_list: np.ndarray) -> None:
+        assert len(params_vector_list) == self.nb_samples
+        self._save_npz(PARAMS_FILENAME, params_vector_list=np.array(params_vector_list))
+        self._save_manifest([])
+
+    def load_chunk(self, chunk_id: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        with np.load(op.join(self.folder, self._chunk_filename(chunk_id)), allow_pickle=False) as data:
+            return data['sample_ids'], data['state_vectors'], data['errors']
+
+    def save_chunk(self, chunk_id: int, sample_ids: np.ndarray, state_vectors: np.ndarray, errors: np.ndarray) -> None:
+        #  The chunk file is written before the manifest, so a chunk listed in the manifest is always complete
+        self._save_npz(self._chunk_filename(chunk_id), sample_ids=np.array(sample_ids),
+                       state_vectors=np.array(state_vectors), errors=np.array(errors))
+        completed_chunk_ids = self.completed_chunk_ids
+        if chunk_id not in completed_chunk_ids:
+            self._save_manifest(completed_chunk_ids + [chunk_id])
+
+    def remove(self) -> None:
+        if op.exists(self.folder):
+            shutil.rmtree(self.folder)
+
+    ###########################################
+    #
+    #           Private methods to save the files
+    #
+    ###########################################
+
+    @staticmethod
+    def _chunk_filename(chunk_id: int) -> str:
+        return f'chunk_{chunk_id:06d}.npz'
+
+    def _load_manifest(self) -> Optional[dict]:
+        filepath = op.join(self.folder, MANIFEST_FILENAME)
+        if not op.exists(filepath):
+            return None
+        with open(filepath) as f:
+            return json.load(f)
+
+    def _save_manifest(self, completed_chunk_ids: list[int]) -> None:
+        manifest = {'nb_samples': self.nb_samples, 'chunk_size': self.chunk_size,
+                    'completed_chunk_ids': completed_chunk_ids}
+        filepath = op.join(self.folder, MANIFEST_FILENAME)
+        with open(filepath + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(filepath + '.tmp', filepath)
+
+    def _save_npz(self, filename: str, **arrays: np.ndarray) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        #  Write in a temporary file first, so that an interruption never leaves a partial file
+        filepath = op.join(self.folder, filename)
+        np.savez(filepath + '.tmp.npz', **arrays)
+        os.replace(filepath + '.tmp.npz', filepath)
@@ -36,6 +36,11 @@ def get_year_from_time(time: float) -> int:
     return int(time - 1) if float(math.floor(time)) == time else math.floor(time)
 
 
+def get_years_from_times(times: Iterable[float]) -> np.ndarray:
+    """Vectorized version of get_year_from_time"""
+    return np.ceil(np.asarray(times, dtype=float)).astype(int) - 1
+
+
 def load_times(initial_year: int, final_year: int, time_step: float = 1.0) -> np.ndarray:
     """
     :param initial_year: initial year to start solving (int)
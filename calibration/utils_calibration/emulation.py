@@ -0,0 +1,82 @@
+import os
+import os.path as op
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import joblib
+import numpy as np
+
+from utils.utils_log import log_info
+from utils.utils_run import random_seed
+
+#  Fraction of the samples that are solved to train the emulator
+TRAINING_FRACTION = 0.1
+#  Fraction of the training samples kept aside to calibrate the safety margin
+VALIDATION_FRACTION = 0.2
+#  Quantile of the overestimation of the error on the validation samples used as safety margin
+SAFETY_QUANTILE = 0.99
+
+EMULATOR_FILENAME = 'emulator.joblib'
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+
+@dataclass
+class Emulator(object):
+    """Emulator of the error of a calibration (composite rmse) from the vector of parameters
+
+    The emulator is trained on solved samples, then it ranks the samples that have not been solved.
+    A sample can only be selected in the ensemble if its error is lower than the error_threshold,
+    i.e. the ensemble_size-th lowest error of the training samples.
+    The safety margin is the SAFETY_QUANTILE of the overestimation of the error on validation samples,
+    thus a sample is solved if its predicted error minus the safety margin is lower than the error_threshold"""
+    regressor: 'HistGradientBoostingRegressor'
+    error_threshold: float
+    safety_margin: float
+
+    @classmethod
+    def from_training_samples(cls, params_vector_list: np.ndarray, errors: np.ndarray,
+                              ensemble_size: int) -> 'Emulator':
+        #  sklearn is imported on demand, since it is slow to import and only used by the emulated calibrations
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        params_vector_list, errors = np.asarray(params_vector_list), np.asarray(errors, dtype=float)
+        assert len(errors) >= ensemble_size, 'not enough training samples for the emulator'
+        #  The samples whose trajectory could not be solved are not used for the training
+        is_valid = ~np.isnan(errors)
+        error_threshold = float(np.sort(errors[is_valid])[ensemble_size - 1]) if is_valid.sum() >= ensemble_size \
+            else np.inf
+        params_vector_list, errors = params_vector_list[is_valid], errors[is_valid]
+        #  Calibrate the safety margin on the validation samples
+        nb_validation_samples = max(int(len(errors) * VALIDATION_FRACTION), 1)
+        indices = np.random.default_rng(random_seed).permutation(len(errors))
+        validation_indices, training_indices = indices[:nb_validation_samples], indices[nb_validation_samples:]
+        regressor = HistGradientBoostingRegressor(random_state=random_seed)
+        regressor.fit(params_vector_list[training_indices], errors[training_indices])
+        overestimations = regressor.predict(params_vector_list[validation_indices]) - errors[validation_indices]
+        safety_margin = max(float(np.quantile(overestimations, SAFETY_QUANTILE)), 0.)
+        #  The final regressor is trained on all the samples
+        regressor.fit(params_vector_list, errors)
+        log_info(f'Emulator trained on {len(errors)} samples (error threshold={error_threshold:.4f}, '
+                 f'safety margin={safety_margin:.4f})')
+        return cls(regressor, error_threshold, safety_margin)
+
+    def predict(self, params_vector_list: np.ndarray) -> np.ndarray:
+        return self.regressor.predict(np.asarray(params_vector_list))
+
+    def is_promising(self, params_vector_list: np.ndarray) -> np.ndarray:
+        """Return for each vector of parameters whether it must be solved"""
+        return self.predict(params_vector_list) - self.safety_margin <= self.error_threshold
+
+    def save(self, folder: str) -> None:
+        os.makedirs(folder, exist_ok=True)
+        joblib.dump(self, op.join(folder, EMULATOR_FILENAME))
+
+    @classmethod
+    def load(cls, folder: str) -> 'Emulator':
+        return joblib.load(op.join(folder, EMULATOR_FILENAME))
+
+
+def get_nb_training_samples(nb_samples: int, ensemble_size: int) -> int:
+    #  The training samples must contain at least the ensemble size (to define the error threshold)
+    return min(max(int(nb_samples * TRAINING_FRACTION), 2 * ensemble_size), nb_samples)
@@ -1,8 +1,62 @@
-from calibration.utils_calibration.load_sample_v1 import load_sample_parameters
-from calibration.utils_calibration.load_sample_v2 import load_params_vector_list_sample_v2
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from calibration.dynamical_model.dynamical_model import DynamicalModel
+from calibration.observation_constraint.observation_constraint import ObservationConstraint
+from calibration.utils_calibration.load_sample_v1 import load_sample_parameters, get_df_screened_parameters, \
+    select_sample_parameters
+from calibration.utils_calibration.load_sample_smc import load_params_vector_list_smc
+from calibration.utils_calibration.load_sample_v2 import load_params_vector_list_sample_v2, \
+    get_df_parameters_sample_v2, select_params_vector_list_sample_v2
 from calibration.utils_calibration.sampling import Sampling
+from calibration.utils_calibration.solve import SolverMethod
 
 sampling_to_load_function = {
     Sampling.V1: load_sample_parameters,
     Sampling.V2_INITIAL: load_params_vector_list_sample_v2,
-}
\ No newline at end of file
+    #  The adaptive sampling also requires an error_function argument (the errors guide the sampling)
+    Sampling.SMC: load_params_vector_list_smc,
+}
+
+#  Sampling in two steps: the first step only depends on the parameters, the second step depends on the watershed
+sampling_to_shared_sample_function = {
+    Sampling.V1: get_df_screened_parameters,
+    Sampling.V2_INITIAL: get_df_parameters_sample_v2,
+}
+
+sampling_to_select_function = {
+    Sampling.V1: select_sample_parameters,
+    Sampling.V2_INITIAL: select_params_vector_list_sample_v2,
+}
+
+
+@dataclass
+class SharedSampling(object):
+    """Sampling shared by the calibrations of several watersheds (only the forcing and the constraint differ).
+    The parameters are sampled and screened once (e.g. the degeneracy screen only depends on the parameters),
+    then only the conditions that depend on the watershed (e.g. a valid initial state) are checked for each calibration.
+    load_params_vector_list has the same signature as the functions of sampling_to_load_function"""
+    _key_to_df_parameters: dict = field(default_factory=dict, init=False, repr=False)
+
+    def load_params_vector_list(self, dynamical_model: DynamicalModel, nb_samples: int, initial_year: int = None,
+                                initial_forcings: dict[str, float] = None,
+                                observation_constraint: ObservationConstraint = None,
+                                sampling: Sampling = Sampling.V1,
+                                solver_method: SolverMethod = SolverMethod.RK45) -> np.ndarray:
+        #  The number of sampled parameters may depend on the type of forcing (see get_multiplicative_factor)
+        assert sampling in sampling_to_shared_sample_function, f'{sampling} cannot be shared between watersheds'
+        key = (dynamical_model.name, type(dynamical_model.forcing_function), nb_samples, sampling, solver_method)
+        if key not in self._key_to_df_parameters:
+            shared_sample_function = sampling_to_shared_sample_function[sampling]
+            self._key_to_df_parameters[key] = shared_sample_function(dynamical_model, nb_samples, solver_method)
+        select_function = sampling_to_select_function[sampling]
+        return select_function(self._key_to_df_parameters[key], dynamical_model, nb_samples, initial_year,
+                               initial_forcings, observation_constraint, sampling)
+
+    def __getstate__(self):
+        #  The sampled parameters are not sent to the processes that solve the trajectories
+        return {'_key_to_df_parameters': {}}
+
+    def clear(self) -> None:
+        self._key_to_df_parameters.clear()
@@ -0,0 +1,116 @@
+import time
+from typing import Callable
+
+import numpy as np
+
+from calibration.dynamical_model.dynamical_model import DynamicalModel
+from calibration.observation_constraint.observation_constraint import ObservationConstraint
+from calibration.utils_calibration.checkpoint import get_ensemble_sample_ids
+from calibration.utils_calibration.load_sample_v2 import condition
+from calibration.utils_calibration.sampling import Sampling
+from calibration.utils_calibration.solve import SolverMethod
+from calibration.utils_calibration.utils_sample import get_df_parameters_sampled
+from utils.utils_instrumentation import span
+from utils.utils_log import log_info
+from utils.utils_random import get_generator, SAMPLING_STREAM
+
+#  Number of generations of the adaptive sampling (the nb_samples evaluations are split between the generations)
+NB_GENERATIONS = 10
+#  Fraction of a generation that is kept as elite (the evaluated samples with the lowest errors)
+ELITE_FRACTION = 0.1
+#  Maximum number of proposals (per sample of a generation) to find samples that fulfill the constraints
+MAX_NB_PROPOSALS_PER_SAMPLE = 100
+
+
+def load_params_vector_list_smc(dynamical_model: DynamicalModel, nb_samples: int, initial_year: int = None,
+                                initial_forcings: dict[str, float] = None,
+                                observation_constraint: ObservationConstraint = None,
+                                sampling: Sampling = Sampling.SMC,
+                                solver_method: SolverMethod = SolverMethod.RK45,
+                                error_function: Callable[[np.ndarray], np.ndarray] = None) -> np.ndarray:
+    """Sample parameters generation by generation (sequential Monte Carlo, as in population ABC)
+    The first generation is sampled using a LatinHypercube. Each next generation perturbs the elite, i.e. the evaluated
+    samples with the lowest errors, with a Gaussian kernel whose covariance is twice the covariance of the elite.
+    Thus, the proposal shrinks toward the parameters with low errors.
+    Eliminate samples that do not fulfill the desired constraint, e.g. a valid value for the initial state
+    :param error_function: function that computes the errors (e.g. composite rmse) of a matrix of parameters
+    :return: A matrix with the nb_samples evaluated vectors of parameters, in the order of evaluation"""
+    assert sampling is Sampling.SMC
+    assert isinstance(nb_samples, int) and nb_samples > 0
+    assert error_function is not None, 'the adaptive sampling requires an error function'
+    arguments = (dynamical_model, initial_year, initial_forcings, observation_constraint)
+    generation_sizes = get_generation_sizes(nb_samples)
+    log_info(f'Start adaptive sampling of {nb_samples} parameters in {len(generation_sizes)} generations')
+    start = time.time()
+    params_vector_list = np.zeros((0, len(dynamical_model.parameter_names)))
+    error_list = np.zeros(0)
+    for generation, generation_size in enumerate(generation_sizes):
+        if generation == 0:
+            candidate_params_vector_list = get_df_parameters_sampled(dynamical_model, generation_size).values
+            generation_params_vector_list = select_params_vector_list(candidate_params_vector_list,
+                                                                      generation_size, *arguments)
+        else:
+            nb_elites = max(int(generation_size * ELITE_FRACTION), len(dynamical_model.parameter_name_to_range) + 1)
+            elite_params_vector_list = params_vector_list[get_ensemble_sample_ids(np.arange(len(error_list)),
+                                                                                  error_list, nb_elites)]
+            generation_params_vector_list = propose_params_vector_list(elite_params_vector_list, generation_size,
+                                                                       get_generator(SAMPLING_STREAM, generation),
+                                                                       *arguments)
+        generation_error_list = np.asarray(error_function(generation_params_vector_list), dtype=float)
+        assert len(generation_error_list) == generation_size
+        params_vector_list = np.concatenate([params_vector_list, generation_params_vector_list])
+        error_list = np.concatenate([error_list, generation_error_list])
+        log_info(f'Generation {generation + 1}/{len(generation_sizes)}: '
+                 f'median error {np.nanmedian(generation_error_list):.4f}')
+    log_info(f'End adaptive sampling of {nb_samples} parameters in {time.time() - start}s')
+    return params_vector_list
+
+
+def get_generation_sizes(nb_samples: int) -> list[int]:
+    return [len(sample_ids) for sample_ids in np.array_split(np.arange(nb_samples), min(NB_GENERATIONS, nb_samples))]
+
+
+def propose_params_vector_list(elite_params_vector_list: np.ndarray, nb_samples: int, rng: np.random.Generator,
+                               dynamical_model: DynamicalModel, initial_year: int = None,
+                               initial_forcings: dict[str, float] = None,
+                               observation_constraint: ObservationConstraint = None) -> np.ndarray:
+    """Perturb randomly chosen elite samples, only the parameters that have a range are perturbed
+    Proposals outside the sampling ranges are rejected, as they have a zero prior density"""
+    range_indices = [dynamical_model.parameter_names.index(parameter_name)
+                     for parameter_name in dynamical_model.parameter_name_to_range]
+    lower_bounds, upper_bounds = np.array(list(dynamical_model.parameter_name_to_range.values())).T
+    covariance = 2 * np.atleast_2d(np.cov(elite_params_vector_list[:, range_indices], rowvar=False))
+    params_vector_list = []
+    nb_proposals = 0
+    while len(params_vector_list) < nb_samples:
+        if nb_proposals >= MAX_NB_PROPOSALS_PER_SAMPLE * nb_samples:
+            raise ValueError('Sampling failed, change conditions or increase the number of proposals')
+        nb_missing_samples = nb_samples - len(params_vector_list)
+        proposals = elite_params_vector_list[rng.integers(len(elite_params_vector_list), size=nb_missing_samples)]
+        proposals[:, range_indices] += rng.multivariate_normal(np.zeros(len(range_indices)), covariance,
+                                                               size=nb_missing_samples)
+        nb_proposals += nb_missing_samples
+        is_in_range = ((lower_bounds <= proposals[:, range_indices])
+                       & (proposals[:, range_indices] <= upper_bounds)).all(axis=1)
+        params_vector_list.extend(select_params_vector_list(proposals[is_in_range], nb_missing_samples,
+                                                            dynamical_model, initial_year, initial_forcings,
+                                                            observation_constraint, strict=False))
+    return np.array(params_vector_list)
+
+
+@span('sampling.constraint_filtering')
+def select_params_vector_list(params_vector_list: np.ndarray, nb_samples: int, dynamical_model: DynamicalModel,
+                              initial_year: int = None, initial_forcings: dict[str, float] = None,
+                              observation_constraint: ObservationConstraint = None,
+                              strict: bool = True) -> np.ndarray:
+    """Select the first vectors of parameters that fulfill the desired constraint (at most nb_samples)"""
+    selected_params_vector_list = []
+    for params_vector in params_vector_list:
+        if len(selected_params_vector_list) == nb_samples:
+            break
+        params = dynamical_model.get_params(params_vector)
+        if condition(params, dynamical_model, initial_year, initial_forcings, observation_constraint, Sampling.SMC):
+            selected_params_vector_list.append(params_vector)
+    if strict and len(selected_params_vector_list) < nb_samples:
+        raise ValueError('Sampling failed, change conditions or increase multiplicative factor')
+    return np.array(selected_params_vector_list).reshape(-1, len(dynamical_model.parameter_names))
@@ -1,9 +1,7 @@
 import numpy as np
 import pandas as pd
-from pandarallel import pandarallel
-from scipy.stats.qmc import LatinHypercube
 
-from bifurcation.bifurcation_data.degenerate_functions import compute_is_degenerate
+from bifurcation.bifurcation_data.degenerate_functions import compute_is_degenerate_list
 from calibration.dynamical_model.dynamical_model import DynamicalModel
 from calibration.dynamical_model.one_state.tiphyc_annual import DynamicalModelTipHycAnnual
 from calibration.dynamical_model.two_states.wendling_2019 import DynamicalModelWendling2019
@@ -12,9 +10,10 @@ from calibration.forcing_function.rain.watershed_rain_forcing_function import Ra
 from calibration.observation_constraint.observation_constraint import ObservationConstraint
 from calibration.utils_calibration.sampling import Sampling
 from calibration.utils_calibration.solve import SolverMethod
+from calibration.utils_calibration.utils_sample import get_df_latin_hypercube_samples
+from utils.utils_instrumentation import span
 from utils.utils_log import log_info
 from utils.utils_multiprocessing import NB_CORES
-from utils.utils_run import random_seed
 
 
 def load_sample_parameters(dynamical_model: DynamicalModel, nb_samples: int, initial_year: int = None,
@@ -55,9 +54,41 @@ def load_sample_parameters(dynamical_model: DynamicalModel, nb_samples: int, ini
         if not samples_found:
             raise RuntimeError('We did not find samples that meet the constraint')
 
-    #  Keep only nb_samples
+    return get_params_vector_list(df, dynamical_model, nb_samples)
+
+
+def get_df_screened_parameters(dynamical_model: DynamicalModel, nb_samples: int,
+                               solver_method: SolverMethod = SolverMethod.RK45) -> pd.DataFrame:
+    """Sample parameters using a LatinHypercube, and eliminate the samples that do not fulfill the constraints
+    that only depend on the parameters (this step can be shared by the calibrations of several watersheds)"""
+    df = get_df_random_parameters(dynamical_model, nb_samples)
+    #   Add constant columns
+    for parameter_name, value in dynamical_model.parameter_name_to_value.items():
+        df[parameter_name] = value
+    initialize_pandarallel()
+    specific_ind = specific_constraint_on_samples_parameters(dynamical_model, df, solver_method)
+    return df.loc[specific_ind.reindex(df.index, fill_value=False)]
+
+
+def select_sample_parameters(df: pd.DataFrame, dynamical_model: DynamicalModel, nb_samples: int,
+                             initial_year: int = None, initial_forcings: dict[str, float] = None,
+                             observation_constraint: ObservationConstraint = None,
+                             sampling: Sampling = Sampling.V1) -> np.ndarray:
+    """Select the screened parameters that fulfill the constraints that depend on the watershed
+    :return: A matrix where each row correspond to a vector of parameters"""
+    assert sampling is Sampling.V1
+    common_ind = common_constraint_on_sample_parameters(dynamical_model, df, initial_forcings, initial_year,
+                                                        observation_constraint)
+    df = df.loc[common_ind]
+    if len(df) < nb_samples:
+        raise RuntimeError('We did not find samples that meet the constraint')
+    return get_params_vector_list(df, dynamical_model, nb_samples)
+
+
+def get_params_vector_list(df: pd.DataFrame, dynamical_model: DynamicalModel, nb_samples: int) -> np.ndarray:
+    #  Keep only nb_samples
     df = df.iloc[:nb_samples]
-    #  Reorder the columns in the same order as parameter_names
+    #  Reorder the columns in the same order as parameter_names
     df = df.loc[:, dynamical_model.parameter_names]
     assert list(df.columns) == dynamical_model.parameter_names
     assert not df.isnull().any(axis=1).any(axis=0)
@@ -79,20 +110,17 @@ def get_multiplicative_factor(forcing_function: ForcingFunction, nb_samples: int
     return multiplicative_factor
 
 
+def initialize_pandarallel():
+    """Activate pandarallel. It is imported on demand, since it is slow to import and only used by the screening"""
+    from pandarallel import pandarallel
+    pandarallel.initialize(nb_workers=NB_CORES)
+
+
 def get_df_random_parameters(dynamical_model: DynamicalModel, nb_samples: int) -> pd.DataFrame:
-    latin_hypercube = LatinHypercube(len(dynamical_model.parameter_name_to_range), seed=random_seed)
-    #  We sample more than necessary to ensure that we have enough samples to respect potential constraints
+    #  We sample more than necessary to ensure that we have enough samples to respect potential constraints
     multiplicative_factor = get_multiplicative_factor(dynamical_model.forcing_function, nb_samples)
     log_info(f'Multiplicative factor for sampling {multiplicative_factor}')
-    samples = latin_hypercube.random(nb_samples * multiplicative_factor)
-    df_random_parameters = pd.DataFrame(data=samples, columns=list(dynamical_model.parameter_name_to_range.keys()))
-    #  Sampling ranges
-    scale_and_shift = [(b - a, a) for a, b in dynamical_model.parameter_name_to_range.values()]
-    # Scale and shift the samples to the appropriate range
-    for i, (scale, shift) in enumerate(scale_and_shift):
-        df_random_parameters.iloc[:, i] *= scale
-        df_random_parameters.iloc[:, i] += shift
-    return df_random_parameters
+    return get_df_latin_hypercube_samples(dynamical_model, nb_samples * multiplicative_factor)
 
 
 def check_constraints_on_sampled_parameters(dynamical_model: DynamicalModel, df: pd.DataFrame, initial_year: int,
@@ -103,8 +131,7 @@ def check_constraints_on_sampled_parameters(dynamical_model: DynamicalModel, df:
     By default, this function does not impose any observation_constraint.
     :return: ind: An pandas Series where the index are the same as df,
     and the values are boolean stating if the observation_constraint is respected."""
-    # Activate pandarallel
-    pandarallel.initialize(nb_workers=NB_CORES)
+    initialize_pandarallel()
     # Compute specific constraints
     specific_ind = specific_constraint_on_samples_parameters(dynamical_model, df, solver_method)
     # Compute common constraints
@@ -114,6 +141,7 @@ def check_constraints_on_sampled_parameters(dynamical_model: DynamicalModel, df:
     return common_ind & specific_ind
 
 
+@span('sampling.constraint_filtering')
 def common_constraint_on_sample_parameters(dynamical_model: DynamicalModel, df: pd.DataFrame,
                                            initial_forcings: dict[str, float], initial_year: int,
                                            observation_constraint: ObservationConstraint) -> pd.Series:
@@ -131,6 +159,7 @@ def common_constraint_on_sample_parameters(dynamical_model: DynamicalModel, df:
     return common_ind
 
 
+@span('sampling.constraint_filtering')
 def specific_constraint_on_samples_parameters(dynamical_model: DynamicalModel, df: pd.DataFrame, solver_method: SolverMethod) -> pd.Series:
     """Assess that the sampled parameters meet some constraints.
     By default, this function does not impose any observation_constraint.
@@ -145,10 +174,9 @@ def specific_constraint_on_samples_parameters(dynamical_model: DynamicalModel, d
         ind_strictly_positive_r_values = ~(df.loc[:, ['r_g', 'r_r', 'r_d']] == 0).any(axis=1)
         return ind_strictly_positive_r_values & ind_respect_the_assumption
     elif isinstance(dynamical_model, DynamicalModelTipHycAnnual):
-        def is_not_degenerate(params_series):
-            params = params_series.to_dict()
-            return not compute_is_degenerate(dynamical_model, params, solver_method)
-
-        return df.parallel_apply(is_not_degenerate, axis=1)
+        #  The degeneracy flags are cached, thus repeated samplings skip the parameters already screened
+        params_vector_list = df.loc[:, dynamical_model.parameter_names].values
+        is_degenerate = compute_is_degenerate_list(dynamical_model, params_vector_list, solver_method)
+        return pd.Series(index=df.index, data=~is_degenerate)
     else:
         return pd.Series(index=df.index, data=True)
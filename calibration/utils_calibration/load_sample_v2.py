@@ -1,12 +1,14 @@
 import time
 
 import numpy as np
+import pandas as pd
 
 from calibration.dynamical_model.dynamical_model import DynamicalModel
 from calibration.observation_constraint.observation_constraint import ObservationConstraint
 from calibration.utils_calibration.sampling import Sampling
 from calibration.utils_calibration.solve import SolverMethod
-from calibration.utils_calibration.utils_sample import params_sampled
+from calibration.utils_calibration.utils_sample import get_df_parameters_sampled
+from utils.utils_instrumentation import span
 from utils.utils_log import log_info
 
 
@@ -18,12 +20,32 @@ def load_params_vector_list_sample_v2(dynamical_model: DynamicalModel, nb_sample
     """Sample parameters using a LatinHypercube
     Eliminate samples that do not fulfill the desired constraint, e.g. a valid value for the initial state
     :return: A matrix where each row correspond to a vector of parameters"""
+    df_parameters = get_df_parameters_sample_v2(dynamical_model, nb_samples, solver_method)
+    return select_params_vector_list_sample_v2(df_parameters, dynamical_model, nb_samples, initial_year,
+                                               initial_forcings, observation_constraint, sampling)
+
+
+def get_df_parameters_sample_v2(dynamical_model: DynamicalModel, nb_samples: int,
+                                solver_method: SolverMethod = SolverMethod.RK45) -> pd.DataFrame:
+    """Sample parameters using a LatinHypercube (this step can be shared by the calibrations of several watersheds).
+    With this sampling, no constraint depends only on the parameters"""
+    return get_df_parameters_sampled(dynamical_model, nb_samples)
+
+
+@span('sampling.constraint_filtering')
+def select_params_vector_list_sample_v2(df_parameters: pd.DataFrame, dynamical_model: DynamicalModel,
+                                        nb_samples: int, initial_year: int = None,
+                                        initial_forcings: dict[str, float] = None,
+                                        observation_constraint: ObservationConstraint = None,
+                                        sampling: Sampling = Sampling.V2_INITIAL) -> np.ndarray:
+    """Select the first sampled parameters that fulfill the desired constraint
+    :return: A matrix where each row correspond to a vector of parameters"""
     assert isinstance(nb_samples, int) and nb_samples > 0
     log_info(f'Start sampling {nb_samples} parameters')
     start = time.time()
-    #  Insert the columns for the random parameters
     params_vector_list = []
-    for params in params_sampled(dynamical_model, nb_samples):
+    for _, series in df_parameters.iterrows():
+        params = series.to_dict()
         if condition(params, dynamical_model, initial_year, initial_forcings, observation_constraint, sampling):
             params_vector = dynamical_model.get_params_vector(params)
             params_vector_list.append(params_vector)
@@ -42,7 +64,7 @@ def condition(params: dict[str, float], dynamical_model: DynamicalModel,
     # Compute initial state
     initial_state = dynamical_model.get_state(initial_forcings, initial_year, params, observation_constraint)
     condition_initial_state_is_not_nan = not np.isnan(initial_state).any()
-    if sampling is Sampling.V2_INITIAL:
+    if sampling in [Sampling.V2_INITIAL, Sampling.SMC]:
         return condition_initial_state_is_not_nan
     else:
         raise NotImplementedError
@@ -0,0 +1,72 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.utils_random import get_generator, METRICS_STREAM
+from utils.utils_run import nb_bootstrap_samples as default_nb_bootstrap_samples
+
+#  Skill metrics of a simulation against the observations (the bias is the mean simulated minus the mean observed)
+METRIC_NAMES = ['nse', 'mse', 'rmse', 'bias']
+CONFIDENCE_LEVEL = 0.95
+
+
+def compute_metrics(simulated: np.ndarray, observed: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Metrics of each member (members x metrics) from the simulated values (members x times),
+    the observed values (times) and the observation mask (times)"""
+    return compute_weighted_metrics(simulated, observed, mask, np.atleast_2d(np.ones(len(observed))))[0]
+
+
+def compute_weighted_metrics(simulated: np.ndarray, observed: np.ndarray, mask: np.ndarray,
+                             weights: np.ndarray) -> np.ndarray:
+    """Metrics of each member for several weightings of the times (weightings x times), e.g. bootstrap resamplings,
+    as an array (weightings x members x metrics). All the members and all the weightings are computed at once
+    with matrix products, and the times without observation are zero-filled, so that they have no contribution"""
+    simulated, observed, mask = np.atleast_2d(simulated), np.asarray(observed, dtype=float), np.asarray(mask, dtype=bool)
+    assert simulated.shape[1] == len(observed) == len(mask) == weights.shape[1]
+    simulated = np.where(mask, simulated, 0.)
+    observed = np.where(mask, observed, 0.)
+    weights = np.where(mask, weights, 0.)
+    nb_obs = weights.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_observed = weights @ observed / nb_obs
+        mean_simulated = (simulated @ weights.T).T / nb_obs[:, None]
+        sum_of_squared_errors = (((simulated - observed) ** 2) @ weights.T).T
+        sum_of_squared_deviations = (weights * (observed - mean_observed[:, None]) ** 2).sum(axis=1)
+        mse = sum_of_squared_errors / nb_obs[:, None]
+        nse = 1 - sum_of_squared_errors / sum_of_squared_deviations[:, None]
+    bias = mean_simulated - mean_observed[:, None]
+    return np.stack([nse, mse, np.sqrt(mse), bias], axis=-1)
+
+
+def compute_bootstrap_intervals(simulated: np.ndarray, observed: np.ndarray, mask: np.ndarray,
+                                nb_bootstrap_samples: int = default_nb_bootstrap_samples,
+                                confidence_level: float = CONFIDENCE_LEVEL,
+                                generator: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Percentile bootstrap confidence intervals of the metrics of each member, as an array (2 x members x metrics)
+    with the lower and the upper bounds. The observed times are resampled with replacement, and each resampling
+    is a weighting of the times by their number of draws (the same resamplings are used for all the members)"""
+    if generator is None:
+        generator = get_generator(METRICS_STREAM)
+    indices = np.flatnonzero(mask)
+    counts = generator.multinomial(len(indices), np.full(len(indices), 1 / len(indices)), size=nb_bootstrap_samples)
+    weights = np.zeros((nb_bootstrap_samples, len(observed)))
+    weights[:, indices] = counts
+    bootstrap_metrics = compute_weighted_metrics(simulated, observed, mask, weights)
+    alpha = (1 - confidence_level) / 2
+    #  The nse is nan for the (unlikely) resamplings where all the draws are the same observation
+    return np.nanquantile(bootstrap_metrics, [alpha, 1 - alpha], axis=0)
+
+
+def get_df_metrics(simulated: np.ndarray, observed: np.ndarray, mask: np.ndarray, ensemble_ids: list[int],
+                   bootstrap: bool = False, **bootstrap_kwargs) -> pd.DataFrame:
+    """Table with the metrics of each member (members x metrics),
+    and the bounds of their confidence intervals in the columns "{metric}_lower" and "{metric}_upper" if bootstrap"""
+    index = pd.Index(ensemble_ids, name='ensemble_id')
+    df = pd.DataFrame(compute_metrics(simulated, observed, mask), index=index, columns=METRIC_NAMES)
+    if bootstrap:
+        lower, upper = compute_bootstrap_intervals(simulated, observed, mask, **bootstrap_kwargs)
+        df_lower = pd.DataFrame(lower, index=index, columns=[f'{name}_lower' for name in METRIC_NAMES])
+        df_upper = pd.DataFrame(upper, index=index, columns=[f'{name}_upper' for name in METRIC_NAMES])
+        df = pd.concat([df, df_lower, df_upper], axis=1)
+    return df
@@ -1,46 +1,230 @@
 import logging
+import math
+import time
 from enum import Enum
+from typing import Optional
 
 import numpy as np
-from scipy.integrate import solve_ivp
+from scipy.integrate import solve_ivp, RK45, LSODA, BDF, Radau
 
 from calibration.dynamical_model.dynamical_model import DynamicalModel
+from calibration.utils_calibration.solver_statistics import SolverStatistics
+from utils.utils_instrumentation import increment
 from utils.utils_run import CustomizedValueError
 
 
 class SolverMethod(Enum):
     RK45 = 'RK45'
     LSODA = 'LSODA'
+    BDF = 'BDF'
+    RADAU = 'Radau'
+    SEGMENT_RK45 = 'SegmentRK45'
+    SEGMENT_LSODA = 'SegmentLSODA'
 
 
 solver_method_to_str = {
     SolverMethod.RK45: 'RK45',
     SolverMethod.LSODA: 'LSODA',
+    SolverMethod.BDF: 'BDF',
+    SolverMethod.RADAU: 'Radau',
+    SolverMethod.SEGMENT_RK45: 'SegmentRK45',
+    SolverMethod.SEGMENT_LSODA: 'SegmentLSODA',
 }
 
+#  Relative tolerance of the solvers (default value of scipy), and relative tolerance of the cheaper settings
+RTOL = 1e-3
+CHEAPER_RTOL = 1e-2
+#  Cheaper settings for the samples whose integration exceeds its budget of rhs evaluations
+#  (such samples are usually stiff, thus a stiff solver with a lower accuracy is much cheaper).
+#  Radau is replaced by BDF, since its implicit stages cost several rhs evaluations by step
+solver_method_to_cheaper_solver_method = {
+    SolverMethod.RK45: SolverMethod.LSODA,
+    SolverMethod.LSODA: SolverMethod.LSODA,
+    SolverMethod.BDF: SolverMethod.BDF,
+    SolverMethod.RADAU: SolverMethod.BDF,
+    SolverMethod.SEGMENT_RK45: SolverMethod.SEGMENT_LSODA,
+    SolverMethod.SEGMENT_LSODA: SolverMethod.SEGMENT_LSODA,
+}
+
+
+class SolverBudgetExceeded(CustomizedValueError):
+    pass
+
+
+solver_budget_exceeded_message = 'budget of rhs evaluations exceeded'
+
+
+class StepCountingSolver(object):
+    """Mixin for an OdeSolver that records its number of steps in the statistics, and that fails
+    (before its next step) once the number of rhs evaluations counted by the statistics, including
+    the evaluations of the previous segments of the trajectory, exceeds max_nfev"""
+
+    def __init__(self, *args, statistics: SolverStatistics = None, max_nfev: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statistics = SolverStatistics() if statistics is None else statistics
+        self.max_nfev = max_nfev
+
+    def _step_impl(self):
+        if self.max_nfev is not None and self.statistics.nfev + self.nfev > self.max_nfev:
+            return False, solver_budget_exceeded_message
+        self.statistics.nb_steps += 1
+        return super()._step_impl()
+
+
+class StepCountingRK45(StepCountingSolver, RK45):
+    pass
+
+
+class StepCountingLSODA(StepCountingSolver, LSODA):
+    pass
+
+
+class StepCountingBDF(StepCountingSolver, BDF):
+    pass
+
+
+class StepCountingRadau(StepCountingSolver, Radau):
+    pass
+
+
+solver_method_to_ode_solver = {
+    SolverMethod.RK45: StepCountingRK45,
+    SolverMethod.LSODA: StepCountingLSODA,
+    SolverMethod.BDF: StepCountingBDF,
+    SolverMethod.RADAU: StepCountingRadau,
+}
+
+#  Segment methods integrate year by year (the forcing is constant within a year) with the corresponding ode solver
+segment_solver_method_to_ode_solver = {
+    SolverMethod.SEGMENT_RK45: StepCountingRK45,
+    SolverMethod.SEGMENT_LSODA: StepCountingLSODA,
+}
+
+#  Stiff solvers rely on the jacobian of the model: the analytic jacobian of the model if it is defined
+#  (it saves the rhs evaluations of the finite differences), otherwise a finite difference approximation
+stiff_solver_methods = {SolverMethod.LSODA, SolverMethod.BDF, SolverMethod.RADAU, SolverMethod.SEGMENT_LSODA}
+
 
 class SolverIvp(object):
 
     @classmethod
     def solve(cls, dynamical_model: DynamicalModel, initial_state: np.ndarray, times: np.ndarray,
-              params: dict[str, float], solver_method: SolverMethod) -> np.ndarray:
+              params: dict[str, float], solver_method: SolverMethod, max_nfev: Optional[int] = None) -> np.ndarray:
+        return cls.solve_with_statistics(dynamical_model, initial_state, times, params, solver_method, max_nfev)[0]
+
+    @classmethod
+    def solve_with_statistics(cls, dynamical_model: DynamicalModel, initial_state: np.ndarray, times: np.ndarray,
+                              params: dict[str, float], solver_method: SolverMethod,
+                              max_nfev: Optional[int] = None) -> tuple[np.ndarray, SolverStatistics]:
+        """Solve the trajectory, and return the statistics of the solver (cost and reason of the failure).
+        If max_nfev is not None, a trajectory that exceeds this budget of rhs evaluations is solved again
+        with cheaper settings (with the same budget), then it fails if it exceeds the budget again"""
         assert len(times) > 1, times
+        statistics = SolverStatistics()
+        start = time.perf_counter()
+        increment('solver.nb_solves')
+        try:
+            try:
+                res = cls._solve(dynamical_model, initial_state, times, params, solver_method, statistics, max_nfev)
+            except SolverBudgetExceeded as e:
+                logging.warning(e.__repr__())
+                statistics.nb_retries += 1
+                increment('solver.nb_retries')
+                res = cls._solve(dynamical_model, initial_state, times, params,
+                                 solver_method_to_cheaper_solver_method[solver_method], statistics, max_nfev,
+                                 CHEAPER_RTOL)
+        except CustomizedValueError as e:
+            logging.warning(e.__repr__())
+            increment('solver.nb_failures')
+            statistics.failure = str(e)
+            # Create a trajectory with only np.nan values but with the expected dimension for the result
+            res = [np.array(initial_state) * np.nan for _ in range(len(times))]
+        statistics.duration = time.perf_counter() - start
+        increment('solver.nb_rhs_evaluations', statistics.nfev)
+        return res, statistics
+
+    @classmethod
+    def _solve(cls, dynamical_model: DynamicalModel, initial_state: np.ndarray, times: np.ndarray,
+               params: dict[str, float], solver_method: SolverMethod, statistics: SolverStatistics,
+               max_nfev: Optional[int] = None, rtol: float = RTOL) -> np.ndarray:
         times = times.copy()
         length_of_times = len(times)
+        #  Budget of this attempt (the statistics may already count the evaluations of a previous attempt)
+        nfev_budget = None if max_nfev is None else statistics.nfev + max_nfev
         try:
             if np.isnan(initial_state).any():
                 raise CustomizedValueError('nan in the initial state')
             dynamical_model.params_for_model_function = params
-            ode_result = solve_ivp(dynamical_model.model_function, t_span=(times[0], times[-1]), y0=initial_state,
-                                   method=solver_method_to_str[solver_method], t_eval=times)
-            res = ode_result.y.transpose()[-length_of_times:]
+            use_jacobian = solver_method in stiff_solver_methods and dynamical_model.has_jacobian
+            if solver_method in segment_solver_method_to_ode_solver:
+                res = cls.solve_by_segment(dynamical_model, initial_state, times, params,
+                                           segment_solver_method_to_ode_solver[solver_method], statistics,
+                                           nfev_budget, rtol, use_jacobian)
+            else:
+                #  The non-stiff solvers warn about a jac argument, thus it is only given when it is used
+                options = {'jac': dynamical_model.model_jacobian} if use_jacobian else {}
+                ode_result = solve_ivp(dynamical_model.model_function, t_span=(times[0], times[-1]),
+                                       y0=initial_state, method=solver_method_to_ode_solver[solver_method],
+                                       t_eval=times, rtol=rtol, statistics=statistics, max_nfev=nfev_budget,
+                                       **options)
+                statistics.nfev += int(ode_result.nfev)
+                statistics.njev += int(ode_result.njev)
+                if ode_result.status == -1 and ode_result.message == solver_budget_exceeded_message:
+                    raise SolverBudgetExceeded(ode_result.message)
+                res = ode_result.y.transpose()[-length_of_times:]
             #  If the solver fail to return a result for each time step, we return an exception
             if len(res) < length_of_times:
                 raise CustomizedValueError('solver crashed')
-        except CustomizedValueError as e:
-            logging.warning(e.__repr__())
-            # Create a trajectory with only np.nan values but with the expected dimension for the result
-            res = [np.array(initial_state) * np.nan for _ in range(length_of_times)]
         finally:
             dynamical_model.params_for_model_function = None
         return res
+
+    @classmethod
+    def solve_by_segment(cls, dynamical_model: DynamicalModel, initial_state: np.ndarray, times: np.ndarray,
+                         params: dict[str, float], ode_solver_type: type, statistics: SolverStatistics,
+                         nfev_budget: Optional[int] = None, rtol: float = RTOL,
+                         use_jacobian: bool = False) -> np.ndarray:
+        """Integrate year by year. Within a year the forcing is constant, thus each segment is smooth:
+        the solver does not need to handle the discontinuities of the forcing at integer times,
+        and the step size of the end of a segment is reused as the first step of the next segment"""
+        #  Boundaries of the segments are the integer times between the first and the last time
+        boundaries = [times[0]] + [float(t) for t in range(math.floor(times[0]) + 1, math.ceil(times[-1]))] + [times[-1]]
+        res = [np.array(initial_state, dtype=float)]
+        index, state, first_step = 1, res[0], None
+        for t0, t_bound in zip(boundaries[:-1], boundaries[1:]):
+            #  The forcing of the year is valid for the whole segment (t0, t_bound]
+            forcings = dynamical_model.forcing_function.get_forcings(t_bound)
+
+            def fun(t, y):
+                return dynamical_model.derivative(dynamical_model.create_states(y), forcings, params)
+
+            def jac(t, y):
+                return dynamical_model.jacobian(dynamical_model.create_states(y), forcings, params)
+
+            #  The first step cannot exceed the length of the segment
+            first_step = None if first_step is None else min(first_step, t_bound - t0)
+            solver = ode_solver_type(fun, t0, state, t_bound, first_step=first_step, rtol=rtol,
+                                     statistics=statistics, max_nfev=nfev_budget,
+                                     **({'jac': jac} if use_jacobian else {}))
+            while solver.status == 'running':
+                message = solver.step()
+                if solver.status == 'failed':
+                    statistics.nfev += int(solver.nfev)
+                    if message == solver_budget_exceeded_message:
+                        raise SolverBudgetExceeded(message)
+                    raise CustomizedValueError('solver crashed')
+                #  Evaluate the solution for the times that belong to the step (t_old, solver.t]
+                while index < len(times) and times[index] <= solver.t:
+                    if times[index] == solver.t:
+                        res.append(solver.y.copy())
+                    else:
+                        res.append(solver.dense_output()(times[index]))
+                    index += 1
+                if solver.status == 'running':
+                    first_step = solver.step_size
+            #  Step size proposed by a Runge-Kutta solver for its next step (the last step is truncated by t_bound)
+            first_step = getattr(solver, 'h_abs', first_step)
+            statistics.nfev += int(solver.nfev)
+            statistics.njev += int(solver.njev)
+            state = solver.y
+        return np.array(res)
@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+#  Number of bins of the histograms of the cost of the samples
+NB_HISTOGRAM_BINS = 20
+#  Columns of the statistics whose histogram is computed
+HISTOGRAM_COLUMNS = ['nfev', 'njev', 'nb_steps', 'duration']
+
+
+@dataclass
+class SolverStatistics(object):
+    """Cost of the integration of a trajectory"""
+    nfev: int = 0  #  number of evaluations of the right-hand side
+    njev: int = 0  #  number of evaluations of the jacobian
+    nb_steps: int = 0
+    duration: float = 0.  #  wall time (s)
+    failure: str = ''  #  reason of the failure (empty if the integration succeeded)
+    nb_retries: int = 0  #  number of integrations with cheaper settings, after the budget of evaluations was exceeded
+
+    def to_dict(self) -> dict:
+        return {'nfev': self.nfev, 'njev': self.njev, 'nb_steps': self.nb_steps, 'duration': self.duration,
+                'failure': self.failure, 'nb_retries': self.nb_retries}
+
+
+def get_df_solver_statistics(sample_ids: np.ndarray, params_vector_list: np.ndarray, parameter_names: list[str],
+                             statistics_list: list[SolverStatistics]) -> pd.DataFrame:
+    """Table with the parameters and the statistics of the solver of each sample"""
+    df = pd.DataFrame(np.asarray(params_vector_list).reshape(len(sample_ids), len(parameter_names)),
+                      columns=parameter_names, index=pd.Index(np.asarray(sample_ids, dtype=int), name='sample_id'))
+    df_statistics = pd.DataFrame([statistics.to_dict() for statistics in statistics_list], index=df.index,
+                                 columns=list(SolverStatistics().to_dict().keys()))
+    return pd.concat([df, df_statistics], axis=1)
+
+
+def get_solver_statistics_histograms(df: pd.DataFrame) -> dict:
+    """Histograms of the cost of the samples, and the number of failures for each reason.
+    The bins are log-spaced, since the cost of the samples spans several orders of magnitude"""
+    histograms = {'nb_samples': len(df), 'nb_retries': int(df['nb_retries'].sum())}
+    for column in HISTOGRAM_COLUMNS:
+        values = df[column].values.astype(float)
+        values = values[values > 0]
+        if len(values) > 0:
+            counts, log_bin_edges = np.histogram(np.log10(values), bins=NB_HISTOGRAM_BINS)
+            histograms[column] = {'bin_edges': (10 ** log_bin_edges).tolist(), 'counts': counts.tolist()}
+    failures = df.loc[df['failure'] != '', 'failure']
+    histograms['failures'] = {str(k): int(v) for k, v in failures.value_counts().items()}
+    return histograms
@@ -1,11 +1,13 @@
-from typing import Generator
+from typing import Generator, TYPE_CHECKING
 
 import pandas as pd
-from scipy.stats._qmc import LatinHypercube
 
 from calibration.dynamical_model.dynamical_model import DynamicalModel
 from utils.utils_run import random_seed
 
+if TYPE_CHECKING:
+    from scipy.stats.qmc import LatinHypercube
+
 
 def params_sampled(dynamical_model: DynamicalModel, nb_samples: int) -> Generator[dict[str, float], None, None]:
     df_parameters = get_df_parameters_sampled(dynamical_model, nb_samples)
@@ -24,14 +26,27 @@ def get_df_parameters_sampled(dynamical_model: DynamicalModel, nb_samples: int)
 
 
 def _get_df_random_parameters_sampled(dynamical_model: DynamicalModel, nb_samples: int) -> pd.DataFrame:
-    latin_hypercube = LatinHypercube(len(dynamical_model.parameter_name_to_range), seed=random_seed)
-    #  We sample 2 times more than necessary to ensure that we have enough samples to respect potential constraints
-    samples = latin_hypercube.random(nb_samples * 2)
+    #  We sample 2 times more than necessary to ensure that we have enough samples to respect potential constraints
+    return get_df_latin_hypercube_samples(dynamical_model, nb_samples * 2)
+
+
+def get_df_latin_hypercube_samples(dynamical_model: DynamicalModel, nb_samples: int) -> pd.DataFrame:
+    """Sample the parameters that have a range using a LatinHypercube"""
+    samples = get_latin_hypercube(dynamical_model).random(nb_samples)
     df_random_parameters = pd.DataFrame(data=samples, columns=list(dynamical_model.parameter_name_to_range.keys()))
-    #  Sampling ranges
+    #  Sampling ranges
     scale_and_shift = [(b - a, a) for a, b in dynamical_model.parameter_name_to_range.values()]
     # Scale and shift the samples to the appropriate range
     for i, (scale, shift) in enumerate(scale_and_shift):
         df_random_parameters.iloc[:, i] *= scale
         df_random_parameters.iloc[:, i] += shift
     return df_random_parameters
+
+
+def get_latin_hypercube(dynamical_model: DynamicalModel) -> 'LatinHypercube':
+    #  scipy.stats is imported on demand, since it is slow to import and only used to sample the parameters
+    from scipy.stats.qmc import LatinHypercube
+    #  With seed=random_seed, the LatinHypercube draws from the root stream of the run, i.e. utils_random.get_generator().
+    #  We cannot pass this generator directly (scipy would spawn a child stream), and we want to keep sampling
+    #  the same parameters as the calibrations that have already been saved
+    return LatinHypercube(len(dynamical_model.parameter_name_to_range), seed=random_seed)
@@ -0,0 +1,106 @@
+import fcntl
+import json
+import os
+import os.path as op
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+#  Cache parameters
+CONTINUATION_CACHE_MAX_SIZE = 2 * 1024 ** 3  # maximum size (in bytes) of the csv files stored in one cache folder
+
+
+@dataclass
+class ContinuationCache(object):
+    """Content-addressed cache of continuation results
+
+    Each result is stored in a csv file named after its key (a stable hash of what the result depends on).
+    An index file keeps track of the stored files and their sizes. When the total size exceeds max_size,
+    the least recently used files are evicted (the modification time of a file is updated each time it is loaded)"""
+    path: str
+    max_size: int = CONTINUATION_CACHE_MAX_SIZE
+
+    @property
+    def index_filepath(self) -> str:
+        return op.join(self.path, 'index.json')
+
+    def filepath(self, key: str) -> str:
+        return op.join(self.path, f'{key}.csv')
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        filepath = self.filepath(key)
+        try:
+            df = pd.read_csv(filepath, index_col=0)
+            #  Mark the file as recently used
+            os.utime(filepath)
+        except FileNotFoundError:
+            #  The file has never been saved (or it has just been evicted)
+            return None
+        return df
+
+    def save(self, key: str, df: pd.DataFrame, metadata: Optional[dict] = None):
+        if not op.exists(self.path):
+            os.makedirs(self.path, exist_ok=True)
+        filepath = self.filepath(key)
+        #  Write in a temporary file first, so that a concurrent load never reads a partial file
+        tmp_filepath = f'{filepath}.{os.getpid()}.tmp'
+        df.to_csv(tmp_filepath)
+        os.replace(tmp_filepath, filepath)
+        with self._locked_index() as index:
+            index[key] = {'size': op.getsize(filepath), **(metadata or {})}
+            self._evict(index, key_to_keep=key)
+
+    def __contains__(self, key: str) -> bool:
+        return op.exists(self.filepath(key))
+
+    @property
+    def size(self) -> int:
+        return sum([entry['size'] for entry in self._load_index().values()])
+
+    ###########################################
+    #
+    #           Private methods to manage the index
+    #
+    ###########################################
+
+    def _evict(self, index: dict, key_to_keep: str):
+        total_size = sum([entry['size'] for entry in index.values()])
+        if total_size <= self.max_size:
+            return None
+        #  Remove entries whose file has disappeared, then the least recently used files
+        key_to_last_use = {}
+        for key in list(index.keys()):
+            filepath = self.filepath(key)
+            if op.exists(filepath):
+                key_to_last_use[key] = op.getmtime(filepath)
+            else:
+                total_size -= index.pop(key)['size']
+        for key in sorted(key_to_last_use, key=lambda k: key_to_last_use[k]):
+            if total_size <= self.max_size:
+                break
+            if key != key_to_keep:
+                os.remove(self.filepath(key))
+                total_size -= index.pop(key)['size']
+
+    def _load_index(self) -> dict:
+        if op.exists(self.index_filepath):
+            with open(self.index_filepath) as f:
+                return json.load(f)
+        else:
+            return {}
+
+    @contextmanager
+    def _locked_index(self):
+        #  The lock ensures that workers running in parallel do not overwrite the entries of each other
+        with open(op.join(self.path, 'index.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                index = self._load_index()
+                yield index
+                with open(self.index_filepath + '.tmp', 'w') as f:
+                    json.dump(index, f)
+                os.replace(self.index_filepath + '.tmp', self.index_filepath)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -20,7 +20,7 @@ p0 = 0.01
 
 # Run continuation
 print(u0, p0)
-u_path, p_path = pseudoArclengthContinuationOneDirection(
+u_path, p_path, fold_path, statistics = pseudoArclengthContinuationOneDirection(
     G,
     u0, p0,
     ds_min=0.0000001,
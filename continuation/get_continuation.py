@@ -1,45 +1,65 @@
-import os
-import os.path as op
+import logging
 from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Callable
+from typing import Callable, Optional
 
 import numpy as np
 import pandas as pd
+from numpy.linalg import norm
+from scipy.integrate import solve_ivp
+from scipy.optimize import root
 
 from calibration.dynamical_model.dynamical_model import DynamicalModel
 from calibration.forcing_function.rain.rain_forcing_function import RAIN_STR
+from continuation.continuation_cache import ContinuationCache
+from continuation.pycont.PseudoArclengthContinuation import Termination
 from continuation.pycont.continuation import pseudoArclengthContinuationOneDirection
 from projects.paper_model.utils_paper_model import get_calibration
+from utils.utils_hash import compute_hash
+from utils.utils_log import log_info
 from utils.utils_multiprocessing import parallelize
-from utils.utils_path.utils_path import CONTINUATION_DATA_PATH
+from utils.utils_path.utils_path import CONTINUATION_CACHE_DATA_PATH
+from utils.utils_random import get_generator, get_spawn_key_from_hash, CONTINUATION_STREAM
+from utils.utils_run import random_seed, CustomizedValueError
+
+#  Continuation parameters (they are part of the cache key, any change leads to a new computation)
+continuation_settings = {
+    'initial_value': 0.01,
+    'ds_min': 0.0000001,
+    'ds_max': 1.,
+    'ds_0': 0.2,
+    'N': 10000,
+    'epsilon': 1e-5,
+    'random_seed': random_seed,
+    'fold_tolerance': 1e-8,
+    'max_angle': 0.1,
+    'target_newton_iterations': 3,
+    #  Use the analytic jacobian of the model (if it is defined) instead of finite differences
+    'analytic_jacobian': True,
+    #  Relative step of the finite differences of the corrector (without analytic jacobian), small enough to resolve
+    #  the sharp limit points at large forcings
+    'newton_rdiff': 1e-10,
+}
+
+continuation_cache = ContinuationCache(CONTINUATION_CACHE_DATA_PATH)
+
+#  Value of the fold path at the first point of a continuation restarted on another branch (the path is not
+#  continuous between this point and the previous one)
+RESTART = 2
+#  Duration of the relaxation of the dynamics toward the other branch, beyond the limit point
+RELAXATION_TIME = 1e4
+
+
+class ContinuationError(CustomizedValueError):
+    """The continuation terminated before reaching the max forcing (its path is never saved)"""
+    pass
 
 
 def get_continuation(watershed_name: str, ensemble_ids: list[int], min_forcing: float, max_forcing: float):
-    folder = op.join(CONTINUATION_DATA_PATH, f'{int(min_forcing)}_{int(max_forcing)}', watershed_name)
-    if not op.exists(folder):
-        os.makedirs(folder)
-    calibration = None
-    ensemble_id_to_u_path_and_p_path = OrderedDict()
-    for ensemble_id in ensemble_ids:
-        csv_filepath = op.join(folder, f'{ensemble_id}.csv')
-        if op.exists(csv_filepath):
-            # print(f'Load ensemble_id={ensemble_id}')
-            # Load continuation
-            df = pd.read_csv(csv_filepath, index_col=0)
-            u_path, p_path = df['u'].values, df['p'].values
-        else:
-            # print(f'Compute ensemble_id={ensemble_id}')
-            # Compute continuation
-            if calibration is None:
-                calibration = get_calibration(watershed_name)
-            params = calibration.ensemble_id_to_params[ensemble_id]
-            u_path, p_path = compute_continuation(calibration.dynamical_model, params, min_forcing, max_forcing)
-            u_path, p_path = np.array(u_path), np.array(p_path)
-            # Save continuation
-            pd.DataFrame({'u': u_path, 'p': p_path}).to_csv(csv_filepath)
-        ensemble_id_to_u_path_and_p_path[ensemble_id] = (u_path, p_path)
-    return ensemble_id_to_u_path_and_p_path
+    calibration = get_calibration(watershed_name)
+    params_list = [calibration.ensemble_id_to_params[ensemble_id] for ensemble_id in ensemble_ids]
+    paths = get_continuation_list(calibration.dynamical_model, params_list, min_forcing, max_forcing, parallel=False)
+    return OrderedDict(zip(ensemble_ids, paths))
 
 
 def get_continuation_parallel(watershed_name: str, ensemble_ids: list[int], min_forcing: float, max_forcing: float,
@@ -55,66 +75,156 @@ class Continuation:
     parallel: bool
 
     def __post_init__(self):
-        self.folder = op.join(CONTINUATION_DATA_PATH, f'{int(self.min_forcing)}_{int(self.max_forcing)}', self.watershed_name)
-        if not op.exists(self.folder):
-            os.makedirs(self.folder)
         self.calibration = get_calibration(self.watershed_name)
 
-
     def compute_all(self):
-        paths = parallelize(self.compute_one, self.ensemble_ids, parallel=self.parallel)
+        params_list = [self.calibration.ensemble_id_to_params[ensemble_id] for ensemble_id in self.ensemble_ids]
+        paths = get_continuation_list(self.calibration.dynamical_model, params_list,
+                                      self.min_forcing, self.max_forcing, self.parallel)
         return dict(zip(self.ensemble_ids, paths))
 
-    def compute_one(self, ensemble_id):
-        csv_filepath = op.join(self.folder, f'{ensemble_id}.csv')
-        if op.exists(csv_filepath):
-            print(f'Load ensemble_id={ensemble_id}')
-            # Load continuation
-            df = pd.read_csv(csv_filepath, index_col=0)
-            u_path, p_path = df['u'].values, df['p'].values
-        else:
-            print(f'Compute ensemble_id={ensemble_id}')
-            params = self.calibration.ensemble_id_to_params[ensemble_id]
-            u_path, p_path = compute_continuation(self.calibration.dynamical_model, params, self.min_forcing, self.max_forcing)
-            u_path, p_path = np.array(u_path), np.array(p_path)
-            # Save continuation
-            pd.DataFrame({'u': u_path, 'p': p_path}).to_csv(csv_filepath)
-        return u_path, p_path
 
+def get_continuation_list(dynamical_model: DynamicalModel, params_list: list[dict[str, float]],
+                          min_forcing: float, max_forcing: float, parallel: bool = True):
+    """Paths of the members (None for a member whose continuation failed)"""
+    key_to_path = compute_missing_continuations(dynamical_model, params_list, min_forcing, max_forcing, parallel)
+    paths = []
+    for params in params_list:
+        key = get_continuation_key(dynamical_model, params, min_forcing, max_forcing)
+        #  The failed continuations are not saved, thus they are not computed again
+        if key in key_to_path:
+            paths.append(key_to_path[key])
+        else:
+            paths.append(load_or_compute_continuation(dynamical_model, params, min_forcing, max_forcing))
+    return paths
+
+
+def compute_missing_continuations(dynamical_model: DynamicalModel, params_list: list[dict[str, float]],
+                                  min_forcing: float, max_forcing: float, parallel: bool = True) \
+        -> dict[str, Optional[tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    #  Find the continuations that have not been saved (members with identical parameters are computed once)
+    key_to_params = OrderedDict()
+    for params in params_list:
+        key = get_continuation_key(dynamical_model, params, min_forcing, max_forcing)
+        if key not in continuation_cache:
+            key_to_params[key] = params
+    if len(key_to_params) == 0:
+        return {}
+    log_info(f'Compute {len(key_to_params)} continuations')
+    #  Workers only receive the dynamical model and the parameters (not the calibration)
+    arguments_list = [(dynamical_model, params, min_forcing, max_forcing) for params in key_to_params.values()]
+    paths = parallelize(_load_or_compute_continuation, arguments_list, parallel=parallel and len(arguments_list) > 1)
+    return dict(zip(key_to_params.keys(), paths))
+
+
+def _load_or_compute_continuation(arguments):
+    return load_or_compute_continuation(*arguments)
+
+
+def get_continuation_key(dynamical_model: DynamicalModel, params: dict[str, float],
+                         min_forcing: float, max_forcing: float) -> str:
+    """Key of a continuation in the cache: the result only depends on the model, its parameters and the settings"""
+    return compute_hash(dynamical_model.name, params, min_forcing, max_forcing, continuation_settings)
+
+
+def load_or_compute_continuation(dynamical_model: DynamicalModel, params: dict[str, float],
+                                 min_forcing: float, max_forcing: float) \
+        -> Optional[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Path of a member, or None if its continuation failed (the other members of the ensemble are not aborted)"""
+    key = get_continuation_key(dynamical_model, params, min_forcing, max_forcing)
+    df = continuation_cache.load(key)
+    #  A path that does not reach the max forcing is incomplete, it is computed again
+    if df is None or df['p'].values[-1] < max_forcing:
+        #  The random stream only depends on the key, thus on the member (not on the worker that computes it)
+        rng = get_generator(CONTINUATION_STREAM, get_spawn_key_from_hash(key))
+        try:
+            u_path, p_path, fold_path, statistics = compute_continuation(dynamical_model, params, min_forcing,
+                                                                         max_forcing, rng)
+        except ContinuationError as e:
+            logging.warning(e.__repr__())
+            return None
+        df = pd.DataFrame({'u': np.array(u_path), 'p': np.array(p_path), 'fold': np.array(fold_path)})
+        metadata = {'model': dynamical_model.name, 'min_forcing': min_forcing, 'max_forcing': max_forcing,
+                    **statistics.to_dict()}
+        continuation_cache.save(key, df, metadata)
+    return df['u'].values, df['p'].values, df['fold'].values
 
 
 def compute_continuation(dynamical_model: DynamicalModel, params: dict[str, float],
-                         min_forcing: float, max_forcing: float):
+                         min_forcing: float, max_forcing: float, rng: Optional[np.random.Generator] = None):
     # Create a custom 'derivative' function
     def derivative(states: np.ndarray[float], forcing: float):
         states = dict(zip(dynamical_model.state_names, states))
         return np.array([dynamical_model.derivative(states, {RAIN_STR: forcing}, params)])
-    return _compute_continuation(derivative, min_forcing, max_forcing)
-
-
-def _compute_continuation(derivative: Callable, min_forcing: float, max_forcing: float):
-    # Run continuation to obtain u_path (path of states) and p_path (path of the corresponding forcing)
-    # Loop while the max_forcing is not reached
-    initial_value = 0.01
-    u_path, p_path = [initial_value], [max(0.1, min_forcing - 1)]
-    while p_path[-1] < max_forcing:
-        u0, p0 = u_path[-1], p_path[-1]
-        u_path, p_path = u_path[:-1], p_path[:-1]
-        epsilon = 1e-5
-        new_u_path, new_p_path = pseudoArclengthContinuationOneDirection(derivative, u0, p0,
-                                                                 ds_min=0.0000001, ds_max=1., ds_0=0.2,
-                                                                 N=10000, p_max=max_forcing,
-                                                                         epsilon=epsilon)
-        # Handle special case
-        if new_p_path[-1] < epsilon:
-            index_max_p = np.argmax(new_p_path)
-            index_to_cut = index_max_p - 100 # Cut the trajectory several steps before it reaches its max p
-            new_u_path = new_u_path[:index_to_cut] + [np.array([initial_value])]
-            new_p_path = new_p_path[:index_to_cut+1]
-
-        u_path.extend(list(np.array(new_u_path).flatten()))
-        p_path.extend(list(np.array(new_p_path).flatten()))
-    return u_path, p_path
-
-
 
+    jacobian = None
+    if continuation_settings['analytic_jacobian'] and dynamical_model.has_jacobian:
+        def jacobian(states: np.ndarray[float], forcing: float):
+            states = dict(zip(dynamical_model.state_names, states))
+            return dynamical_model.jacobian(states, {RAIN_STR: forcing}, params)
+    return _compute_continuation(derivative, min_forcing, max_forcing, rng, jacobian)
+
+
+def _compute_continuation(derivative: Callable, min_forcing: float, max_forcing: float,
+                          rng: Optional[np.random.Generator] = None, jacobian: Optional[Callable] = None):
+    # Run continuation to obtain u_path (path of states), p_path (path of the corresponding forcing)
+    # and fold_path (1 or -1 for the limit points where p reaches respectively a local maximum or minimum,
+    # RESTART for the first point of a restart on another branch, 0 otherwise)
+    # The step size controller ensures that the continuation terminates after a bounded number of steps
+    initial_value = continuation_settings['initial_value']
+    u_path, p_path, fold_path, statistics = _run_continuation(derivative, initial_value, max(0.1, min_forcing - 1),
+                                                              max_forcing, rng, jacobian)
+    # Special case where the path goes toward a limit point, then comes back below epsilon along the repulsors:
+    # the continuation restarts on the other branch, i.e. the attractor reached by the dynamics beyond the limit point
+    if statistics.termination is Termination.EPSILON:
+        index_max_p = int(np.argmax(np.ravel(p_path)))
+        #  The limit point is recorded even if its bisection failed
+        if 1 not in fold_path[max(index_max_p - 1, 0):index_max_p + 2]:
+            fold_path[index_max_p] = 1
+        u_fold, p_fold = float(np.ravel(u_path[index_max_p])[0]), float(np.ravel(p_path[index_max_p])[0])
+        u_restart, p_restart = find_other_branch(derivative, u_fold, p_fold + continuation_settings['ds_0'])
+        restart_u_path, restart_p_path, restart_fold_path, restart_statistics = \
+            _run_continuation(derivative, u_restart, p_restart, max_forcing, rng, jacobian, increasing_p=True)
+        u_path, p_path = u_path + restart_u_path, p_path + restart_p_path
+        fold_path = fold_path + [RESTART] + restart_fold_path[1:]
+        statistics.add_restart(restart_statistics)
+    #  The bifurcation attributes of a truncated path would miss all the forcings that are not reached
+    if statistics.termination is not Termination.P_MAX:
+        raise ContinuationError(f'Continuation stopped at p={float(np.ravel(p_path)[-1])} before {max_forcing} '
+                                f'({statistics.termination.value})')
+    return list(np.array(u_path).flatten()), list(np.array(p_path).flatten()), fold_path, statistics
+
+
+def _run_continuation(derivative: Callable, u0: float, p0: float, max_forcing: float,
+                      rng: Optional[np.random.Generator] = None, jacobian: Optional[Callable] = None,
+                      increasing_p: bool = False):
+    return pseudoArclengthContinuationOneDirection(
+        derivative, u0, p0,
+        ds_min=continuation_settings['ds_min'],
+        ds_max=continuation_settings['ds_max'],
+        ds_0=continuation_settings['ds_0'],
+        N=continuation_settings['N'],
+        p_max=max_forcing, epsilon=continuation_settings['epsilon'], rng=rng,
+        fold_tolerance=continuation_settings['fold_tolerance'],
+        max_angle=continuation_settings['max_angle'],
+        target_newton_iterations=continuation_settings['target_newton_iterations'], Gu=jacobian,
+        newton_rdiff=continuation_settings['newton_rdiff'], increasing_p=increasing_p)
+
+
+def find_other_branch(derivative: Callable, u_fold: float, p: float) -> tuple[float, float]:
+    """Equilibrium reached from the state of a limit point when the forcing p is beyond the limit point:
+    the dynamics is relaxed, then the equilibrium is refined with a root finding"""
+    relaxation = solve_ivp(lambda t, u: derivative(u, p), (0., RELAXATION_TIME), np.array([u_fold]), method='LSODA')
+    if not relaxation.success:
+        raise ContinuationError(f'Relaxation failed beyond the limit point at p={p} ({relaxation.message})')
+    solution = root(lambda u: derivative(u, p), relaxation.y[:, -1])
+    if not solution.success or norm(derivative(solution.x, p)) > 1e-8:
+        raise ContinuationError(f'No other branch found beyond the limit point at p={p} ({solution.message})')
+    return float(solution.x[0]), float(p)
+
+
+def get_fold_forcings(p_path: np.ndarray, fold_path: np.ndarray) -> tuple[list[float], list[float]]:
+    """Return the forcings of the limit points where p reaches a local minimum, and a local maximum"""
+    lower_fold_forcings = [float(p) for p, fold in zip(p_path, fold_path) if fold == -1]
+    upper_fold_forcings = [float(p) for p, fold in zip(p_path, fold_path) if fold == 1]
+    return lower_fold_forcings, upper_fold_forcings
@@ -2,27 +2,59 @@ from collections import OrderedDict
 
 import numpy as np
 
-from bifurcation.bifurcation_data.stability_range_functions import compute_stability_ranges
-from continuation.get_continuation_interpolated import get_continuation_interpolated
+from bifurcation.bifurcation_data.stability_range_functions import compute_stability_ranges_from_fold_forcings
+from calibration.dynamical_model.dynamical_model import DynamicalModel
+from continuation.get_continuation import get_continuation, get_continuation_list, get_fold_forcings, RESTART
+from utils.utils_instrumentation import span
+
+#  Branches shorter than this forcing length are numerical oscillations close to a limit point
+MIN_BRANCH_LENGTH = 1e-3
 
 
 def get_bifurcation_attributes(watershed_name: str, ensemble_id: int, min_forcing: float, max_forcing: float):
-    interpolated_value_list, forcing_list = get_continuation_interpolated(watershed_name, [ensemble_id],
-                                                                          min_forcing, max_forcing)[ensemble_id]
-    forcing_list = [float(forcing) for forcing in forcing_list]
-    interpolated_value_list = [np.array([value]) for value in interpolated_value_list]
-    forcing_to_attractors = OrderedDict()
-    for forcing in forcing_list:
-        forcing_to_attractors[forcing] = []
+    path = get_continuation(watershed_name, [ensemble_id], min_forcing, max_forcing)[ensemble_id]
+    return None if path is None else compute_bifurcation_attributes(*path, min_forcing, max_forcing)
+
+
+def get_bifurcation_attributes_list(dynamical_model: DynamicalModel, params_list: list[dict[str, float]],
+                                    min_forcing: float, max_forcing: float, parallel: bool = True):
+    """Bifurcation attributes of the members (None for a member whose continuation failed)"""
+    with span('bifurcation.continuation'):
+        paths = get_continuation_list(dynamical_model, params_list, min_forcing, max_forcing, parallel)
+    with span('bifurcation.interpolation'):
+        return [None if path is None else compute_bifurcation_attributes(*path, min_forcing, max_forcing)
+                for path in paths]
+
+
+def compute_bifurcation_attributes(u_path: np.ndarray, p_path: np.ndarray, fold_path: np.ndarray,
+                                   min_forcing: float, max_forcing: float):
+    """
+    The limit points split the continuation path into branches. Along an increasing branch (of the forcing),
+    the states are attractors, along a decreasing branch, they are repulsors.
+    Each branch is interpolated at once on all the forcings between min_forcing and max_forcing.
+    """
+    u_path, p_path = np.asarray(u_path, dtype=float), np.asarray(p_path, dtype=float)
+    forcings = np.arange(min_forcing, max_forcing + 1)
+    forcing_to_attractors = OrderedDict([(float(forcing), []) for forcing in forcings])
     forcing_to_repulsor = OrderedDict()
-    previous_forcing = 0
-    for forcing, stable_state_value in zip(forcing_list, interpolated_value_list):
-        if previous_forcing < forcing:
-            forcing_to_attractors[forcing].append(stable_state_value)
+    for u_branch, p_branch in split_path_into_branches(u_path, p_path, fold_path):
+        is_increasing = p_branch[-1] > p_branch[0]
+        #  np.interp requires increasing forcings, we also remove numerical oscillations
+        if not is_increasing:
+            u_branch, p_branch = u_branch[::-1], p_branch[::-1]
+        p_branch = np.maximum.accumulate(p_branch)
+        branch_forcings = forcings[(p_branch[0] <= forcings) & (forcings <= p_branch[-1])]
+        branch_values = np.interp(branch_forcings, p_branch, u_branch)
+        if is_increasing:
+            for forcing, value in zip(branch_forcings, branch_values):
+                forcing_to_attractors[float(forcing)].append(np.array([value]))
         else:
-            forcing_to_repulsor[forcing] = stable_state_value[0]
-        previous_forcing = forcing
-    # Compute stability detection (for a monostable we return a dictionary mapping forcing to attractor, for bistable we return the first bistable forcing)
+            #  Repulsors are stored in the order of the path
+            for forcing, value in zip(branch_forcings[::-1], branch_values[::-1]):
+                forcing_to_repulsor[float(forcing)] = value
+    forcing_to_attractors = OrderedDict([(forcing, attractors) for forcing, attractors in forcing_to_attractors.items()
+                                         if len(attractors) > 0])
+    # Compute stability detection (for a monostable we return a dictionary mapping forcing to attractor, for bistable we return the first bistable forcing)
     stability_detection = OrderedDict()
     for forcing, attractors in forcing_to_attractors.items():
         if len(attractors) == 1:
@@ -30,8 +62,25 @@ def get_bifurcation_attributes(watershed_name: str, ensemble_id: int, min_forcin
         else:
             stability_detection = forcing
             break
-    # Compute stability ranges
-    stability_ranges = compute_stability_ranges(forcing_to_attractors, stability_detection, min_forcing, max_forcing)
+    # Compute stability ranges from the limit points
+    lower_fold_forcings, upper_fold_forcings = get_fold_forcings(p_path, fold_path)
+    stability_ranges = compute_stability_ranges_from_fold_forcings(forcing_to_attractors, stability_detection,
+                                                                   lower_fold_forcings, upper_fold_forcings,
+                                                                   min_forcing, max_forcing)
 
     return forcing_to_attractors, forcing_to_repulsor, stability_ranges, stability_detection
 
+
+def split_path_into_branches(u_path: np.ndarray, p_path: np.ndarray, fold_path: np.ndarray):
+    """Split the path at each limit point (a limit point belongs to the two branches it separates),
+    and before each restart on another branch"""
+    starts, ends = [0], []
+    for i, fold in enumerate(fold_path):
+        if fold == RESTART:
+            starts, ends = starts + [i], ends + [i - 1]
+        elif fold != 0:
+            starts, ends = starts + [i], ends + [i]
+    ends.append(len(p_path) - 1)
+    for start, end in zip(starts, ends):
+        if abs(p_path[end] - p_path[start]) > MIN_BRANCH_LENGTH:
+            yield u_path[start:end + 1], p_path[start:end + 1]
@@ -1,5 +1,4 @@
 from continuation.get_continuation_bifurcation_attributes import get_bifurcation_attributes
-from continuation.get_continuation_interpolated import get_continuation_interpolated
 
 
 def main_get_attractors_and_repulsors():
@@ -1,102 +1,160 @@
-import math
+from dataclasses import dataclass
+from enum import Enum
 from typing import Optional
 
 import numpy as np
 from numpy.linalg import norm, solve
-from numpy.random import RandomState
-from scipy.optimize import newton_krylov
+from scipy.optimize import newton_krylov, NoConvergence
 from scipy.sparse.linalg import LinearOperator, gmres, lgmres
 
 
+class Termination(Enum):
+    P_MAX = 'p_max'
+    EPSILON = 'epsilon'
+    MAX_STEPS = 'max_steps'
+    MIN_STEP_SIZE = 'min_step_size'
+
+
+@dataclass
+class ContinuationStatistics(object):
+    nb_accepted_steps: int = 0
+    nb_rejected_steps: int = 0
+    nb_newton_iterations: int = 0
+    nb_restarts: int = 0
+    termination: Optional[Termination] = None
+
+    def add_restart(self, restart_statistics: 'ContinuationStatistics') -> None:
+        """Add the statistics of a continuation restarted on another branch (its termination ends the path)"""
+        self.nb_accepted_steps += restart_statistics.nb_accepted_steps
+        self.nb_rejected_steps += restart_statistics.nb_rejected_steps
+        self.nb_newton_iterations += restart_statistics.nb_newton_iterations
+        self.nb_restarts += 1 + restart_statistics.nb_restarts
+        self.termination = restart_statistics.termination
+
+    def to_dict(self) -> dict:
+        return {'nb_accepted_steps': self.nb_accepted_steps, 'nb_rejected_steps': self.nb_rejected_steps,
+                'nb_newton_iterations': self.nb_newton_iterations, 'nb_restarts': self.nb_restarts,
+                'termination': self.termination.value}
+
 
 def continuation(G, Gu_v, Gp, u0, p0, initial_tangent, ds_min, ds_max, ds, N_steps,
                  p_max, a_tol=1.e-10, max_it=10,
-                 r_diff=1.e-8, epsilon: Optional[float] = None):
+                 r_diff=1.e-8, epsilon: Optional[float] = None, fold_tolerance=1.e-8,
+                 max_angle=0.1, target_newton_iterations=3, Gu=None, newton_rdiff=None):
+    """Follow the curve G(u, p) = 0 from (u0, p0).
+
+    The step size ds is adapted after each step from the number of Newton iterations of the corrector
+    (compared to target_newton_iterations) and from the curvature, i.e. the angle between two consecutive
+    tangents (compared to max_angle). A step whose corrector fails, or whose angle exceeds max_angle, is rejected.
+    The continuation terminates when p reaches p_max, when p goes below epsilon, after N_steps accepted steps,
+    or when a step is rejected with ds = ds_min. Thus the number of corrector calls is bounded.
+    If the jacobian Gu(u, p) of G with respect to u is given, the corrector is a Newton-Raphson with the exact
+    jacobian of the extended system, instead of a Newton-Krylov with finite differences (whose step is relative
+    to the norm of (u, p), thus too large to resolve sharp limit points when p is large, unless newton_rdiff
+    is small)"""
     M = u0.size
     u = np.copy(u0)  # Always the previous point on the curve
     p = np.copy(p0)  # Always the previous point on the curve
     u_path = [u]
     p_path = [p]
-
-    # print_str = 'Step n: {0:3d}\t u: {1:4f}\t p: {2:4f}'.format(0, norm(u), p)
-    # print(print_str)
+    fold_path = [0]  # 1 for a limit point where p reaches a local maximum, -1 for a local minimum, 0 otherwise
+    statistics = ContinuationStatistics()
 
     # Choose intial tangent (guess). We need to negate to find the actual search direction
     prev_tangent = -initial_tangent / norm(initial_tangent)
-
-    # Variables for test_fn bifurcation detection -
-    # Ensure no component in the direction of the tangent
-    rng = RandomState()
-    r = rng.normal(0.0, 1.0, M + 1)
-    l = rng.normal(0.0, 1.0, M + 1)
-    r = r - np.dot(r, prev_tangent) / np.dot(prev_tangent, prev_tangent) * prev_tangent
-    l = l - np.dot(l, prev_tangent) / np.dot(prev_tangent, prev_tangent) * prev_tangent
-    r = r / norm(r)
-    l = l / norm(l)
-    prev_tau_value = 0.0
-    prev_tau_vector = None
+    # Determine the tangent to the curve at the initial point
+    tangent = computeTangent(u, p, Gu_v, Gp, prev_tangent, M, a_tol)
 
     for n in range(1, N_steps + 1):
-        # Determine the tangent to the curve at current point
-        tangent = computeTangent(u, p, Gu_v, Gp, prev_tangent, M, a_tol)
-
         # Create the extended system for corrector
         N = lambda x: np.dot(tangent, x - np.append(u, p)) + ds
         F = lambda x: np.append(G(x[0:M], x[M]), N(x))
-        dF_w = lambda x, w: (F(x + r_diff * w) - F(x)) / r_diff
 
         # Our implementation uses adaptive timetepping
-        while ds > ds_min:
-            # print(f'ds={ds}')
-            # Predictor: Follow the tangent vector
-            u_p = u + tangent[0:M] * ds
-            p_p = p + tangent[M] * ds
-            x_p = np.append(u_p, p_p)
-
-            # Corrector: Newton-Raphson
+        while True:
+            # Predictor: Follow the curve in the opposite direction of the tangent (as required by the corrector)
+            x_p = np.append(u, p) - tangent * ds
+
+            # Corrector: Newton-Raphson (the callback counts the iterations)
+            nb_iterations = []
             try:
-                x_result = newton_krylov(F, x_p, f_tol=a_tol, maxiter=max_it, verbose=False)
-                ds = min(1.2 * ds, ds_max)
+                x_result = corrector(F, x_p, tangent, Gu, Gp, a_tol, max_it,
+                                     callback=lambda x, f: nb_iterations.append(1), rdiff=newton_rdiff)
+                new_tangent = computeTangent(x_result[0:M], x_result[M], Gu_v, Gp, tangent, M, a_tol)
+                angle = np.arccos(np.clip(np.dot(tangent, new_tangent), -1.0, 1.0))
+            except Exception:
+                x_result, angle = None, np.inf
+            statistics.nb_newton_iterations += len(nb_iterations)
+            # Accept the step if the corrector converged and the curvature is resolved (or ds cannot be decreased)
+            if x_result is not None and (angle <= max_angle or ds <= ds_min):
                 break
-            except:
-                # Decrease arclength if the solver needs more than max_it iterations
+            statistics.nb_rejected_steps += 1
+            if ds <= ds_min:
+                statistics.termination = Termination.MIN_STEP_SIZE
+                return u_path, p_path, fold_path, statistics
+            if x_result is None:
+                # The corrector failed, the angle is unknown
                 ds = max(0.5 * ds, ds_min)
-        else:
-            # This case should never happpen under normal circumstances
-            # print('Minimal Arclength Size is too large. Aborting.')
-            return u_path, p_path
+            else:
+                ds = max(ds * min(0.5, max_angle / angle), ds_min)
+        statistics.nb_accepted_steps += 1
         u_new = x_result[0:M]
         p_new = x_result[M]
 
-        # Do bifurcation detection in the new point
-        tau_vector, tau_value = test_fn_bifurcation(dF_w, np.append(u_new, p_new), l, r, M, prev_tau_vector)
-        if prev_tau_value * tau_value < 0.0:  # Bifurcation point detected
-            print('Sign change detected', prev_tau_value, tau_value)
-            # is_bf, x_singular = _computeBifurcationPointBisect(dF_w, np.append(u, p), np.append(u_new, p_new), l, r, M,
-            #                                                    a_tol, prev_tau_vector)
-            # if is_bf:
-            #     return np.array(u_path), np.array(p_path), [x_singular]
+        # Limit point detection: the p-component of the tangent changes sign between the two last points
+        if tangent[M] * new_tangent[M] < 0.0:
+            x_fold = computeFoldPointBisect(G, Gu_v, Gp, np.append(u, p), x_result,
+                                            tangent, M, a_tol, max_it, fold_tolerance, Gu=Gu, rdiff=newton_rdiff)
+            if x_fold is not None:
+                u_path.append(x_fold[0:M])
+                p_path.append(x_fold[M])
+                # The curve is followed in the opposite direction of the tangent (see the corrector above)
+                fold_path.append(1 if tangent[M] < 0.0 else -1)
 
         # Bookkeeping for the next step
         u = np.copy(u_new)
         p = np.copy(p_new)
         u_path.append(u)
         p_path.append(p)
-        prev_tangent = np.copy(tangent)
-        prev_tau_value = tau_value
-        prev_tau_vector = tau_vector
-
-        # Print the status
-        print(f'p: {p} u: {norm(u)}  Step n: {n}')
-        if math.floor(p) % 100 == 0:
-            print(f'p: {p} u: {norm(u)}  Step n: {n}')
+        fold_path.append(0)
+        tangent = new_tangent
+
+        # Step size for the next step, the factor is limited to avoid large oscillations of ds
+        factor = min(np.sqrt(target_newton_iterations / max(len(nb_iterations), 1)), max_angle / max(angle, 1.e-12))
+        ds = min(max(ds * min(max(factor, 0.5), 2.0), ds_min), ds_max)
+
         if p >= p_max:
+            statistics.termination = Termination.P_MAX
             break
-        # Special case where the path starts from 0 and goes toward a bifurcation, then comes back to 0 by the same path
+        # Special case where the path starts from 0 and goes toward a bifurcation, then comes back to 0 by the same path
         if (epsilon is not None) and (p < epsilon):
+            statistics.termination = Termination.EPSILON
             break
+    else:
+        statistics.termination = Termination.MAX_STEPS
+
+    return u_path, p_path, fold_path, statistics
+
+def corrector(F, x0, last_row, Gu, Gp, a_tol, max_it, callback=None, rdiff=None):
+    """Solve the extended system F(x) = 0, whose last equation is linear with coefficients last_row
+    (rdiff is the relative step of the finite differences of the Newton-Krylov, if Gu is not given)"""
+    if Gu is None:
+        return newton_krylov(F, x0, f_tol=a_tol, maxiter=max_it, verbose=False, callback=callback, rdiff=rdiff)
+    M = x0.size - 1
+    x = np.copy(x0)
+    for iteration in range(max_it + 1):
+        f = F(x)
+        # At least one iteration: near a limit point G is flat, thus the predictor may satisfy the tolerance
+        if iteration > 0 and norm(f, np.inf) < a_tol:
+            return x
+        if iteration == max_it:
+            break
+        DF = np.vstack([np.column_stack([Gu(x[0:M], x[M]), Gp(x[0:M], x[M])]), last_row])
+        x = x - solve(DF, f)
+        if callback is not None:
+            callback(x, f)
+    raise NoConvergence(x)
 
-    return u_path, p_path
 
 def computeTangent(u, p, Gu_v, Gp, prev_tau, M, a_tol):
 	DG = LinearOperator((M, M), matvec=lambda v: Gu_v(u, p, v))
@@ -110,6 +168,29 @@ def computeTangent(u, p, Gu_v, Gp, prev_tau, M, a_tol):
 	return tangent
 
 
+def computeFoldPointBisect(G, Gu_v, Gp, x_left, x_right, tangent_left, M, a_tol, max_it, fold_tolerance,
+						   max_bisections=60, Gu=None, rdiff=None):
+	"""Locate the limit point between two points of the curve with a bisection on the sign of the p-component
+	of the tangent. Each middle point is corrected on the curve within the hyperplane orthogonal to the secant"""
+	direction = (x_right - x_left) / norm(x_right - x_left)
+	sign_left = np.sign(tangent_left[M])
+	for _ in range(max_bisections):
+		if norm(x_right - x_left) < fold_tolerance:
+			break
+		x_predicted = 0.5 * (x_left + x_right)
+		F = lambda x: np.append(G(x[0:M], x[M]), np.dot(direction, x - x_predicted))
+		try:
+			x_middle = corrector(F, x_predicted, direction, Gu, Gp, a_tol, max_it, rdiff=rdiff)
+		except Exception:
+			return None
+		tangent_middle = computeTangent(x_middle[0:M], x_middle[M], Gu_v, Gp, tangent_left, M, a_tol)
+		if np.sign(tangent_middle[M]) == sign_left:
+			x_left = x_middle
+		else:
+			x_right = x_middle
+	return 0.5 * (x_left + x_right)
+
+
 def test_fn_bifurcation(dF_w, x, l, r, M, y_prev, eps_reg=1.e-6):
 	def matvec(w):
 		el_1 = dF_w(x, w[0:M+1]) + eps_reg * w[0:M+1] + r*w[M+1]
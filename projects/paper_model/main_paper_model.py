@@ -1,3 +1,10 @@
+import os.path as op
+import time
+from multiprocessing import get_context
+from typing import Callable
+
+from matplotlib import pyplot as plt
+
 from projects.paper_model.section2_data.main_obs_data import plot_data
 from projects.paper_model.section3_method.main_definition_regimes import \
     plot_definition_regimes_with_two_bifurcation_diagrams, plot_definition_two_regimes
@@ -8,22 +15,76 @@ from projects.paper_model.section4_results.subsection2_regime_shift_with_obs.mai
     main_plot_percentage_lower_area
 from projects.paper_model.section_7_appendix.main_more_metrics import main_more_metrics
 from projects.paper_model.section_7_appendix.main_sensitivity_max_forcing import main_plot_sensitivity_max_forcing
+from projects.paper_model.utils_paper_model import get_bifurcation, get_calibrations, sahel_watershed_names
+from utils.utils_instrumentation import InstrumentedFunction, collect_results, get_report, save_report, span
+from utils.utils_log import log_info
+from utils.utils_multiprocessing import NB_CORES
+from utils.utils_path.utils_path import RESULT_PATH
+from utils.utils_plot import VERSION
 
 
-def main_paper_plot(fast, show):
-    # Data and method
+def get_plot_functions() -> list[Callable]:
+    # Data and method
     plot_functions = [plot_data, plot_definition_two_regimes]
-    # Results - section 1
+    # Results - section 1
     plot_functions += [main_plot_trajectory]
-    # Results - section 2
+    # Results - section 2
     plot_functions += [main_delta_p_distribution_2d]
-    # Results - section 3
+    # Results - section 3
     plot_functions += [main_plot_percentage_lower_area]
     # Results - appendix
     plot_functions += [main_plot_sensitivity_max_forcing, main_more_metrics]
-    # Loop to generate all the plots
-    for plot_function in plot_functions:
+    return plot_functions
+
+
+def main_paper_plot(fast, show, parallel=True) -> dict[str, float]:
+    report_at_start = get_report()
+    load_paper_data(fast)
+    figure_name_to_duration = run_figure_jobs(get_plot_functions(), fast, show, parallel)
+    save_report(op.join(RESULT_PATH, VERSION, 'paper_plot_report.json'), since=report_at_start,
+                figure_durations=figure_name_to_duration)
+    return figure_name_to_duration
+
+
+def load_paper_data(fast: bool):
+    """Load the ensembles of the watersheds (calibrations and bifurcation data) in the registries of this process.
+    The figure jobs are run by forked workers, thus they read these registries instead of loading them again.
+    The ensembles that have not been saved are computed here, since the (daemonic) workers cannot start a pool"""
+    with span('paper.load_data'):
+        #  Some figures always use the full ensembles (e.g. the distributions of utils_distribution)
+        for fast_ensemble in sorted({fast, False}):
+            for calibration in get_calibrations(sahel_watershed_names, fast_ensemble):
+                _ = get_bifurcation(calibration).bifurcation_data_list
+
+
+def run_figure_jobs(plot_functions: list[Callable], fast: bool, show: bool, parallel: bool = True) -> dict[str, float]:
+    """Run each plot function, in a pool of forked workers with the Agg backend if parallel
+    (figures are only shown in the main process, thus the jobs are run in sequence if show)
+    :return: the duration (s) of each figure job"""
+    arguments_list = [(plot_function, fast, show) for plot_function in plot_functions]
+    if parallel and not show and NB_CORES > 1 and len(plot_functions) > 1:
+        with get_context('fork').Pool(min(NB_CORES, len(plot_functions)), initializer=use_agg_backend) as p:
+            #  The reports of the workers are merged into the report of the main process
+            durations = collect_results(p.map(InstrumentedFunction(run_figure_job), arguments_list))
+    else:
+        durations = [run_figure_job(arguments) for arguments in arguments_list]
+    figure_name_to_duration = {}
+    for plot_function, duration in zip(plot_functions, durations):
+        figure_name_to_duration[plot_function.__name__] = duration
+        log_info(f'Figure {plot_function.__name__}: {duration:.2f}s')
+    return figure_name_to_duration
+
+
+def use_agg_backend():
+    plt.switch_backend('Agg')
+
+
+def run_figure_job(arguments) -> float:
+    plot_function, fast, show = arguments
+    start = time.perf_counter()
+    with span(f'paper.{plot_function.__name__}'):
         plot_function(fast, show)
+    return time.perf_counter() - start
 
 
 if __name__ == '__main__':
@@ -1,11 +1,9 @@
 import sys
 import time
 
-from bifurcation.bifurcation import Bifurcation
 from calibration.utils_calibration.sampling import Sampling
 from calibration.utils_calibration.solve import SolverMethod
-from projects.paper_model.utils_paper_model import get_calibration, sahel_watershed_names
-from tests.bifurcation.test_stability_ranges import solver_method
+from projects.paper_model.utils_paper_model import get_bifurcation, get_calibration, sahel_watershed_names
 from utils.utils_log import log_info
 
 
@@ -15,7 +13,7 @@ def main(fast, loading_calibration, watershed_name: str, sampling=Sampling.V1, s
                                   sampling=sampling, solver_method=solver_method)
     step2 = time.time()
     print(f'Duration calibration={step2 - step1}s')
-    _ = Bifurcation(calibration).bifurcation_data_list
+    _ = get_bifurcation(calibration).bifurcation_data_list
     step3 = time.time()
     print(f'Duration bifurcation={step3 - step2}s')
 
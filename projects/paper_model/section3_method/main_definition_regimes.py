@@ -1,17 +1,16 @@
 import numpy as np
 from matplotlib import pyplot as plt
 
-from bifurcation.bifurcation import Bifurcation
 from bifurcation.bifurcation_visualisation import _plot_bifurcation_graph, _plot_shift_range, \
     add_bifurcation_labels
-from projects.paper_model.utils_paper_model import get_calibration
+from projects.paper_model.utils_paper_model import get_bifurcation, get_calibration
 from utils.utils_plot import show_or_save_plot, subplots_custom
 
 
 def plot_monostable_bifurcation_diagram(fast=False, show=False):
     watershed_name, limit1, limit2 = 'Nakanbe_Wayen', 1., 4000.
     calibration = get_calibration(watershed_name, fast=fast)
-    bifurcation = Bifurcation(calibration)
+    bifurcation = get_bifurcation(calibration)
     variable_name = 'c'
 
 
@@ -42,7 +41,7 @@ def plot_definition_regimes_with_two_bifurcation_diagrams(fast=False, show=False
         ax = axs[j]
         calibration = get_calibration(watershed_name, fast=fast)
         calibration.show = show
-        bifurcation = Bifurcation(calibration)
+        bifurcation = get_bifurcation(calibration)
         bifurcation_data = bifurcation.ensemble_id_to_bifurcation_data[ensemble_id]
         # Plot part
         forcings = np.arange(limit1, stop=limit2 + 1)
@@ -74,7 +73,7 @@ def plot_definition_two_regimes(fast=False, show=False):
         ax.set_ylim((0, 1))
         calibration = get_calibration(watershed_name, fast=fast)
         calibration.show = show
-        bifurcation = Bifurcation(calibration)
+        bifurcation = get_bifurcation(calibration)
         bifurcation_data = bifurcation.ensemble_id_to_bifurcation_data[ensemble_id]
         # Plot part
         forcings = np.arange(limit1, stop=limit2 + 1)
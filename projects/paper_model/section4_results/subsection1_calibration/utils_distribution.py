@@ -1,7 +1,7 @@
 from bifurcation.bifurcation import Bifurcation
 from bifurcation.shift_range.shift_range import ShiftRange
 from bifurcation.shift_range.shift_range_visualisation import InverseShiftRangeForPlots
-from projects.paper_model.utils_paper_model import sahel_watershed_names, get_calibration
+from projects.paper_model.utils_paper_model import get_bifurcation, sahel_watershed_names, get_calibration
 
 
 def get_watershed_name_to_shift_range_list(fast: bool) -> tuple[dict[str, list[ShiftRange]], dict[str, Bifurcation], dict[str, list[float]]]:
@@ -13,7 +13,7 @@ def get_watershed_name_to_shift_range_list(fast: bool) -> tuple[dict[str, list[S
         calibration = get_calibration(watershed_name, fast=False)
         annual_precipitation_values = [calibration.get_forcings(year)['p'] for year in range(1965, 2015)]
         watershed_name_to_annual_precipitation_values[watershed_name] = annual_precipitation_values
-        bifurcation = Bifurcation(calibration)
+        bifurcation = get_bifurcation(calibration)
         shift_range_list = [bifurcation_data.shift_range for bifurcation_data in
                             bifurcation.ensemble_id_to_bifurcation_data.values()
                             if bifurcation_data.is_bistable]
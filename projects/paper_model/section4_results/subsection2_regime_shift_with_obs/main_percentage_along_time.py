@@ -3,8 +3,7 @@ import numpy as np
 from matplotlib.lines import Line2D
 
 from bifurcation.regime import compute_percentage_regime, Regime, RegimeDef, regime_def_to_name
-from bifurcation.bifurcation import Bifurcation
-from projects.paper_model.utils_paper_model import sahel_watershed_names, \
+from projects.paper_model.utils_paper_model import get_bifurcation, sahel_watershed_names, \
     get_calibration, \
     year_after, years_regime_shift, year_before
 from utils.utils_log import log_info
@@ -24,7 +23,7 @@ def _main_plot_percentage_lower_area(regime_def: RegimeDef, fast=False, show=Fal
         color = watershed_name_to_color[watershed_name]
         label = watershed_name_to_label[watershed_name]
         calibration = get_calibration(watershed_name, fast)
-        bifurcation = Bifurcation(calibration)
+        bifurcation = get_bifurcation(calibration)
         #   Display the number of monostable ensemble_ids
         percentage_monostable_members = 100 * (len(bifurcation.monostable_ensemble_ids) / len(bifurcation.ensemble_ids))
         log_info(f'Percentage of monostable members {percentage_monostable_members}')
@@ -3,8 +3,7 @@ from matplotlib.axes import Axes
 from matplotlib.lines import Line2D
 
 from bifurcation.regime import compute_percentage_regime, Regime, RegimeDef, regime_def_to_name
-from bifurcation.bifurcation import Bifurcation
-from projects.paper_model.utils_paper_model import sahel_watershed_names, \
+from projects.paper_model.utils_paper_model import get_bifurcation, sahel_watershed_names, \
     get_calibration, \
     year_after, years_regime_shift, year_before
 from utils.utils_log import log_info
@@ -14,7 +13,7 @@ from utils.utils_watershed import watershed_name_to_color, watershed_name_to_lab
 
 def main_plot_percentage_lower_area(fast=False, show=False):
     # Load once the bifurcation data
-    watershed_name_to_bifurcation = {watershed_name: Bifurcation(get_calibration(watershed_name, fast))
+    watershed_name_to_bifurcation = {watershed_name: get_bifurcation(get_calibration(watershed_name, fast))
                                      for watershed_name in sahel_watershed_names[:]}
     # Plot percentage of regime side by side
     fig, axs = subplots_custom(1, 2, sharey=False)
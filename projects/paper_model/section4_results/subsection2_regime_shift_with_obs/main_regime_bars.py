@@ -1,8 +1,7 @@
 import numpy as np
 
 from bifurcation.regime import Regime, regime_to_name, compute_regime_counter
-from bifurcation.bifurcation import Bifurcation
-from projects.paper_model.utils_paper_model import sahel_watershed_names, get_calibration
+from projects.paper_model.utils_paper_model import get_bifurcation, sahel_watershed_names, get_calibration
 from utils.utils_plot import show_or_save_plot, subplots_custom
 from utils.utils_watershed import watershed_name_to_color, watershed_name_to_label
 
@@ -19,7 +18,7 @@ def plot_regimes(ax, year, fast=False, vertical=True):
 
     for watershed_name in sahel_watershed_names:
         calibration = get_calibration(watershed_name, fast)
-        bifurcation = Bifurcation(calibration)
+        bifurcation = get_bifurcation(calibration)
         regime_counter = compute_regime_counter(bifurcation, calibration, year)
         percentage_lower_area, percentage_upper_area = [100 * regime_counter[regime] / calibration.ensemble_size
                                                         for regime in [Regime.lower, Regime.upper]]
@@ -1,14 +1,13 @@
 import numpy as np
 
-from bifurcation.bifurcation import Bifurcation
-from projects.paper_model.utils_paper_model import sahel_watershed_names, get_calibration
+from projects.paper_model.utils_paper_model import get_bifurcation, sahel_watershed_names, get_calibration
 from utils.utils_log import log_info
 
 
 def average_rank_monostable_ensemble_members(fast: bool):
     for watershed_name in sahel_watershed_names:
         calibration = get_calibration(watershed_name, fast)
-        bifurcation = Bifurcation(calibration, max_forcing=4000.)
+        bifurcation = get_bifurcation(calibration, max_forcing=4000.)
         if bifurcation.monostable_ensemble_ids:
             print(watershed_name, bifurcation.monostable_ensemble_ids)
             min_rank = np.min(bifurcation.monostable_ensemble_ids) + 1
@@ -1,64 +1,21 @@
 from collections import OrderedDict
 
-import numpy as np
 import pandas as pd
-from sklearn.metrics import mean_squared_error
 
-from calibration.utils_calibration.convert import get_year_from_time
 from projects.paper_model.utils_paper_model import get_calibration, sahel_watershed_names
 from utils.utils_watershed import watershed_name_to_label
 
 
-def get_ensemble_id_to_couples(watershed_name: str, fast):
-    calibration = get_calibration(watershed_name, fast)
-    observation_constraint = calibration.observation_constraint
-    dynamical_model = calibration.dynamical_model
-    constraint_name = observation_constraint.constraint_names[0]
-    years = [get_year_from_time(time) for time in calibration.times]
-    index_to_year = {index: year for index, year in enumerate(years) if year in observation_constraint.year_to_index}
-    ensemble_id_to_couples = {}
-    for ensemble_id in calibration.ensemble_ids:
-        params = calibration.ensemble_id_to_params[ensemble_id]
-        state_vectors = calibration.ensemble_id_to_state_vectors[ensemble_id]
-        assert len(state_vectors) == len(years)
-        couples = []
-        for index, year in index_to_year.items():
-            simulated_value = dynamical_model.get_variable(constraint_name, calibration.get_forcings(year),
-                                                           dynamical_model.create_states(
-                                                               state_vectors[index]), params)
-            observed_value = observation_constraint.get_constraint_value(constraint_name, year)
-            couple = (observed_value, simulated_value)
-            couples.append(couple)
-        ensemble_id_to_couples[ensemble_id] = couples
-    return ensemble_id_to_couples
-
-def compute_metric(couples):
-
-    return
-
-def compute_nse(predictions, targets):
-    return 1 - (np.sum((targets - predictions) ** 2) / np.sum((targets - np.mean(targets)) ** 2))
-
-
-
 def main_more_metrics(fast: bool, show: bool):
     d_watershed = OrderedDict()
     for watershed_name in sahel_watershed_names[:]:
-        metrics_list = []
-        for couples in get_ensemble_id_to_couples(watershed_name, fast).values():
-            observed_values, simulated_values = list(zip(*couples))
-            observed_values, simulated_values = np.array(observed_values), np.array(simulated_values)
-            metrics = [
-                compute_nse(simulated_values, observed_values),
-                mean_squared_error(observed_values, simulated_values),
-                np.mean(simulated_values) - np.mean(observed_values),
-            ]
-            metrics_list.append(metrics)
-        nse, rmse, bias = list(zip(*metrics_list))
+        #  Metrics of all the members, computed at once from the simulated and the observed values
+        df_metrics = get_calibration(watershed_name, fast).get_df_ensemble_metrics()
+        #  The column "RMSE" of the published table reports the mean squared error
         d = {
-            'Bias': bias,
-            'NSE': nse,
-            'RMSE': rmse,
+            'Bias': df_metrics['bias'].values,
+            'NSE': df_metrics['nse'].values,
+            'RMSE': df_metrics['mse'].values,
         }
         df = pd.DataFrame.from_dict(d)
         # df = df.describe().loc[['min', 'mean', 'max']].round(2)
@@ -70,9 +27,6 @@ def main_more_metrics(fast: bool, show: bool):
     print_df_latex(df_all)
 
 
-
-
-
 def print_df_latex(df: pd.DataFrame, index: bool = True):
     column_format = ''.join(['c' for _ in df.columns])
     if index:
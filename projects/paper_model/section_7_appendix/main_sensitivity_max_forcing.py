@@ -1,8 +1,7 @@
 from matplotlib import pyplot as plt
 
-from bifurcation.bifurcation import Bifurcation
-from projects.paper_model.section_7_appendix.utils_compute_is_bistable import compute_percentage_bistable
-from projects.paper_model.utils_paper_model import sahel_watershed_names, get_calibration
+from projects.paper_model.section_7_appendix.utils_compute_is_bistable import compute_percentages_bistable
+from projects.paper_model.utils_paper_model import get_bifurcation, sahel_watershed_names, get_calibration
 from utils.utils_plot import show_or_save_plot
 from utils.utils_watershed import watershed_name_to_color, watershed_name_to_label
 
@@ -13,8 +12,8 @@ def main_plot_sensitivity_max_forcing(fast: bool, show: bool):
     for watershed_name in sahel_watershed_names:
         # Extract data
         calibration = get_calibration(watershed_name, fast)
-        bifurcation = Bifurcation(calibration)
-        percentage_bistable = [compute_percentage_bistable(bifurcation, float(forcing)) for forcing in max_forcing_list]
+        bifurcation = get_bifurcation(calibration)
+        percentage_bistable = compute_percentages_bistable(bifurcation, max_forcing_list)
         # Plot
         color = watershed_name_to_color[watershed_name]
         label = watershed_name_to_label[watershed_name]
@@ -2,11 +2,10 @@ import copy
 
 from matplotlib import pyplot as plt
 
-from bifurcation.bifurcation import Bifurcation
 from bifurcation.bifurcation_data.bifurcation_data import BifurcationData
 from projects.paper_model.section_7_appendix.utils_compute_is_bistable import compute_is_bistable_wrt_to_some_forcing, \
-    compute_percentage_bistable
-from projects.paper_model.utils_paper_model import get_calibration
+    compute_percentages_bistable
+from projects.paper_model.utils_paper_model import get_bifurcation, get_calibration
 from utils.utils_plot import show_or_save_plot
 from utils.utils_watershed import watershed_name_to_color, watershed_name_to_label
 
@@ -36,10 +35,10 @@ def main_sensitivity_monostable_nakanbe(fast: bool, show: bool):
     color = watershed_name_to_color[watershed_name]
     label = watershed_name_to_label[watershed_name]
     calibration = get_calibration(watershed_name, fast)
-    bifurcation = Bifurcation(calibration, max_forcing=4000., ensemble_ids=monostable_ensemble_ids)
+    bifurcation = get_bifurcation(calibration, max_forcing=4000., ensemble_ids=monostable_ensemble_ids)
     print(len(bifurcation.ensemble_id_to_bifurcation_data))
     max_forcing_list = list(range(0, 4000))[::10]
-    percentage_bistable = [compute_percentage_bistable(bifurcation, float(forcing)) for forcing in max_forcing_list]
+    percentage_bistable = compute_percentages_bistable(bifurcation, max_forcing_list)
 
 
     ax.plot(max_forcing_list, percentage_bistable, color=color, label=label)
@@ -5,11 +5,13 @@ from bifurcation.bifurcation_data.bifurcation_data import BifurcationData
 
 
 def compute_percentage_bistable(bifurcation: Bifurcation, forcing: float) -> float:
-    nb_bistable = 0
-    for bifurcation_data in bifurcation.bifurcation_data_list:
-        if compute_is_bistable_wrt_to_some_forcing(bifurcation_data, forcing):
-            nb_bistable += 1
-    return 100 * nb_bistable / len(bifurcation.bifurcation_data_list)
+    return float(compute_percentages_bistable(bifurcation, [forcing])[0])
+
+
+def compute_percentages_bistable(bifurcation: Bifurcation, forcings: list[float]) -> np.ndarray:
+    """Percentage of bistable members when the bistability is checked up to each forcing
+    (i.e. the percentage of members whose lower bound is strictly lower than the forcing)"""
+    return bifurcation.lower_bound_thresholds.compute_percentages_below(forcings)
 
 
 def compute_is_bistable_wrt_to_some_forcing(bifurcation_data: BifurcationData, forcing: float) -> bool:
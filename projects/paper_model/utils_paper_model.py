@@ -1,11 +1,15 @@
+from typing import Optional
+
 from calibration.calibration import Calibration
 from calibration.dynamical_model.one_state.tiphyc_annual import DynamicalModelTipHycAnnual
 from calibration.dynamical_model.one_state.tiphyc_annual_without_s import DynamicalModelTipHycAnnualWithoutS
 from calibration.forcing_function.rain.watershed_rain_forcing_function import RainObsForcingFunction
 from calibration.observation_constraint.runoff.runoff_coefficient_constraint import \
     RunoffCoefficientObservationConstraint
-from calibration.utils_calibration.sampling import Sampling
-from calibration.utils_calibration.solve import SolverMethod
+from calibration.utils_calibration.load_sample import SharedSampling
+from calibration.utils_calibration.sampling import Sampling, sampling_to_str
+from calibration.utils_calibration.solve import SolverMethod, solver_method_to_str
+from utils.utils_registry import Registry
 
 sahel_watershed_names = ['Gorouol_Alcongui', 'Dargol_Kakassi', 'Sirba_GarbeKourou', 'Nakanbe_Wayen']
 
@@ -15,6 +19,10 @@ years_regime_shift = list(range(year_before, year_after + 1))
 
 dynamical_model_type = [DynamicalModelTipHycAnnual, DynamicalModelTipHycAnnualWithoutS][0]
 
+#  Calibrations and bifurcations already loaded in this process (a full regeneration of the paper loads each once)
+calibration_registry = Registry(max_size=16)
+bifurcation_registry = Registry(max_size=16)
+
 
 def get_ylabel(i: int) -> str:
     suffix = 'ensemble member\nin the "High runoff coefficient regime" (%)' if i == 0 else f'regime shift with respect to {year_before} (%)'
@@ -25,13 +33,41 @@ def get_obs_forcing_function(watershed_name: str):
     return RainObsForcingFunction(watershed_name)
 
 
+def get_calibrations(watershed_names: list[str], fast: bool = False, loading: bool = True,
+                     sampling: Sampling = Sampling.V2_INITIAL,
+                     solver_method: SolverMethod = SolverMethod.LSODA) -> list[Calibration]:
+    """Calibrations of several watersheds. The parameters are sampled (and screened) once for all the watersheds
+    whose calibration has not been saved yet"""
+    shared_sampling = SharedSampling()
+    return [get_calibration(watershed_name, fast, loading, sampling, solver_method, shared_sampling)
+            for watershed_name in watershed_names]
+
+
 def get_calibration(watershed_name: str, fast: bool = False, loading: bool = True, 
-                    sampling: Sampling = Sampling.V2_INITIAL, solver_method: SolverMethod = SolverMethod.LSODA) -> Calibration:
+                    sampling: Sampling = Sampling.V2_INITIAL, solver_method: SolverMethod = SolverMethod.LSODA,
+                    shared_sampling: Optional[SharedSampling] = None) -> Calibration:
     ensemble_size, nb_samples = (10, 1000000) if fast else (1000, 1000000)
     observation_constraint = RunoffCoefficientObservationConstraint(watershed_name, 2015)
     forcing_function = get_obs_forcing_function(watershed_name)
     dynamical_model = dynamical_model_type(forcing_function)
-    return Calibration(observation_constraint, forcing_function,
-                       dynamical_model, nb_samples, ensemble_size,
-                       nb_years_for_initial_state=5, loading_calibration=loading,
-                       sampling=sampling, solver_method=solver_method)
+    #  The key contains the attributes of the filename manager of the calibration
+    #  (the initial year for loading only depends on the forcing function and on the observation constraint)
+    key = (dynamical_model.name, observation_constraint.name, forcing_function.name, nb_samples, ensemble_size,
+           sampling_to_str[sampling], solver_method_to_str[solver_method], loading)
+    return calibration_registry.get_or_create(key, lambda: Calibration(observation_constraint, forcing_function,
+                                                                        dynamical_model, nb_samples, ensemble_size,
+                                                                        nb_years_for_initial_state=5,
+                                                                        loading_calibration=loading,
+                                                                        sampling=sampling,
+                                                                        solver_method=solver_method,
+                                                                        shared_sampling=shared_sampling))
+
+
+def get_bifurcation(calibration: Calibration, min_forcing: float = 1., max_forcing: float = 4000.,
+                    ensemble_ids: Optional[list[int]] = None):
+    #  Imported here to avoid a circular import (the continuation loads the calibrations with get_calibration)
+    from bifurcation.bifurcation import Bifurcation
+    #  Creating a bifurcation is cheap, the bifurcation data are loaded only when they are accessed
+    bifurcation = Bifurcation(calibration, min_forcing, max_forcing, ensemble_ids)
+    key = (bifurcation.path_manager.path, bifurcation.filename_manager.filename, tuple(bifurcation.ensemble_ids))
+    return bifurcation_registry.get_or_create(key, lambda: bifurcation)
@@ -0,0 +1,60 @@
+import os.path as op
+
+import numpy as np
+import pandas as pd
+
+from benchmark.benchmark_history import record_result, load_history, MIN_REGRESSION_DURATION
+from benchmark.benchmark_scenarios import BenchmarkContext
+from benchmark.main_benchmark import run_benchmark
+from benchmark.synthetic_watershed import create_synthetic_watershed
+from calibration.forcing_function.rain.watershed_rain_forcing_function import RainObsForcingFunction
+from calibration.observation_constraint.runoff.runoff_coefficient_constraint import \
+    RunoffCoefficientObservationConstraint
+from utils import utils_multiprocessing
+
+
+def test_synthetic_watershed(tmp_path):
+    watershed_name = 'Test_Synthetic'
+    filepath = create_synthetic_watershed(watershed_name, str(tmp_path), initial_year=1960, final_year=1999)
+    df = pd.read_csv(filepath, index_col=0)
+    assert list(df.columns) == ['P', 'Pv', 'Q', 'Ke']
+    assert list(df.index) == list(range(1960, 2000))
+    np.testing.assert_almost_equal((df['Q'] / df['Pv']).values, df['Ke'].values)
+    #  The synthetic watershed is loaded as an observed watershed
+    forcing_function = RainObsForcingFunction(watershed_name)
+    assert forcing_function.years == list(range(1960, 2000))
+    observation_constraint = RunoffCoefficientObservationConstraint(watershed_name)
+    assert observation_constraint.years == list(df.index[df['Ke'].notnull().values])
+
+
+def test_regression(tmp_path):
+    filepath = str(tmp_path / 'history.csv')
+    assert not record_result(filepath, 'scenario', 10, 1.)
+    assert not record_result(filepath, 'scenario', 10, 1.2)
+    assert record_result(filepath, 'scenario', 10, 2.)
+    #  Each number of samples has its own history
+    assert not record_result(filepath, 'scenario', 1000, 2.)
+    #  Short durations are never regressions
+    assert not record_result(filepath, 'other_scenario', 10, MIN_REGRESSION_DURATION / 10)
+    assert not record_result(filepath, 'other_scenario', 10, MIN_REGRESSION_DURATION / 2)
+    assert list(load_history(filepath)['is_regression']) == [False, False, True, False, False, False]
+
+
+def test_run_benchmark(tmp_path):
+    #  The continuation is skipped, as it is too slow for these scales
+    df = run_benchmark(['csv', 'solve_RK45', 'continuation'], scales=(20, 30), path=str(tmp_path))
+    assert list(zip(df['scenario'], df['nb_samples'])) == [('csv', 20), ('csv', 30), ('solve_RK45', 20),
+                                                          ('solve_RK45', 30)]
+    assert len(load_history(str(tmp_path / 'benchmark_history.csv'))) == 4
+
+
+def test_benchmark_calibration(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils_multiprocessing, 'NB_CORES', 1)
+    path = str(tmp_path)
+    calibration = BenchmarkContext(path=path).calibration
+    #  The calibration, its report and its catalog are saved in the benchmark folder
+    path_manager = calibration.path_manager
+    for filepath in [path_manager.filepath_to_save, path_manager.report_filepath,
+                     path_manager.catalog.manifest_filepath]:
+        assert op.isfile(filepath) and filepath.startswith(path)
+    assert BenchmarkContext(path=path).calibration.loading_calibration
@@ -87,3 +87,38 @@ def test_read_write_specific_bug():
     s = bifurcation_data.to_series()
     bifurcation_data2 = BifurcationData.from_series(s, min_forcing, max_forcing)
     assert bifurcation_data == bifurcation_data2
+
+
+def test_failed_continuation(min_forcing, max_forcing):
+    bifurcation_data = BifurcationData.from_failed_continuation(min_forcing, max_forcing)
+    #  The member has no threshold
+    assert not bifurcation_data.is_bistable
+    assert np.isnan(bifurcation_data.stability_ranges[0]).all()
+    s = bifurcation_data.to_series()
+    assert BifurcationData.from_series(s, min_forcing, max_forcing) == bifurcation_data
+
+
+def test_attractor_tensor(monkeypatch, min_forcing, max_forcing):
+    stability_ranges = (301., np.nan), (np.array([0.2]), np.array([np.nan]))
+    forcing_to_attractors = {300.: [np.array([0.1])], 301.: [np.array([0.2]), np.array([0.8])],
+                             302.: [np.array([0.3]), np.array([0.9])]}
+    bifurcation_data = BifurcationData(stability_ranges, 301., min_forcing, max_forcing, forcing_to_attractors)
+    forcings, tensor = bifurcation_data.attractor_tensor
+    assert list(forcings) == [300., 301., 302.]
+    np.testing.assert_almost_equal(tensor[:, :, 0], [[0.1, 0.1], [0.2, 0.8], [0.3, 0.9]])
+    #  Only the forcings which are not stored are solved
+    solved_forcings = []
+
+    def get_attractors(dynamical_model, params, forcing, solver_method):
+        solved_forcings.append(forcing)
+        return [np.array([0.5])]
+
+    monkeypatch.setattr('bifurcation.bifurcation_data.bifurcation_data.get_attractors', get_attractors)
+    tensor = bifurcation_data.get_attractor_tensor(np.array([302., 303., 300.]), None, {}, SolverMethod.RK45)
+    np.testing.assert_almost_equal(tensor[:, :, 0], [[0.3, 0.9], [0.5, 0.5], [0.1, 0.1]])
+    bifurcation_data.get_attractor_tensor(np.array([303., 301.]), None, {}, SolverMethod.RK45)
+    assert solved_forcings == [303.]
+    #  The solved attractors are not saved with the bifurcation data
+    assert 303. not in bifurcation_data.forcing_to_attractors
+    assert bifurcation_data == BifurcationData(stability_ranges, 301., min_forcing, max_forcing,
+                                               forcing_to_attractors)
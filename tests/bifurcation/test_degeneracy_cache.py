@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from bifurcation.bifurcation_data import degeneracy_cache as degeneracy_cache_module
+from bifurcation.bifurcation_data.degeneracy_cache import DegeneracyCache, hash_params_vector_list
+from bifurcation.bifurcation_data.degenerate_functions import compute_is_degenerate, compute_is_degenerate_list
+from calibration.dynamical_model.one_state.tiphyc_annual import DynamicalModelTipHycAnnual
+from calibration.forcing_function.constant_forcing_function import ConstantForcing
+from calibration.utils_calibration.solve import SolverMethod
+from calibration.utils_calibration.utils_sample import get_df_parameters_sampled
+
+
+@pytest.fixture
+def solver_method():
+    return SolverMethod.RK45
+
+
+@pytest.fixture
+def dynamical_model():
+    return DynamicalModelTipHycAnnual(ConstantForcing(nb_years=2, constant_value=500.))
+
+
+def test_hash_params_vector_list():
+    params_vector_list = np.random.default_rng(0).uniform(size=(1000, 12))
+    hashes = hash_params_vector_list(params_vector_list)
+    assert len(np.unique(hashes)) == 1000
+    #  The hash of a vector does not depend on the other vectors
+    assert hash_params_vector_list(params_vector_list[10:11])[0] == hashes[10]
+    params_vector_list[10, 3] = np.nextafter(params_vector_list[10, 3], 1)
+    assert hash_params_vector_list(params_vector_list[10:11])[0] != hashes[10]
+
+
+def test_degeneracy_cache(tmp_path, solver_method):
+    hashes = np.array([7, 3, 11], dtype=np.uint64)
+    cache = DegeneracyCache('model', solver_method, path=str(tmp_path))
+    is_found, _ = cache.lookup(hashes)
+    assert not is_found.any()
+    cache.update(hashes[:2], np.array([True, False]))
+    #  The flags are persistent
+    other_cache = DegeneracyCache('model', solver_method, path=str(tmp_path))
+    is_found, is_degenerate = other_cache.lookup(hashes)
+    assert list(is_found) == [True, True, False]
+    assert list(is_degenerate) == [True, False, False]
+    other_cache.update(hashes[2:], np.array([True]))
+    assert len(other_cache) == 3
+    assert len(DegeneracyCache('model', SolverMethod.LSODA, path=str(tmp_path))) == 0
+
+
+def test_compute_is_degenerate_list(tmp_path, monkeypatch, dynamical_model, solver_method):
+    monkeypatch.setattr(degeneracy_cache_module, '_key_to_degeneracy_cache', {
+        (dynamical_model.name, solver_method): DegeneracyCache(dynamical_model.name, solver_method, path=str(tmp_path))
+    })
+    params_vector_list = get_df_parameters_sampled(dynamical_model, 3).values
+    is_degenerate = compute_is_degenerate_list(dynamical_model, params_vector_list, solver_method, parallel=False)
+    expected_is_degenerate = [compute_is_degenerate(dynamical_model, dynamical_model.get_params(params_vector),
+                                                    solver_method) for params_vector in params_vector_list]
+    assert list(is_degenerate) == expected_is_degenerate
+    #  The cached parameters are not screened again
+    monkeypatch.setattr('bifurcation.bifurcation_data.degenerate_functions.compute_is_degenerate',
+                        lambda *args: pytest.fail('cached parameters screened again'))
+    assert list(compute_is_degenerate_list(dynamical_model, params_vector_list, solver_method,
+                                           parallel=False)) == expected_is_degenerate
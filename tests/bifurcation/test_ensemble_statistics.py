@@ -0,0 +1,40 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from bifurcation.bifurcation_data.bifurcation_data import BifurcationData
+from bifurcation.ensemble_statistics import EnsembleThresholds, get_lower_bound, get_shift_range_forcing_lower_state
+from projects.paper_model.section_7_appendix.utils_compute_is_bistable import compute_is_bistable_wrt_to_some_forcing
+
+
+def get_bifurcation_data(lower_bound: float) -> BifurcationData:
+    stability_ranges = (lower_bound, np.nan), (np.array([0.2]), np.array([np.nan]))
+    if np.isnan(lower_bound):
+        return BifurcationData(stability_ranges, OrderedDict([(1., np.array([0.1]))]), 1., 4000.)
+    forcing_to_attractors = {lower_bound + 1: [np.array([0.2]), np.array([0.8])],
+                             4000.: [np.array([0.3]), np.array([0.9])]}
+    return BifurcationData(stability_ranges, lower_bound, 1., 4000., forcing_to_attractors)
+
+
+def test_fractions_below():
+    lower_bounds = np.random.default_rng(0).choice(np.arange(100., 4000., 10.), 50)
+    lower_bounds[::7] = np.nan
+    bifurcation_data_list = [get_bifurcation_data(float(lower_bound)) for lower_bound in lower_bounds]
+    thresholds = EnsembleThresholds.from_bifurcation_data_list(bifurcation_data_list, get_lower_bound)
+    max_forcings = np.arange(100., 4001., 5.)
+    #  Same percentages as checking the bistability of each member for each maximum forcing
+    expected = [100 * np.mean([compute_is_bistable_wrt_to_some_forcing(bifurcation_data, max_forcing)
+                               for bifurcation_data in bifurcation_data_list]) for max_forcing in max_forcings]
+    np.testing.assert_almost_equal(thresholds.compute_percentages_below(max_forcings), expected)
+    #  The members without threshold are never counted
+    assert thresholds.compute_fractions_below([np.inf])[0] == np.mean(~np.isnan(lower_bounds))
+    np.testing.assert_array_equal(EnsembleThresholds(np.array([1., 2., 2.])).compute_fractions_below([2.], False),
+                                  [1.])
+
+
+def test_shift_range_thresholds():
+    bifurcation_data_list = [get_bifurcation_data(300.), get_bifurcation_data(np.nan)]
+    thresholds = EnsembleThresholds.from_bifurcation_data_list(bifurcation_data_list,
+                                                               get_shift_range_forcing_lower_state)
+    np.testing.assert_array_equal(thresholds.thresholds, [4000., np.nan])
+    np.testing.assert_array_equal(thresholds.compute_fractions_below([3000., 5000.]), [0., 0.5])
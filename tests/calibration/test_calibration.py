@@ -2,12 +2,18 @@ import numpy as np
 import pytest
 from matplotlib import pyplot as plt
 
+from benchmark.synthetic_watershed import create_synthetic_watershed, SYNTHETIC_WATERSHED_NAME
 from calibration.calibration import Calibration
 from calibration.calibration_visualisation import _plot_trajectory_ensemble
 from calibration.dynamical_model.one_state.tiphyc_annual import DynamicalModelTipHycAnnual
 from calibration.forcing_function.rain.watershed_rain_forcing_function import RainObsForcingFunction
 from calibration.observation_constraint.runoff.runoff_coefficient_constraint import \
     RunoffCoefficientObservationConstraint
+from calibration.utils_calibration.checkpoint import CalibrationCheckpoint
+from calibration.utils_calibration.sampling import Sampling
+from calibration.utils_calibration.solve import SolverMethod, RTOL
+from utils import utils_multiprocessing
+from utils.utils_hash import compute_hash
 
 
 @pytest.fixture
@@ -115,3 +121,109 @@ def test_load_calibration_and_apply_other_forcing():
     #  Remove file
     calibration.path_manager.remove_folder()
 #
+
+
+def test_extend_calibration_to_new_observations(watershed_name):
+    forcing_function = RainObsForcingFunction(watershed_name)
+    dynamical_model = DynamicalModelTipHycAnnual(forcing_function)
+    observation_constraint = RunoffCoefficientObservationConstraint(watershed_name)
+    shorter_observation_constraint = RunoffCoefficientObservationConstraint(watershed_name,
+                                                                            final_year=observation_constraint.years[-5])
+    calibration = Calibration(shorter_observation_constraint, forcing_function, dynamical_model,
+                              nb_samples, ensemble_size)
+    extended_calibration = Calibration(observation_constraint, forcing_function, dynamical_model,
+                                       nb_samples, ensemble_size - 1, calibration_to_extend=calibration)
+    #  The updated errors are equal to the errors computed with all the observations
+    for ensemble_id in extended_calibration.ensemble_ids:
+        state_vectors = extended_calibration.ensemble_id_to_state_vectors[ensemble_id]
+        params = extended_calibration.ensemble_id_to_params[ensemble_id]
+        np.testing.assert_almost_equal(extended_calibration.ensemble_id_to_error[ensemble_id],
+                                       extended_calibration.compute_composite_rmse((state_vectors, params)))
+    #  The ensemble is ranked again with the updated errors
+    errors = [extended_calibration.ensemble_id_to_error[ensemble_id] for ensemble_id in extended_calibration.ensemble_ids]
+    assert errors == sorted(errors)
+    #  Remove data
+    calibration.path_manager.remove_folder()
+    extended_calibration.path_manager.remove_folder()
+
+
+def test_extend_calibration_to_new_forcing_years(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils_multiprocessing, 'NB_CORES', 1)
+    create_synthetic_watershed(SYNTHETIC_WATERSHED_NAME, str(tmp_path))
+    #  Same synthetic rainfall, but only up to 2000
+    create_synthetic_watershed('Synthetic_Short', str(tmp_path), final_year=2000)
+    forcing_function = RainObsForcingFunction(SYNTHETIC_WATERSHED_NAME)
+    shorter_forcing_function = RainObsForcingFunction('Synthetic_Short')
+    assert shorter_forcing_function.year_to_forcing.items() <= forcing_function.year_to_forcing.items()
+    observation_constraint = RunoffCoefficientObservationConstraint(SYNTHETIC_WATERSHED_NAME)
+    dynamical_model = DynamicalModelTipHycAnnual(forcing_function)
+    #  The trajectories are solved year by year, thus solving from a stored state matches a full solve
+    #  (up to the tolerance of the solver)
+    kwargs = dict(sampling=Sampling.V2_INITIAL, solver_method=SolverMethod.SEGMENT_LSODA, data_path=str(tmp_path))
+    calibration = Calibration(observation_constraint, shorter_forcing_function,
+                              DynamicalModelTipHycAnnual(shorter_forcing_function), 8, 8, **kwargs)
+    extended_calibration = Calibration(observation_constraint, forcing_function, dynamical_model, 8, 4,
+                                       calibration_to_extend=calibration, **kwargs)
+    full_calibration = Calibration(observation_constraint, forcing_function, dynamical_model, 8, 8, **kwargs)
+    #  The extended calibration is saved separately from the full calibration
+    assert extended_calibration.path_manager.filepath_to_save != full_calibration.path_manager.filepath_to_save
+    assert extended_calibration.sampling_str == full_calibration.sampling_str + 'x'
+    #  The trajectories solved from the last stored state, and the updated errors, match the full solve
+    assert len(extended_calibration.times) > len(calibration.times)
+    hash_to_full_ensemble_id = {compute_hash(full_calibration.ensemble_id_to_params[ensemble_id]): ensemble_id
+                                for ensemble_id in full_calibration.ensemble_ids}
+    for ensemble_id in extended_calibration.ensemble_ids:
+        params = extended_calibration.ensemble_id_to_params[ensemble_id]
+        full_ensemble_id = hash_to_full_ensemble_id[compute_hash(params)]
+        np.testing.assert_allclose(extended_calibration.ensemble_id_to_state_vectors[ensemble_id],
+                                   full_calibration.ensemble_id_to_state_vectors[full_ensemble_id], rtol=RTOL)
+        np.testing.assert_allclose(extended_calibration.ensemble_id_to_error[ensemble_id],
+                                   full_calibration.ensemble_id_to_error[full_ensemble_id], rtol=RTOL)
+    #  The extended ensemble contains the best members of the full calibration
+    assert extended_calibration.ensemble_ids == full_calibration.ensemble_ids[:4]
+
+
+class Interruption(Exception):
+    pass
+
+
+def test_resume_calibration_with_nan_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils_multiprocessing, 'NB_CORES', 1)
+    create_synthetic_watershed(SYNTHETIC_WATERSHED_NAME, str(tmp_path))
+    forcing_function = RainObsForcingFunction(SYNTHETIC_WATERSHED_NAME)
+    observation_constraint = RunoffCoefficientObservationConstraint(SYNTHETIC_WATERSHED_NAME)
+    dynamical_model = DynamicalModelTipHycAnnual(forcing_function)
+    #  The error of most samples is nan (e.g. after a failure of the solver), thus the ensemble contains nan errors
+    compute_sum_of_squared_errors = Calibration.compute_sum_of_squared_errors
+
+    def compute_sum_of_squared_errors_with_failures(self, state_vectors, params, observations):
+        if int(compute_hash(params)[:8], 16) % 3 != 0:
+            return np.nan, len(observations)
+        return compute_sum_of_squared_errors(self, state_vectors, params, observations)
+
+    monkeypatch.setattr(Calibration, 'compute_sum_of_squared_errors', compute_sum_of_squared_errors_with_failures)
+
+    def create_calibration(name, checkpoint_chunk_size=None):
+        return Calibration(observation_constraint, forcing_function, dynamical_model, 12, 6,
+                           sampling=Sampling.V2_INITIAL, checkpoint_chunk_size=checkpoint_chunk_size,
+                           data_path=str(tmp_path / name))
+
+    calibration = create_calibration('uninterrupted')
+    errors = np.array(calibration.solve_data[2])
+    #  The nan errors are ranked last
+    assert np.isnan(errors[-1]) and not np.isnan(errors[0])
+    #  Interruption after the first chunk, then the calibration resumes from the checkpoint
+    save_chunk = CalibrationCheckpoint.save_chunk
+
+    def save_chunk_then_interrupt(self, chunk_id, *args):
+        save_chunk(self, chunk_id, *args)
+        raise Interruption
+
+    monkeypatch.setattr(CalibrationCheckpoint, 'save_chunk', save_chunk_then_interrupt)
+    with pytest.raises(Interruption):
+        create_calibration('resumed', checkpoint_chunk_size=4)
+    monkeypatch.setattr(CalibrationCheckpoint, 'save_chunk', save_chunk)
+    resumed_calibration = create_calibration('resumed', checkpoint_chunk_size=4)
+    assert [compute_hash(params) for params in resumed_calibration.solve_data[0]] \
+           == [compute_hash(params) for params in calibration.solve_data[0]]
+    np.testing.assert_array_equal(resumed_calibration.solve_data[2], calibration.solve_data[2])
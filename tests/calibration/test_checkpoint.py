@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from calibration.utils_calibration.checkpoint import CalibrationCheckpoint, get_ensemble_sample_ids
+
+
+def test_ensemble_sample_ids():
+    errors = [0.3, 0.1, 0.2, 0.1, 0.5]
+    #  Equal errors are ordered by sample id, as in the sort of the calibration
+    assert list(get_ensemble_sample_ids(np.arange(5), errors, 3)) == [1, 3, 2]
+    assert list(get_ensemble_sample_ids([3, 1, 0], [0.1, 0.1, 0.3], 2)) == [1, 3]
+
+
+@pytest.fixture
+def errors():
+    return np.random.default_rng(0).uniform(size=23)
+
+
+def run_chunks(checkpoint: CalibrationCheckpoint, errors, ensemble_size, max_nb_chunks=None):
+    completed_chunk_ids = set(checkpoint.completed_chunk_ids)
+    chunk_ids = [chunk_id for chunk_id in range(checkpoint.nb_chunks) if chunk_id not in completed_chunk_ids]
+    for chunk_id in chunk_ids[:max_nb_chunks]:
+        sample_ids = checkpoint.get_chunk_sample_ids(chunk_id)
+        kept_indices = get_ensemble_sample_ids(np.arange(len(sample_ids)), errors[sample_ids], ensemble_size)
+        state_vectors = np.stack([np.full((2, 1), sample_id) for sample_id in sample_ids[kept_indices]])
+        checkpoint.save_chunk(chunk_id, sample_ids[kept_indices], state_vectors, errors[sample_ids][kept_indices])
+
+
+def test_resume_from_checkpoint(tmp_path, errors):
+    nb_samples, ensemble_size = len(errors), 4
+    checkpoint = CalibrationCheckpoint(str(tmp_path / 'calibration'), nb_samples, chunk_size=5)
+    assert checkpoint.nb_chunks == 5
+    assert checkpoint.load_params_vector_list() is None
+    params_vector_list = np.arange(2 * nb_samples, dtype=float).reshape(nb_samples, 2)
+    checkpoint.save_params_vector_list(params_vector_list)
+    #  Interruption after two chunks
+    run_chunks(checkpoint, errors, ensemble_size, max_nb_chunks=2)
+    checkpoint = CalibrationCheckpoint(checkpoint.folder, nb_samples, chunk_size=5)
+    assert checkpoint.completed_chunk_ids == [0, 1]
+    assert np.array_equal(checkpoint.load_params_vector_list(), params_vector_list)
+    run_chunks(checkpoint, errors, ensemble_size)
+    assert checkpoint.completed_chunk_ids == list(range(5))
+    assert list(checkpoint.get_chunk_sample_ids(4)) == [20, 21, 22]
+    #  The merged chunks select the same ensemble as an uninterrupted calibration
+    sample_ids, state_vectors, chunk_errors = zip(*[checkpoint.load_chunk(chunk_id) for chunk_id in range(5)])
+    sample_ids, state_vectors = np.concatenate(sample_ids), np.concatenate(state_vectors)
+    ensemble_sample_ids = get_ensemble_sample_ids(sample_ids, np.concatenate(chunk_errors), ensemble_size)
+    assert np.array_equal(ensemble_sample_ids, np.argsort(errors)[:ensemble_size])
+    assert all([state_vectors[list(sample_ids).index(i)][0, 0] == i for i in ensemble_sample_ids])
+    #  Checkpoints computed with another chunk size are discarded
+    checkpoint = CalibrationCheckpoint(checkpoint.folder, nb_samples, chunk_size=10)
+    assert checkpoint.completed_chunk_ids == []
+    assert checkpoint.load_params_vector_list() is None
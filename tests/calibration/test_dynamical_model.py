@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from matplotlib import pyplot as plt
 
@@ -60,6 +61,21 @@ def test_get_variable(forcing_function, forcings):
             dynamical_model.get_variable(variable_name, forcings, state, params)
 
 
+def test_get_variables(forcing_function):
+    forcing_values = np.array([300., 500., 700.])
+    for model_type in [DynamicalModelWendling2019, DynamicalModelTipHycAnnual]:
+        dynamical_model = model_type(forcing_function)
+        params = get_params(dynamical_model)
+        state_vectors = np.linspace(dynamical_model.extremal_initial_states[0],
+                                    dynamical_model.extremal_initial_states[1], num=len(forcing_values))
+        for variable_name in ['Ke', dynamical_model.state_names[0]]:
+            variables = dynamical_model.get_variables(variable_name, forcing_values, state_vectors, params)
+            expected_variables = [dynamical_model.get_variable(variable_name, {RAIN_STR: forcing_value},
+                                                               dynamical_model.create_states(state_vector), params)
+                                  for forcing_value, state_vector in zip(forcing_values, state_vectors)]
+            np.testing.assert_almost_equal(variables, expected_variables)
+
+
 def test_get_state_wendling_2022(forcing_function, forcings):
     dynamical_model = DynamicalModelTipHycAnnual(forcing_function)
     params = get_params(dynamical_model)
@@ -0,0 +1,39 @@
+import numpy as np
+
+from calibration.utils_calibration.checkpoint import get_ensemble_sample_ids
+from calibration.utils_calibration.emulation import Emulator, get_nb_training_samples
+
+
+def compute_error(params_vector_list):
+    return np.sqrt(np.sum((params_vector_list - 0.3) ** 2, axis=1))
+
+
+def test_emulator_keeps_the_best_samples(tmp_path):
+    nb_samples, ensemble_size = 5000, 20
+    params_vector_list = np.random.default_rng(0).uniform(size=(nb_samples, 4))
+    errors = compute_error(params_vector_list)
+    nb_training_samples = get_nb_training_samples(nb_samples, ensemble_size)
+    assert nb_training_samples == 500
+    emulator = Emulator.from_training_samples(params_vector_list[:nb_training_samples],
+                                              errors[:nb_training_samples], ensemble_size)
+    is_promising = emulator.is_promising(params_vector_list[nb_training_samples:])
+    #  Most of the remaining samples are not solved
+    assert is_promising.mean() < 0.5
+    #  The ensemble selected among the solved samples is the ensemble selected among all the samples
+    solved_sample_ids = np.concatenate([np.arange(nb_training_samples),
+                                        nb_training_samples + np.nonzero(is_promising)[0]])
+    assert set(get_ensemble_sample_ids(solved_sample_ids, errors[solved_sample_ids], ensemble_size)) == \
+           set(get_ensemble_sample_ids(np.arange(nb_samples), errors, ensemble_size))
+    #  The emulator is saved
+    emulator.save(str(tmp_path))
+    loaded_emulator = Emulator.load(str(tmp_path))
+    np.testing.assert_array_equal(loaded_emulator.predict(params_vector_list[:10]), emulator.predict(params_vector_list[:10]))
+
+
+def test_emulator_with_unsolved_samples():
+    params_vector_list = np.random.default_rng(1).uniform(size=(200, 3))
+    errors = compute_error(params_vector_list)
+    errors[::10] = np.nan
+    emulator = Emulator.from_training_samples(params_vector_list, errors, ensemble_size=10)
+    assert emulator.error_threshold == np.sort(errors[~np.isnan(errors)])[9]
+    assert emulator.safety_margin >= 0
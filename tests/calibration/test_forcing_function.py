@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from calibration.forcing_function.aggregated_forcing_function import \
@@ -6,7 +7,9 @@ from calibration.forcing_function.concatenated_forcing_function import Concatena
 from calibration.forcing_function.constant_forcing_function import ConstantForcing
 from calibration.forcing_function.rain.hombori_rain_forcing_function import \
     HomboriRainForcingFunction
+from calibration.forcing_function.rain.rain_forcing_function import RainForcingFunction, RAIN_STR
 from calibration.forcing_function.rain.watershed_rain_forcing_function import RainObsForcingFunction
+from utils.utils_run import CustomizedValueError
 from utils.utils_watershed import watershed_name_to_prefix
 
 
@@ -45,3 +48,32 @@ def test_aggregate_forcing_function():
     any_forcing_function = HomboriRainForcingFunction()
     for aggregate_forcing_function_type in aggregate_forcing_function_types:
         aggregate_forcing_function_type([any_forcing_function, any_forcing_function])
+
+
+class GapRainForcingFunction(RainForcingFunction):
+
+    @property
+    def name(self) -> str:
+        return 'gap'
+
+
+def test_forcing_lookup():
+    forcing_function = GapRainForcingFunction([1955, 1956, 1958], [np.array([1.0]), np.array([2.0]), np.array([4.0])])
+    #  The forcing of a year is valid between time=year+0.000001 and time=year+1
+    assert forcing_function.get_forcings(1956.0)[RAIN_STR] == 1.0
+    assert forcing_function.get_forcings(1956.5)[RAIN_STR] == 2.0
+    assert forcing_function.get_forcings_for_year(1958)[RAIN_STR] == 4.0
+    times = [1956.0, 1956.5, 1957.0, 1959.0]
+    assert np.array_equal(forcing_function.get_forcings_at(times), np.array([[1.0], [2.0], [2.0], [4.0]]))
+    assert [f[RAIN_STR] for f in forcing_function.get_forcings_list(times)] == [1.0, 2.0, 2.0, 4.0]
+    #  Missing years raise a KeyError, years beyond the range raise a CustomizedValueError
+    with pytest.raises(KeyError):
+        forcing_function.get_forcings(1958.0)
+    with pytest.raises(KeyError):
+        forcing_function.get_forcings_at([1956.0, 1958.0])
+    with pytest.raises(CustomizedValueError):
+        forcing_function.get_forcings(1960.0)
+    with pytest.raises(CustomizedValueError):
+        forcing_function.get_forcings_list([1955.0])
+    #  The ivt solver gets the last forcing beyond the final year
+    assert forcing_function.get_forcings_for_ivt_solver(1961.0)[RAIN_STR] == 4.0
@@ -0,0 +1,44 @@
+import numpy as np
+from sklearn.metrics import mean_squared_error
+
+from calibration.utils_calibration.metrics import compute_metrics, compute_bootstrap_intervals, get_df_metrics, \
+    METRIC_NAMES
+from utils.utils_random import get_generator
+
+
+def get_simulated_and_observed(nb_members=5, nb_times=30):
+    generator = get_generator(0)
+    observed = generator.normal(size=nb_times)
+    simulated = observed + generator.normal(scale=0.5, size=(nb_members, nb_times)) + np.arange(nb_members)[:, None]
+    #  The times without observation can have any observed value
+    mask = generator.random(nb_times) > 0.3
+    observed[~mask] = np.nan
+    return simulated, observed, mask
+
+
+def test_metrics():
+    simulated, observed, mask = get_simulated_and_observed()
+    metrics = compute_metrics(simulated, observed, mask)
+    assert metrics.shape == (len(simulated), len(METRIC_NAMES))
+    #  Comparison with the metrics computed member by member
+    targets = observed[mask]
+    for predictions, member_metrics in zip(simulated[:, mask], metrics):
+        nse = 1 - np.sum((targets - predictions) ** 2) / np.sum((targets - np.mean(targets)) ** 2)
+        mse = mean_squared_error(targets, predictions)
+        bias = np.mean(predictions) - np.mean(targets)
+        np.testing.assert_allclose(member_metrics, [nse, mse, np.sqrt(mse), bias])
+
+
+def test_bootstrap_intervals():
+    simulated, observed, mask = get_simulated_and_observed()
+    lower, upper = compute_bootstrap_intervals(simulated, observed, mask, nb_bootstrap_samples=200)
+    metrics = compute_metrics(simulated, observed, mask)
+    assert np.all(lower <= metrics) and np.all(metrics <= upper)
+    #  The resamplings are drawn from the metrics stream, thus the intervals are reproducible
+    np.testing.assert_array_equal(compute_bootstrap_intervals(simulated, observed, mask, nb_bootstrap_samples=200),
+                                  [lower, upper])
+    df = get_df_metrics(simulated, observed, mask, list(range(len(simulated))), bootstrap=True)
+    assert list(df.columns) == METRIC_NAMES + [f'{name}_{bound}' for bound in ['lower', 'upper']
+                                               for name in METRIC_NAMES]
+    lower, upper = compute_bootstrap_intervals(simulated, observed, mask)
+    np.testing.assert_array_equal(df[[f'{name}_lower' for name in METRIC_NAMES]].values, lower)
@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from calibration.observation_constraint import observation_constraint_utils
+from calibration.observation_constraint.observation_constraint_utils import load_series, load_table
+
+
+@pytest.fixture
+def filepath(tmp_path):
+    filepath = str(tmp_path / 'Test_Rainfall_Runoff.csv')
+    df = pd.DataFrame({'P': [500.0, 600.0, np.nan], 'Q': [1.0, 2.0, 3.0]},
+                      index=pd.Index([1990, 1991, 1992], name='year'))
+    df.to_csv(filepath)
+    return filepath
+
+
+def test_load_table_is_cached(filepath):
+    df = load_table(filepath)
+    assert load_table(filepath) is df
+    #  Series are loaded from the cached table
+    s = load_series(0, filepath)
+    assert list(s.index) == [1990, 1991]
+    assert list(s.values) == [500.0, 600.0]
+    #  A modification of the file invalidates the cache
+    pd.DataFrame({'P': [700.0], 'Q': [4.0]}, index=pd.Index([1993], name='year')).to_csv(filepath)
+    os.utime(filepath, ns=(0, os.stat(filepath).st_mtime_ns + 10 ** 9))
+    assert list(load_series(0, filepath).values) == [700.0]
+
+
+def test_load_table_from_snapshot(filepath, tmp_path, monkeypatch):
+    monkeypatch.setattr(observation_constraint_utils, 'OBSERVATION_SNAPSHOT_PATH', str(tmp_path / 'snapshot'))
+    df = load_table(filepath, snapshot=True)
+    assert os.path.exists(observation_constraint_utils.get_observation_snapshot_filepath(filepath))
+    #  Clear the in-memory cache, then the table is loaded from the snapshot (without parsing the csv file)
+    observation_constraint_utils._filepath_to_mtime_and_table.clear()
+    monkeypatch.setattr(pd, 'read_csv', None)
+    df_from_snapshot = load_table(filepath, snapshot=True)
+    assert df_from_snapshot is not df
+    pd.testing.assert_frame_equal(df_from_snapshot, df)
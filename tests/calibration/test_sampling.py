@@ -8,9 +8,15 @@ from calibration.dynamical_model.two_states.wendling_2019 import DynamicalModelW
 from calibration.forcing_function.rain.watershed_rain_forcing_function import RainObsForcingFunction
 from calibration.observation_constraint.runoff.runoff_coefficient_constraint import RunoffCoefficientObservationConstraint
 from bifurcation.bifurcation_data.degenerate_functions import compute_is_degenerate
+from calibration.forcing_function.constant_forcing_function import ConstantForcing
+from calibration.utils_calibration.load_sample import SharedSampling
+from calibration.utils_calibration.load_sample_smc import load_params_vector_list_smc
 from calibration.utils_calibration.load_sample_v1 import load_sample_parameters
+from calibration.utils_calibration.load_sample_v2 import load_params_vector_list_sample_v2
+from calibration.utils_calibration.sampling import Sampling
 from calibration.utils_calibration.convert import get_time_from_year
 from calibration.utils_calibration.solve import SolverMethod
+from calibration.utils_calibration.utils_sample import get_df_parameters_sampled
 
 
 def test_random_seed_for_sampling():
@@ -56,3 +62,41 @@ def test_initial_state_for_tiphyc_annual(solver_method: SolverMethod):
         if is_degenerate:
             count += 1
     assert count == 0
+
+
+def test_shared_sampling():
+    shared_sampling = SharedSampling()
+    for watershed_name in ['Dargol_Kakassi', 'Nakanbe_Wayen']:
+        forcing_function = RainObsForcingFunction(watershed_name)
+        observation_constraint = RunoffCoefficientObservationConstraint(watershed_name)
+        dynamical_model = DynamicalModelTipHycAnnual(forcing_function)
+        initial_year = min(set(forcing_function.years).intersection(set(observation_constraint.years)))
+        initial_forcings = forcing_function.get_forcings(get_time_from_year(initial_year))
+        arguments = (dynamical_model, 10, initial_year, initial_forcings, observation_constraint, Sampling.V2_INITIAL)
+        #  The shared sampling selects the same parameters as the sampling of each watershed
+        np.testing.assert_array_equal(shared_sampling.load_params_vector_list(*arguments),
+                                      load_params_vector_list_sample_v2(*arguments))
+    #  The parameters have been sampled only once
+    assert len(shared_sampling._key_to_df_parameters) == 1
+
+
+def test_adaptive_sampling(monkeypatch):
+    monkeypatch.setattr('calibration.utils_calibration.load_sample_smc.condition', lambda *args: True)
+    dynamical_model = DynamicalModelTipHycAnnual(ConstantForcing(nb_years=2, constant_value=500.))
+    lower_bounds, upper_bounds = np.array(list(dynamical_model.parameter_name_to_range.values())).T
+    range_indices = [dynamical_model.parameter_names.index(parameter_name)
+                     for parameter_name in dynamical_model.parameter_name_to_range]
+    target = lower_bounds + 0.3 * (upper_bounds - lower_bounds)
+
+    def error_function(params_vector_list):
+        return np.linalg.norm((params_vector_list[:, range_indices] - target) / (upper_bounds - lower_bounds), axis=1)
+
+    nb_samples, ensemble_size = 2000, 20
+    params_vector_list = load_params_vector_list_smc(dynamical_model, nb_samples, error_function=error_function)
+    assert params_vector_list.shape == (nb_samples, len(dynamical_model.parameter_names))
+    assert ((lower_bounds <= params_vector_list[:, range_indices])
+            & (params_vector_list[:, range_indices] <= upper_bounds)).all()
+    #  With the same number of evaluations, the ensemble is better than with a LatinHypercube
+    errors = np.sort(error_function(params_vector_list))[:ensemble_size]
+    latin_hypercube_errors = np.sort(error_function(get_df_parameters_sampled(dynamical_model, nb_samples).values))
+    assert errors.max() < latin_hypercube_errors[:ensemble_size].min()
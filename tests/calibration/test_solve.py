@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from calibration.dynamical_model.one_state.tiphyc_annual import DynamicalModelTipHycAnnual
+from calibration.dynamical_model.one_state.tiphyc_annual_without_s import DynamicalModelTipHycAnnualWithoutS
+from calibration.dynamical_model.two_states.wendling_2019 import DynamicalModelWendling2019
+from calibration.forcing_function.rain.rain_forcing_function import RainForcingFunction, RAIN_STR
+from calibration.utils_calibration.convert import load_times
+from calibration.utils_calibration.solve import SolverIvp, SolverMethod, solver_budget_exceeded_message
+from calibration.utils_calibration.solver_statistics import get_df_solver_statistics, \
+    get_solver_statistics_histograms
+
+
+class RandomRainForcingFunction(RainForcingFunction):
+
+    @property
+    def name(self) -> str:
+        return 'random'
+
+
+@pytest.fixture
+def dynamical_model():
+    years = list(range(1950, 2020))
+    rain_values = np.random.default_rng(0).uniform(300, 1200, len(years))
+    return DynamicalModelTipHycAnnual(RandomRainForcingFunction(years, [np.array([v]) for v in rain_values]))
+
+
+@pytest.fixture
+def params():
+    return {'c_croiss': 0.39, 'i_croiss': 377.9, 'c_max': 1.0, 'c_mort': 0.95, 'i_mort': 132.3, 'mu_c': 0.0039,
+            'p_ini': 87.9, 'p_0max': 684.0, 'a': 1.5, 'b': 8.0, 'skc': 3.1, 'Ke_max': 0.9}
+
+
+def get_finite_difference_jacobian(dynamical_model, state_vector, forcings, params, eps=1e-6):
+    columns = []
+    for e in np.eye(len(state_vector)):
+        derivatives = [np.array(dynamical_model.derivative(dynamical_model.create_states(state_vector + sign * eps * e),
+                                                           forcings, params), dtype=float)
+                       for sign in [1, -1]]
+        columns.append((derivatives[0] - derivatives[1]) / (2 * eps))
+    return np.array(columns).reshape(len(state_vector), len(state_vector)).T
+
+
+def test_jacobian(dynamical_model, params):
+    assert dynamical_model.has_jacobian
+    for c in [0.01, 0.3, 0.7, 0.99]:
+        for rain in [300., 800., 1500.]:
+            forcings = {RAIN_STR: rain}
+            jacobian = dynamical_model.jacobian(dynamical_model.create_states([c]), forcings, params)
+            np.testing.assert_allclose(jacobian, get_finite_difference_jacobian(dynamical_model, np.array([c]),
+                                                                                forcings, params), atol=1e-8)
+    #  c is cast in [0, 1]
+    assert dynamical_model.jacobian(dynamical_model.create_states([1.2]), {RAIN_STR: 800.}, params)[0, 0] == 0
+    wendling_model = DynamicalModelWendling2019(dynamical_model.forcing_function)
+    wendling_params = {'r_g': 0.8, 'r_r': 0.5, 'r_d': 0.7, 'i_g': 300., 'i_d': 150., 'mu': 5e-4, 'alpha_p': 1e-3,
+                       'alpha_r': 1e-2, 'ke_b': 0.5, 'l': 150.}
+    for state_vector in [[0.3, 0.4], [0.1, 0.8], [0.6, 0.05]]:
+        forcings = {RAIN_STR: 600.}
+        jacobian = wendling_model.jacobian(wendling_model.create_states(state_vector), forcings, wendling_params)
+        np.testing.assert_allclose(jacobian, get_finite_difference_jacobian(wendling_model, np.array(state_vector),
+                                                                            forcings, wendling_params), atol=1e-8)
+
+
+def test_stiff_solvers_with_jacobian(dynamical_model, params):
+    #  Same derivative, but without analytic jacobian: the stiff solvers rely on finite differences
+    finite_difference_model = DynamicalModelTipHycAnnualWithoutS(dynamical_model.forcing_function)
+    assert not finite_difference_model.has_jacobian
+    times = load_times(1951, 2018)
+    for solver_method in [SolverMethod.LSODA, SolverMethod.BDF, SolverMethod.RADAU, SolverMethod.SEGMENT_LSODA]:
+        res, statistics = SolverIvp.solve_with_statistics(dynamical_model, np.array([0.3]), times, params,
+                                                          solver_method)
+        finite_difference_res = SolverIvp.solve(finite_difference_model, np.array([0.3]), times, params,
+                                                solver_method)
+        assert np.abs(res - finite_difference_res).max() < 1e-2
+        #  LSODA only evaluates the jacobian once it switches to its stiff method
+        if solver_method in [SolverMethod.BDF, SolverMethod.RADAU]:
+            assert statistics.njev > 0
+
+
+def test_solve_by_segment(dynamical_model, params):
+    times = load_times(1951, 2018)
+    initial_state = np.array([0.3])
+    #  Reference solution: accurate integration of each year with its constant forcing
+    reference = [initial_state]
+    for t0, t_bound in zip(times[:-1], times[1:]):
+        forcings = dynamical_model.forcing_function.get_forcings(t_bound)
+        ode_result = solve_ivp(lambda t, y: dynamical_model.derivative(dynamical_model.create_states(y),
+                                                                       forcings, params),
+                               (t0, t_bound), reference[-1], rtol=1e-12, atol=1e-12)
+        reference.append(ode_result.y[:, -1])
+    reference = np.array(reference)
+    for solver_method in [SolverMethod.SEGMENT_RK45, SolverMethod.SEGMENT_LSODA]:
+        res = SolverIvp.solve(dynamical_model, initial_state, times, params, solver_method)
+        assert res.shape == reference.shape
+        assert np.abs(res - reference).max() < 1e-2
+    res = SolverIvp.solve(dynamical_model, initial_state, times, params, SolverMethod.SEGMENT_RK45)
+    assert np.abs(res - reference).max() < 1e-6
+
+
+def test_solve_by_segment_with_sub_annual_times(dynamical_model, params):
+    times = load_times(1951, 2018, 0.1)
+    res = SolverIvp.solve(dynamical_model, np.array([0.3]), times, params, SolverMethod.SEGMENT_RK45)
+    annual_res = SolverIvp.solve(dynamical_model, np.array([0.3]), load_times(1951, 2018), params,
+                                 SolverMethod.SEGMENT_RK45)
+    assert res.shape == (len(times), 1)
+    assert np.allclose(res[::10], annual_res)
+
+
+def test_solver_statistics(dynamical_model, params):
+    times = load_times(1951, 2018)
+    for solver_method in SolverMethod:
+        res, statistics = SolverIvp.solve_with_statistics(dynamical_model, np.array([0.3]), times, params,
+                                                          solver_method)
+        np.testing.assert_array_equal(res, SolverIvp.solve(dynamical_model, np.array([0.3]), times, params,
+                                                           solver_method))
+        assert statistics.nfev > statistics.nb_steps > 0
+        assert statistics.failure == '' and statistics.nb_retries == 0
+        #  A trajectory that exceeds its budget is solved again with cheaper settings
+        budget_res, budget_statistics = SolverIvp.solve_with_statistics(dynamical_model, np.array([0.3]), times,
+                                                                        params, solver_method, max_nfev=400)
+        assert budget_statistics.nb_retries == int(statistics.nfev > 400)
+        assert budget_statistics.failure == ''
+        assert np.abs(budget_res - res).max() < 0.2
+        #  The trajectory fails if it exceeds the budget with the cheaper settings
+        failed_res, failed_statistics = SolverIvp.solve_with_statistics(dynamical_model, np.array([0.3]), times,
+                                                                        params, solver_method, max_nfev=50)
+        assert np.isnan(failed_res).all()
+        assert failed_statistics.failure == solver_budget_exceeded_message
+        assert failed_statistics.nb_retries == 1
+
+
+def test_solver_statistics_histograms(dynamical_model, params):
+    times = load_times(1951, 2018)
+    statistics_list = [SolverIvp.solve_with_statistics(dynamical_model, np.array([0.3]), times, params,
+                                                       SolverMethod.RK45, max_nfev)[1] for max_nfev in [None, 50]]
+    params_vector = dynamical_model.get_params_vector(params)
+    df = get_df_solver_statistics(np.array([3, 7]), [params_vector, params_vector], dynamical_model.parameter_names,
+                                  statistics_list)
+    assert list(df.index) == [3, 7]
+    assert list(df['nfev']) == [statistics.nfev for statistics in statistics_list]
+    histograms = get_solver_statistics_histograms(df)
+    assert histograms['nb_samples'] == 2 and histograms['nb_retries'] == 1
+    assert sum(histograms['nfev']['counts']) == 2
+    assert histograms['failures'] == {solver_budget_exceeded_message: 1}
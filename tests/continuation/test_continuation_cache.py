@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from calibration.dynamical_model.one_state.tiphyc_annual import DynamicalModelTipHycAnnual
+from calibration.forcing_function.constant_forcing_function import ConstantForcing
+from continuation.continuation_cache import ContinuationCache
+from continuation.get_continuation import get_continuation_key
+
+
+@pytest.fixture
+def dynamical_model():
+    return DynamicalModelTipHycAnnual(ConstantForcing(nb_years=2, constant_value=500.0))
+
+
+@pytest.fixture
+def params():
+    return {'c_croiss': 0.39, 'i_croiss': 377.9, 'c_max': 1.0, 'c_mort': 0.95, 'i_mort': 132.3, 'mu_c': 0.0039,
+            'p_ini': 87.9, 'p_0max': 684.0, 'a': 1.5, 'b': 8.0, 'skc': 3.1, 'Ke_max': 0.9}
+
+
+def test_continuation_key(dynamical_model, params):
+    key = get_continuation_key(dynamical_model, params, 1., 4000.)
+    #  The key only depends on the content, not on the order of the parameters
+    assert key == get_continuation_key(dynamical_model, dict(reversed(list(params.items()))), 1., 4000.)
+    assert key == get_continuation_key(dynamical_model, {k: np.float64(v) for k, v in params.items()}, 1., 4000.)
+    #  Any change in the parameters or in the settings leads to a new key
+    other_params = params.copy()
+    other_params['mu_c'] = np.nextafter(params['mu_c'], 1)
+    assert key != get_continuation_key(dynamical_model, other_params, 1., 4000.)
+    assert key != get_continuation_key(dynamical_model, params, 1., 3000.)
+
+
+def test_continuation_cache(tmp_path):
+    cache = ContinuationCache(str(tmp_path))
+    df = pd.DataFrame({'u': [0.1, 0.2, 0.3], 'p': [1.0, 2.0, 3.0]})
+    assert cache.load('a') is None
+    cache.save('a', df)
+    assert 'a' in cache
+    pd.testing.assert_frame_equal(cache.load('a'), df)
+
+
+def test_continuation_cache_lru_eviction(tmp_path):
+    cache = ContinuationCache(str(tmp_path))
+    df = pd.DataFrame({'u': np.linspace(0, 1, 100), 'p': np.linspace(1, 100, 100)})
+    for key in ['a', 'b']:
+        cache.save(key, df)
+    #  Set 'b' as the least recently used entry
+    os.utime(cache.filepath('a'), (2., 2.))
+    os.utime(cache.filepath('b'), (1., 1.))
+    #  Only two files fit in the cache
+    cache.max_size = int(2.5 * os.path.getsize(cache.filepath('a')))
+    cache.save('c', df)
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    assert cache.size <= cache.max_size
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from bifurcation.bifurcation_data.bistability_functions import is_bistable
+from calibration.dynamical_model.one_state.tiphyc_annual import DynamicalModelTipHycAnnual
+from calibration.forcing_function.rain.rain_forcing_function import RainForcingFunction
+from continuation.example.tiphyc_annual_model import derivative
+from continuation import get_continuation as get_continuation_module
+from continuation.continuation_cache import ContinuationCache
+from continuation.get_continuation import _compute_continuation, get_fold_forcings, compute_continuation, \
+    get_continuation_key, continuation_settings, RESTART
+from continuation.get_continuation_bifurcation_attributes import compute_bifurcation_attributes, \
+    get_bifurcation_attributes_list
+from continuation.pycont.PseudoArclengthContinuation import Termination, ContinuationStatistics
+from utils.utils_random import CONTINUATION_STREAM, get_generator
+
+
+@pytest.fixture(scope='module')
+def continuation_path():
+    def example_derivative(states, forcing):
+        return derivative(np.array(states, dtype=float).copy(), forcing)
+
+    return _compute_continuation(example_derivative, 1., 2000., get_generator(CONTINUATION_STREAM, 0))
+
+
+def test_fold_forcings(continuation_path):
+    u_path, p_path, fold_path, _ = continuation_path
+    lower_fold_forcings, upper_fold_forcings = get_fold_forcings(p_path, fold_path)
+    assert min(lower_fold_forcings) == pytest.approx(685.21, abs=1e-2)
+    assert max(upper_fold_forcings) == pytest.approx(1494.745, abs=1e-2)
+
+
+def test_stability_ranges_from_fold_forcings(continuation_path):
+    forcing_to_attractors, forcing_to_repulsor, stability_ranges, stability_detection = \
+        compute_bifurcation_attributes(*continuation_path[:3], 1., 2000.)
+    (lower_bound, upper_bound), _ = stability_ranges
+    assert (lower_bound, upper_bound) == (685., 1495.)
+    #  The bounds are the last monostable forcings on each side of the bistable range
+    for forcing, attractors in forcing_to_attractors.items():
+        assert is_bistable(attractors) == (lower_bound < forcing < upper_bound)
+        assert (forcing in forcing_to_repulsor) == (lower_bound < forcing < upper_bound)
+
+
+def test_continuation_statistics(continuation_path):
+    u_path, p_path, fold_path, statistics = continuation_path
+    assert statistics.termination is Termination.P_MAX
+    assert p_path[-1] >= 2000.
+    #  Each accepted step adds a point to the path (and each located limit point an additional one)
+    assert statistics.nb_accepted_steps == len(p_path) - 1 - sum([fold != 0 for fold in fold_path])
+    assert statistics.nb_rejected_steps < statistics.nb_accepted_steps
+
+
+class ConstantRainForcingFunction(RainForcingFunction):
+
+    @property
+    def name(self) -> str:
+        return 'constant'
+
+
+def test_continuation_with_analytic_jacobian():
+    #  Same parameters as the example model
+    params = {'c_croiss': 0.3928831056683607, 'i_croiss': 377.9395570739971, 'c_max': 1.0,
+              'c_mort': 0.950224996601153, 'i_mort': 132.30814805665025, 'mu_c': 0.0038717892594712184,
+              'p_ini': 87.98423934692423, 'p_0max': 684.0019745904201, 'a': 1.5, 'b': 8.0,
+              'skc': 3.1046630132406943, 'Ke_max': 0.9}
+    years = [2000, 2001]
+    dynamical_model = DynamicalModelTipHycAnnual(ConstantRainForcingFunction(years, [np.array([500.]) for _ in years]))
+    assert dynamical_model.has_jacobian
+    u_path, p_path, fold_path, statistics = compute_continuation(dynamical_model, params, 1., 2000.,
+                                                                 get_generator(CONTINUATION_STREAM, 0))
+    assert statistics.termination is Termination.P_MAX
+    lower_fold_forcings, upper_fold_forcings = get_fold_forcings(p_path, fold_path)
+    assert min(lower_fold_forcings) == pytest.approx(685.21, abs=1e-2)
+    assert max(upper_fold_forcings) == pytest.approx(1494.745, abs=1e-2)
+
+
+@pytest.mark.parametrize('termination', [Termination.EPSILON, Termination.MIN_STEP_SIZE, Termination.MAX_STEPS])
+def test_truncated_continuation(monkeypatch, tmp_path, termination):
+    cache = ContinuationCache(str(tmp_path))
+    monkeypatch.setattr(get_continuation_module, 'continuation_cache', cache)
+    if termination is Termination.MAX_STEPS:
+        monkeypatch.setitem(continuation_settings, 'N', 5)
+    else:
+        #  The path goes toward a limit point, then it stops before the max forcing
+        def continuation_function(G, u0, p0, **kwargs):
+            statistics = ContinuationStatistics(nb_accepted_steps=2, termination=termination)
+            return [np.array([u0])] * 3, [p0, 100., 0.], [0, 0, 0], statistics
+
+        monkeypatch.setattr(get_continuation_module, 'pseudoArclengthContinuationOneDirection',
+                            continuation_function)
+    years = [2000, 2001]
+    dynamical_model = DynamicalModelTipHycAnnual(ConstantRainForcingFunction(years, [np.array([500.]) for _ in years]))
+    params = {'c_croiss': 0.39, 'i_croiss': 377.9, 'c_max': 1.0, 'c_mort': 0.95, 'i_mort': 132.3, 'mu_c': 0.0039,
+              'p_ini': 87.9, 'p_0max': 684.0, 'a': 1.5, 'b': 8.0, 'skc': 3.1, 'Ke_max': 0.9}
+    #  The member fails (after a restart on the other branch for the epsilon termination), without raising
+    assert get_bifurcation_attributes_list(dynamical_model, [params], 1., 2000., parallel=False) == [None]
+    #  The truncated path is not saved in the cache
+    assert get_continuation_key(dynamical_model, params, 1., 2000.) not in cache
+
+
+def fold_back_derivative(states, forcing):
+    #  The equilibria are the curve forcing = 10 u (1 - u), which starts from 0, reaches a limit point
+    #  at (u, forcing) = (0.5, 2.5), then goes back to 0, and the line u = 2 + forcing / 100 (the other branch)
+    u = states[0]
+    return np.array([-(forcing - 10 * u * (1 - u)) * (u - 2 - forcing / 100)])
+
+
+def test_continuation_folding_back_below_epsilon():
+    u_path, p_path, fold_path, statistics = _compute_continuation(fold_back_derivative, 1., 20.,
+                                                                  get_generator(CONTINUATION_STREAM, 0))
+    assert statistics.termination is Termination.P_MAX and statistics.nb_restarts == 1
+    #  The limit point is recorded, and the path restarts on the other branch
+    assert get_fold_forcings(p_path, fold_path) == ([], [pytest.approx(2.5, abs=1e-6)])
+    assert fold_path.count(RESTART) == 1
+    restart_index = fold_path.index(RESTART)
+    assert min(p_path[:restart_index]) < continuation_settings['epsilon'] and p_path[restart_index] > 2.5
+    forcing_to_attractors, forcing_to_repulsor, _, _ = compute_bifurcation_attributes(u_path, p_path, fold_path,
+                                                                                      1., 20.)
+    #  Attractors of the first branch before the limit point, then of the other branch (up to the interpolation)
+    np.testing.assert_allclose([attractors[0][0] for attractors in forcing_to_attractors.values()],
+                               [(1 - np.sqrt(1 - 0.4 * forcing)) / 2 if forcing < 2.5 else 2 + forcing / 100
+                                for forcing in forcing_to_attractors], rtol=1e-2)
+    assert all([len(attractors) == 1 for attractors in forcing_to_attractors.values()])
+    assert list(forcing_to_attractors) == [float(forcing) for forcing in range(1, 21)]
+    #  Repulsors of the path that goes back below epsilon
+    assert list(forcing_to_repulsor) == [2., 1.]
+    np.testing.assert_allclose(list(forcing_to_repulsor.values()),
+                               [(1 + np.sqrt(1 - 0.4 * forcing)) / 2 for forcing in forcing_to_repulsor], rtol=1e-2)
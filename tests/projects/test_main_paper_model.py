@@ -0,0 +1,64 @@
+import os.path as op
+
+from matplotlib import pyplot as plt
+
+from projects.paper_model import main_paper_model
+from projects.paper_model.main_paper_model import run_figure_jobs, load_paper_data
+from utils.utils_instrumentation import get_report
+from utils import utils_multiprocessing
+from utils.utils_multiprocessing import parallelize
+
+FIGURE_PATH = None
+
+
+def plot_line(fast, show):
+    plt.plot([0, 1], [0, 1] if fast else [1, 0])
+    plt.savefig(op.join(FIGURE_PATH, 'line.png'))
+    plt.close()
+
+
+def plot_backend(fast, show):
+    with open(op.join(FIGURE_PATH, 'backend.txt'), 'w') as f:
+        f.write(plt.get_backend())
+
+
+def plot_with_missing_data(fast, show):
+    #  A job that computes missing data in parallel (the worker runs it in sequence)
+    with open(op.join(FIGURE_PATH, 'missing_data.txt'), 'w') as f:
+        f.write(str(parallelize(abs, [-1, -2])))
+
+
+def test_run_figure_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr('tests.projects.test_main_paper_model.FIGURE_PATH', str(tmp_path))
+    for parallel in [False, True]:
+        #  The workers are forked, thus they see the module attributes of the main process
+        monkeypatch.setattr(main_paper_model, 'NB_CORES', 2)
+        monkeypatch.setattr(utils_multiprocessing, 'NB_CORES', 2)
+        report_at_start = get_report()
+        figure_name_to_duration = run_figure_jobs([plot_line, plot_backend, plot_with_missing_data], True, False,
+                                                  parallel)
+        assert list(figure_name_to_duration.keys()) == ['plot_line', 'plot_backend', 'plot_with_missing_data']
+        assert (tmp_path / 'missing_data.txt').read_text() == '[1, 2]'
+        assert all(duration > 0 for duration in figure_name_to_duration.values())
+        assert op.isfile(str(tmp_path / 'line.png'))
+        #  The timings of the figures are also in the report (merged from the workers if parallel)
+        spans = get_report(since=report_at_start)['spans']
+        assert spans['paper.plot_line']['count'] == 1 and spans['paper.plot_backend']['count'] == 1
+    #  The workers render the figures with the Agg backend
+    assert (tmp_path / 'backend.txt').read_text().lower() == 'agg'
+
+
+def test_load_paper_data(monkeypatch):
+    loaded_fast_values = []
+
+    def get_calibrations(watershed_names, fast):
+        loaded_fast_values.append(fast)
+        return []
+
+    monkeypatch.setattr(main_paper_model, 'get_calibrations', get_calibrations)
+    #  The full ensembles are also loaded, since some figures always use them
+    load_paper_data(fast=True)
+    assert loaded_fast_values == [False, True]
+    loaded_fast_values.clear()
+    load_paper_data(fast=False)
+    assert loaded_fast_values == [False]
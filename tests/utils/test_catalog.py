@@ -0,0 +1,71 @@
+import os
+import os.path as op
+import shutil
+
+import pytest
+
+from utils.utils_path.catalog import Catalog
+from utils.utils_path.filename_manager.calibration_filename_manager import CalibrationFilenameManager
+from utils.utils_path.filename_manager.utils_filename_manager import FilenameManagerToLoadError
+from utils.utils_path.path_manager import PathManager
+
+
+def save_file(path_manager: PathManager):
+    path_manager.create_folder_if_needed()
+    with open(path_manager.filepath_to_save, 'w') as f:
+        f.write('')
+
+
+@pytest.fixture
+def path_manager_factory(tmp_path):
+    path = str(tmp_path / 'models')
+    catalog = Catalog(path, catalog_path=str(tmp_path / 'catalog'))
+
+    def create_path_manager(forcing_function_name, ensemble_size, nb_samples=10):
+        filename_manager = CalibrationFilenameManager('o', nb_samples, forcing_function_name, ensemble_size, 1999, 1,
+                                                      'v1', 'RK45')
+        path_manager = PathManager(path, filename_manager)
+        #  Use the catalog of the temporary folder
+        path_manager.__dict__['catalog'] = catalog
+        return path_manager
+
+    return create_path_manager
+
+
+def test_catalog_lookup(path_manager_factory):
+    path_manager = path_manager_factory('fsuffix', 4)
+    with pytest.raises(FilenameManagerToLoadError):
+        _ = path_manager.filename_manager_to_load
+    #  Files saved through the path manager are added incrementally to the catalog
+    for forcing_function_name, ensemble_size, nb_samples in [('f', 8, 10), ('f', 16, 10), ('fsuffix', 32, 10),
+                                                             ('f', 8, 100)]:
+        saved_path_manager = path_manager_factory(forcing_function_name, ensemble_size, nb_samples)
+        save_file(saved_path_manager)
+        saved_path_manager.add_to_catalog()
+    #  The longest forcing name is selected first, then the smallest ensemble size
+    assert path_manager.filename_manager_to_load == path_manager_factory('fsuffix', 32).filename_manager
+    assert path_manager_factory('fsuffix', 64).has_been_saved is False
+    #  The manifest is persistent
+    catalog = path_manager.catalog
+    other_catalog = Catalog(catalog.path, catalog.catalog_path)
+    assert other_catalog._load_manifest() == catalog._folder_to_entry
+    assert len(other_catalog.get_filename_managers(path_manager.filename_manager)) == 3
+
+
+def test_catalog_detects_copied_files(path_manager_factory):
+    saved_path_manager = path_manager_factory('f', 8)
+    save_file(saved_path_manager)
+    saved_path_manager.add_to_catalog()
+    path_manager = path_manager_factory('fsuffix', 4)
+    assert path_manager.filename_manager_to_load.forcing_function_name == 'f'
+    #  A file copied without the path manager changes the modification time of its folder
+    copied_path_manager = path_manager_factory('fsuffix', 8)
+    shutil.copy(saved_path_manager.filepath_to_save, copied_path_manager.filepath_to_save)
+    folder_stat = os.stat(copied_path_manager.folder_path)
+    os.utime(copied_path_manager.folder_path, ns=(folder_stat.st_atime_ns, folder_stat.st_mtime_ns + 1))
+    assert path_manager.filename_manager_to_load.forcing_function_name == 'fsuffix'
+    #  Removed files are removed from the catalog
+    copied_path_manager.remove_folder()
+    saved_path_manager.remove_folder()
+    assert not op.exists(saved_path_manager.folder_path)
+    assert path_manager.has_been_saved is False
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+import pytest
+
+from utils.utils_path.utils_path import ROOT
+
+#  Budget (s) of the import of the library entry points, in a fresh interpreter (measured around 0.7s)
+IMPORT_TIME_BUDGET = 2.
+#  Heavy optional dependencies that are imported on demand, by the functions that use them
+LAZY_MODULE_NAMES = ['matplotlib', 'pandarallel', 'sklearn', 'scipy.stats', 'pytest', 'tests']
+
+
+def import_in_fresh_interpreter(module_name: str) -> tuple[float, list[str]]:
+    """Return the cumulative import time (s) of the module, and the lazy modules that it imports"""
+    code = f'import sys, {module_name}; print(",".join([m for m in {LAZY_MODULE_NAMES} if m in sys.modules]))'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    #  Each line of importtime is "import time: self [us] | cumulative | imported package"
+    cumulative_times = [int(line.split('|')[1]) for line in result.stderr.splitlines()
+                        if line.startswith('import time:') and line.split('|')[-1].strip() == module_name]
+    lazy_module_names = [name for name in result.stdout.strip().split(',') if name]
+    return cumulative_times[-1] / 1e6, lazy_module_names
+
+
+@pytest.mark.parametrize('module_name', ['calibration.calibration', 'bifurcation.bifurcation',
+                                         'continuation.get_continuation'])
+def test_import_time(module_name):
+    import_time, lazy_module_names = import_in_fresh_interpreter(module_name)
+    assert lazy_module_names == []
+    assert import_time < IMPORT_TIME_BUDGET
@@ -0,0 +1,11 @@
+import numpy as np
+import pytest
+
+from utils.utils_hash import compute_hash
+
+
+def test_compute_hash():
+    assert compute_hash({'a': 1., 'b': [1, 2]}) == compute_hash({'b': (1, 2), 'a': np.float64(1.)})
+    assert compute_hash({'a': 1.}) != compute_hash({'a': 1. + 1e-15})
+    with pytest.raises(TypeError):
+        compute_hash(object())
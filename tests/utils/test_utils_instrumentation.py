@@ -0,0 +1,54 @@
+import json
+
+from bifurcation.bifurcation_data.attractor_functions import get_attractor
+from calibration.dynamical_model.one_state.tiphyc_annual import DynamicalModelTipHycAnnual
+from calibration.forcing_function.constant_forcing_function import ConstantForcing
+from calibration.utils_calibration.solve import SolverMethod
+from calibration.utils_calibration.utils_sample import get_df_parameters_sampled
+from utils import utils_instrumentation
+from utils.utils_instrumentation import span, increment, get_report, save_report, InstrumentedFunction, \
+    collect_results
+
+
+def stage(x):
+    with span('test.stage'):
+        increment('test.counter', x)
+    return 2 * x
+
+
+def test_report_since():
+    report_at_start = get_report()
+    for x in range(3):
+        stage(x)
+    report = get_report(since=report_at_start)
+    assert report['spans']['test.stage']['count'] == 3
+    assert report['counters'] == {'test.counter': 3}
+
+
+def test_merge_reports_of_workers(monkeypatch):
+    #  The wrapped function is called as in a worker of parallelize (the worker inherits a copy of the main report)
+    monkeypatch.setattr(utils_instrumentation, '_report', {'spans': {}, 'counters': {'test.counter': 10}})
+    results_and_reports = [InstrumentedFunction(stage)(x) for x in [1, 2]]
+    #  Back in the main process
+    monkeypatch.setattr(utils_instrumentation, '_report', {'spans': {}, 'counters': {'test.counter': 10}})
+    assert collect_results(results_and_reports) == [2, 4]
+    report = get_report()
+    assert report['spans']['test.stage']['count'] == 2
+    assert report['counters'] == {'test.counter': 13}
+
+
+def test_solver_counters(tmp_path):
+    dynamical_model = DynamicalModelTipHycAnnual(ConstantForcing(nb_years=2, constant_value=500.))
+    params = dynamical_model.get_params(get_df_parameters_sampled(dynamical_model, 1).values[0])
+    report_at_start = get_report()
+    get_attractor(dynamical_model, params, 500., dynamical_model.extremal_initial_states[0], SolverMethod.RK45)
+    filepath = str(tmp_path / 'report.json')
+    save_report(filepath, since=report_at_start, filename='calibration.csv')
+    with open(filepath) as f:
+        report = json.load(f)
+    assert report['filename'] == 'calibration.csv'
+    assert report['peak_rss'] > 0
+    counters = report['counters']
+    assert counters['attractor.nb_searches'] == 1
+    assert counters['solver.nb_solves'] == counters['attractor.ladder_depth'] >= 1
+    assert counters['solver.nb_rhs_evaluations'] > 0
@@ -0,0 +1,24 @@
+import numpy as np
+
+from continuation.example.tiphyc_annual_model import derivative
+from continuation.pycont.continuation import pseudoArclengthContinuationOneDirection
+from utils.utils_random import get_generator, CONTINUATION_STREAM
+
+
+def test_generator_only_depends_on_spawn_key():
+    #  Drawing from other streams (e.g. in other workers) does not change the numbers of a given stream
+    first_draw = get_generator(CONTINUATION_STREAM, 1).normal(size=10)
+    _ = get_generator(CONTINUATION_STREAM, 0).normal(size=10)
+    assert np.array_equal(first_draw, get_generator(CONTINUATION_STREAM, 1).normal(size=10))
+    assert not np.array_equal(first_draw, get_generator(CONTINUATION_STREAM, 2).normal(size=10))
+
+
+def test_continuation_is_reproducible():
+    paths = []
+    for _ in range(2):
+        u_path, p_path, _, _ = pseudoArclengthContinuationOneDirection(derivative, 0.01, 0.1, ds_min=1e-7, ds_max=1.,
+                                                                       ds_0=0.2, N=20, p_max=2000.,
+                                                                       rng=get_generator(CONTINUATION_STREAM, 0))
+        paths.append((np.array(u_path).flatten(), np.array(p_path)))
+    assert np.array_equal(paths[0][0], paths[1][0])
+    assert np.array_equal(paths[0][1], paths[1][1])
@@ -0,0 +1,21 @@
+from utils.utils_registry import Registry
+
+
+def test_registry():
+    registry = Registry(max_size=2)
+    created_keys = []
+
+    def create_function(key):
+        created_keys.append(key)
+        return [key]
+
+    first_object = registry.get_or_create('a', lambda: create_function('a'))
+    #  Objects are created once, then shared
+    assert registry.get_or_create('a', lambda: create_function('a')) is first_object
+    registry.get_or_create('b', lambda: create_function('b'))
+    #  'a' has been used more recently than 'b', thus 'b' is dropped
+    registry.get_or_create('a', lambda: create_function('a'))
+    registry.get_or_create('c', lambda: create_function('c'))
+    assert 'a' in registry and 'b' not in registry and 'c' in registry
+    assert len(registry) == 2
+    assert created_keys == ['a', 'b', 'c']
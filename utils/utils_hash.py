@@ -0,0 +1,28 @@
+import hashlib
+import json
+
+import numpy as np
+
+
+def compute_hash(*objects) -> str:
+    """Compute a stable hash of (nested) dictionaries, lists, strings and numbers.
+    Floats are hashed through their exact hexadecimal representation, so the hash does not depend on rounding"""
+    content = json.dumps([_to_hashable(o) for o in objects], sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _to_hashable(o):
+    if isinstance(o, dict):
+        return {str(k): _to_hashable(v) for k, v in o.items()}
+    elif isinstance(o, (list, tuple, np.ndarray)):
+        return [_to_hashable(v) for v in o]
+    elif isinstance(o, (bool, np.bool_)):
+        return bool(o)
+    elif isinstance(o, (int, np.integer)):
+        return int(o)
+    elif isinstance(o, (float, np.floating)):
+        return float(o).hex()
+    elif o is None or isinstance(o, str):
+        return o
+    else:
+        raise TypeError(f'cannot hash {type(o)}')
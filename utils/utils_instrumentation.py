@@ -0,0 +1,99 @@
+import json
+import os
+import os.path as op
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from copy import deepcopy
+from typing import Callable
+
+#  Report of this process: for each span its number of calls and its total duration (s), and the value of each counter.
+#  The reports of the workers of utils_multiprocessing.parallelize are merged into the report of the main process,
+#  thus the duration of a span run by several workers is the sum of their durations (it can exceed the wall time)
+_report = {'spans': {}, 'counters': {}}
+
+
+@contextmanager
+def span(name: str):
+    """Measure the duration of a stage (it can also be used as a decorator)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span_report = _report['spans'].setdefault(name, {'count': 0, 'duration': 0.})
+        span_report['count'] += 1
+        span_report['duration'] += time.perf_counter() - start
+
+
+def increment(name: str, value: int = 1) -> None:
+    _report['counters'][name] = _report['counters'].get(name, 0) + value
+
+
+def get_report(since: dict = None) -> dict:
+    """Return a copy of the report, if since is a previous report, only return what happened since then"""
+    report = deepcopy(_report)
+    if since is not None:
+        for name, span_report in report['spans'].items():
+            previous_span_report = since['spans'].get(name, {'count': 0, 'duration': 0.})
+            span_report['count'] -= previous_span_report['count']
+            span_report['duration'] -= previous_span_report['duration']
+        for name in report['counters']:
+            report['counters'][name] -= since['counters'].get(name, 0)
+        report['spans'] = {name: s for name, s in report['spans'].items() if s['count'] > 0}
+        report['counters'] = {name: value for name, value in report['counters'].items() if value != 0}
+    return report
+
+
+def merge_report(report: dict) -> None:
+    """Add a report (e.g. the report of a worker) to the report of this process"""
+    for name, other_span_report in report['spans'].items():
+        span_report = _report['spans'].setdefault(name, {'count': 0, 'duration': 0.})
+        span_report['count'] += other_span_report['count']
+        span_report['duration'] += other_span_report['duration']
+    for name, value in report['counters'].items():
+        increment(name, value)
+
+
+def reset_report() -> None:
+    _report['spans'].clear()
+    _report['counters'].clear()
+
+
+def get_peak_rss() -> int:
+    """Peak resident set size (in bytes) of this process and of its terminated children (e.g. the workers)"""
+    #  ru_maxrss is in kilobytes on Linux, and in bytes on macOS
+    factor = 1 if sys.platform == 'darwin' else 1024
+    return factor * max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def save_report(filepath: str, since: dict = None, **metadata) -> None:
+    """Save the report as a json file (the metadata describe the run, e.g. the name of the calibration)"""
+    report = {**metadata, **get_report(since), 'peak_rss': get_peak_rss()}
+    os.makedirs(op.dirname(filepath), exist_ok=True)
+    with open(filepath + '.tmp', 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    os.replace(filepath + '.tmp', filepath)
+
+
+class InstrumentedFunction(object):
+    """Wrap a function run by a worker, so that the worker returns its report with the result"""
+
+    def __init__(self, function: Callable):
+        self.function = function
+
+    def __call__(self, arguments):
+        #  Each call starts with an empty report, since a worker may have inherited the report of the main process
+        reset_report()
+        result = self.function(arguments)
+        return result, get_report()
+
+
+def collect_results(results_and_reports: list) -> list:
+    """Merge the reports returned by the workers, and return their results"""
+    results = []
+    for result, report in results_and_reports:
+        merge_report(report)
+        results.append(result)
+    return results
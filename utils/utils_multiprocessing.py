@@ -1,18 +1,22 @@
 import math
 from itertools import chain
-from multiprocessing import cpu_count, Pool
+from multiprocessing import cpu_count, current_process, Pool
+
+from utils.utils_instrumentation import InstrumentedFunction, collect_results
 
 #  Multiprocessing parameters
 NB_CORES = cpu_count() - 1
 
 
 def parallelize(function, arguments_list, batch_mode=False, parallel=True):
-    if parallel:
+    #  A daemonic process (e.g. a worker of a pool) cannot start a pool, thus it runs the function in sequence
+    if parallel and not current_process().daemon:
         if batch_mode:
             return parallelize_batch(function, arguments_list)
         else:
             with Pool(NB_CORES) as p:
-                return p.map(function, arguments_list)
+                #  The reports of the workers are merged into the report of the main process
+                return collect_results(p.map(InstrumentedFunction(function), arguments_list))
     else:
         return [function(arguments) for arguments in arguments_list]
 
@@ -27,7 +31,7 @@ def parallelize_batch(function, argument_list):
     nb_argument = len(argument_list)
     batch_size = math.ceil(nb_argument / NB_CORES)
     with Pool(NB_CORES) as p:
-        result_list = p.map(function, batch(argument_list, batch_size=batch_size))
+        result_list = collect_results(p.map(InstrumentedFunction(function), batch(argument_list, batch_size=batch_size)))
         if None in result_list:
             return None
         else:
@@ -0,0 +1,122 @@
+import fcntl
+import json
+import os
+import os.path as op
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from utils.utils_hash import compute_hash
+from utils.utils_path.filename_manager.filename_manager import FilenameManager
+from utils.utils_path.utils_path import CATALOG_DATA_PATH
+
+
+@dataclass
+class Catalog(object):
+    """Persistent index of the files saved in the folders of path (one folder per set of parameters)
+
+    The manifest (a json file in catalog_path) maps each folder to its filenames and to its modification time.
+    Only the folders whose modification time has changed (e.g. files copied by hand) are listed again,
+    and a saved file is added incrementally to the manifest.
+    The parsed filename managers are grouped by their catalog_key, thus finding the compatible filename managers
+    does not require to parse and compare all the saved files"""
+    path: str
+    catalog_path: str = CATALOG_DATA_PATH
+    _folder_to_entry: dict = field(default=None, init=False, repr=False)
+    _key_to_filename_managers: dict = field(default=None, init=False, repr=False)
+
+    @property
+    def manifest_filepath(self) -> str:
+        abspath = op.abspath(self.path)
+        return op.join(self.catalog_path, f'{op.basename(abspath)}-{compute_hash(abspath)[:16]}.json')
+
+    def get_filename_managers(self, filename_manager: FilenameManager) -> list[FilenameManager]:
+        """Return the saved filename managers that are equal to filename_manager"""
+        if self._synchronize() or self._key_to_filename_managers is None:
+            self._key_to_filename_managers = {}
+        #  The index is built for each type of filename manager, since they parse the filenames differently
+        filename_manager_type = type(filename_manager)
+        if filename_manager_type not in self._key_to_filename_managers:
+            key_to_filename_managers = defaultdict(list)
+            for folder, entry in self._folder_to_entry.items():
+                for filename in entry['filenames']:
+                    other_manager = filename_manager_type.from_filename(folder, filename)
+                    key_to_filename_managers[other_manager.catalog_key].append(other_manager)
+            self._key_to_filename_managers[filename_manager_type] = key_to_filename_managers
+        candidates = self._key_to_filename_managers[filename_manager_type].get(filename_manager.catalog_key, [])
+        return [other_manager for other_manager in candidates if filename_manager == other_manager]
+
+    def add(self, filepath: str) -> None:
+        """Add a saved file to the catalog"""
+        folder, filename = op.split(op.relpath(filepath, self.path))
+        with self._locked_manifest() as folder_to_entry:
+            entry = folder_to_entry.setdefault(folder, {'mtime': None, 'filenames': []})
+            if filename not in entry['filenames']:
+                entry['filenames'].append(filename)
+            entry['mtime'] = os.stat(op.join(self.path, folder)).st_mtime_ns
+            self._folder_to_entry = folder_to_entry
+            self._key_to_filename_managers = None
+
+    ###########################################
+    #
+    #           Private methods to manage the manifest
+    #
+    ###########################################
+
+    def _synchronize(self) -> bool:
+        """Update the folders that have been modified since the last update. Return True if the catalog changed"""
+        if self._folder_to_entry is None:
+            self._folder_to_entry = self._load_manifest()
+        if not op.exists(self.path):
+            has_changed = len(self._folder_to_entry) > 0
+            self._folder_to_entry = {}
+            return has_changed
+        folder_to_mtime = {folder: os.stat(op.join(self.path, folder)).st_mtime_ns for folder in os.listdir(self.path)
+                           if op.isdir(op.join(self.path, folder))}
+        if all([folder in self._folder_to_entry and self._folder_to_entry[folder]['mtime'] == mtime
+                for folder, mtime in folder_to_mtime.items()]) and len(folder_to_mtime) == len(self._folder_to_entry):
+            return False
+        with self._locked_manifest() as folder_to_entry:
+            for folder in list(folder_to_entry.keys()):
+                if folder not in folder_to_mtime:
+                    folder_to_entry.pop(folder)
+            for folder, mtime in folder_to_mtime.items():
+                if folder not in folder_to_entry or folder_to_entry[folder]['mtime'] != mtime:
+                    folder_path = op.join(self.path, folder)
+                    filenames = sorted([filename for filename in os.listdir(folder_path)
+                                        if op.isfile(op.join(folder_path, filename))])
+                    folder_to_entry[folder] = {'mtime': mtime, 'filenames': filenames}
+            self._folder_to_entry = folder_to_entry
+        return True
+
+    def _load_manifest(self) -> dict:
+        if op.exists(self.manifest_filepath):
+            with open(self.manifest_filepath) as f:
+                return json.load(f)
+        else:
+            return {}
+
+    @contextmanager
+    def _locked_manifest(self):
+        #  The lock ensures that processes running in parallel do not overwrite the entries of each other
+        os.makedirs(self.catalog_path, exist_ok=True)
+        with open(self.manifest_filepath + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                folder_to_entry = self._load_manifest()
+                yield folder_to_entry
+                with open(self.manifest_filepath + '.tmp', 'w') as f:
+                    json.dump(folder_to_entry, f)
+                os.replace(self.manifest_filepath + '.tmp', self.manifest_filepath)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+#  Catalogs are shared in the process, so that the filenames of a path are parsed only once
+_path_to_catalog = {}
+
+
+def get_catalog(path: str, catalog_path: str = CATALOG_DATA_PATH) -> Catalog:
+    if (path, catalog_path) not in _path_to_catalog:
+        _path_to_catalog[(path, catalog_path)] = Catalog(path, catalog_path)
+    return _path_to_catalog[(path, catalog_path)]
@@ -21,6 +21,10 @@ class AttributionFilenameManager(BifurcationFilenameManager):
         conditions.append(self.final_year <= other.final_year)
         return conditions
 
+    @property
+    def catalog_key(self) -> tuple:
+        return super().catalog_key + (self.attribution_study_name,)
+
     def forcing_name_condition(self, other):
         return self.forcing_function_name == other.forcing_function_name
 
@@ -19,6 +19,10 @@ class BifurcationFilenameManager(CalibrationFilenameManager):
                            self.max_forcing == other.max_forcing])
         return conditions
 
+    @property
+    def catalog_key(self) -> tuple:
+        return super().catalog_key + (self.min_forcing, self.max_forcing)
+
     @classmethod
     def expected_number_after_split(cls):
         return super().expected_number_after_split() + 2
@@ -43,6 +43,11 @@ class CalibrationFilenameManager(FilenameManager):
              ]
         return conditions
 
+    @property
+    def catalog_key(self) -> tuple:
+        return (self.observation_constraint_name, self.nb_samples, self.nb_years_for_initial_state, self.sampling_str,
+                self.solver_method_str)
+
     def forcing_name_condition(self, other):
         return self.forcing_function_name.startswith(other.forcing_function_name)
 
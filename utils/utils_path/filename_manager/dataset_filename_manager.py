@@ -24,6 +24,10 @@ class DatasetFilenameManager(FilenameManager):
                 self.dataset_name == other.dataset_name,
                 self.train_percent == other.train_percent]
 
+    @property
+    def catalog_key(self) -> tuple:
+        return self.dataset_folder, self.dataset_name, self.train_percent
+
     @property
     def filename(self):
         return op.join(self.folder, f"{self.dataset_name}-{self.train_percent}.npz")
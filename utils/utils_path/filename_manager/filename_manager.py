@@ -13,6 +13,11 @@ class FilenameManager(ABC):
     def get_equality_conditions(self, other) -> list[bool]:
         raise NotImplementedError
 
+    @property
+    def catalog_key(self) -> tuple:
+        """Attributes that must be equal for two filename managers to be equal (used to index the catalog)"""
+        return ()
+
     @classmethod
     def from_filename(cls, folder, filename):
         raise NotImplementedError
@@ -5,18 +5,21 @@ from functools import cached_property
 
 import numpy as np
 
+from utils.utils_path.catalog import Catalog, get_catalog
 from utils.utils_path.filename_manager.attribution_filename_manager import AttributionFilenameManager
 from utils.utils_path.filename_manager.bifurcation_filename_manager import BifurcationFilenameManager
 from utils.utils_path.filename_manager.calibration_filename_manager import CalibrationFilenameManager
 from utils.utils_path.filename_manager.dataset_filename_manager import DatasetFilenameManager
 from utils.utils_path.filename_manager.filename_manager import FilenameManager
 from utils.utils_path.filename_manager.utils_filename_manager import FilenameManagerToLoadError
+from utils.utils_path.utils_path import DATA_PATH, REPORT_DATA_PATH, CATALOG_DATA_PATH, get_path_in_data_tree
 
 
 @dataclass
 class PathManager(object):
     path: str
     filename_manager: FilenameManager
+    data_path: str = DATA_PATH  #  root of the data tree, which contains the reports and the catalogs of the files
 
     def create_folder_if_needed(self):
         #  Create folder if needed
@@ -47,6 +50,17 @@ class PathManager(object):
     def filename_to_save(self):
         return self.filename_manager.filename
 
+    @property
+    def report_filepath(self) -> str:
+        """Run report of the saved file. Reports are saved in a mirror of the data folder, so that the folders
+        of the saved files only contain the files listed by the catalog"""
+        return self.get_report_filepath('.json')
+
+    def get_report_filepath(self, suffix: str) -> str:
+        relative_filepath = op.relpath(self.filepath_to_save, self.data_path)
+        return op.join(get_path_in_data_tree(REPORT_DATA_PATH, self.data_path),
+                       op.splitext(relative_filepath)[0] + suffix)
+
     @property
     def has_been_saved(self):
         try:
@@ -62,19 +76,20 @@ class PathManager(object):
     def filename_to_load(self):
         return self.filename_manager_to_load.filename
 
+    @cached_property
+    def catalog(self) -> Catalog:
+        return get_catalog(self.path, get_path_in_data_tree(CATALOG_DATA_PATH, self.data_path))
+
+    def add_to_catalog(self):
+        """Function to call once the file has been saved"""
+        self.catalog.add(self.filepath_to_save)
+
     @property
     def filename_manager_to_load(self) -> CalibrationFilenameManager:
         if not op.exists(self.path):
             raise FilenameManagerToLoadError('no match for {}'.format(self.filename_manager))
-        other_managers = []
-        for folder in os.listdir(self.path):
-            folder_path = op.join(self.path, folder)
-            for filename in os.listdir(folder_path):
-                if op.isfile(op.join(folder_path, filename)):
-                    other_managers.append(self.filename_manager.from_filename(folder, filename))
-        if len(other_managers) == 0:
-            raise FilenameManagerToLoadError('no match for {}'.format(self.filename_manager))
-        other_managers = [other_manager for other_manager in other_managers if self.filename_manager == other_manager]
+        #  Saved filename managers that are compatible with the filename manager
+        other_managers = self.catalog.get_filename_managers(self.filename_manager)
         if len(other_managers) == 0:
             raise FilenameManagerToLoadError('no match for {}'.format(self.filename_manager))
         if isinstance(self.filename_manager, DatasetFilenameManager):
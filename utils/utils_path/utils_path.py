@@ -19,11 +19,22 @@ ATTRIBUTION_DATA_PATH = op.join(DATA_PATH, 'attribution')
 EMULATION_DATA_PATH = op.join(DATA_PATH, 'emulation')
 DATASET_DATA_PATH = op.join(DATA_PATH, 'dataset')
 CONTINUATION_DATA_PATH = op.join(DATA_PATH, 'continuation')
-CONTINUATION_INTERPOLATED_DATA_PATH = op.join(DATA_PATH, 'continuation_interpolated')
 CONTINUATION_BIFURCATION_DATA_PATH = op.join(DATA_PATH, 'continuation_bifurcation')
+CONTINUATION_CACHE_DATA_PATH = op.join(CONTINUATION_DATA_PATH, 'cache')
+SNAPSHOT_DATA_PATH = op.join(DATA_PATH, 'snapshot')
+OBSERVATION_SNAPSHOT_PATH = op.join(SNAPSHOT_DATA_PATH, 'observations')
+CALIBRATION_SNAPSHOT_PATH = op.join(SNAPSHOT_DATA_PATH, 'calibration')
+CATALOG_DATA_PATH = op.join(DATA_PATH, 'catalog')
+CHECKPOINT_DATA_PATH = op.join(DATA_PATH, 'checkpoint')
+DEGENERACY_DATA_PATH = op.join(DATA_PATH, 'degeneracy')
+REPORT_DATA_PATH = op.join(DATA_PATH, 'report')
+BENCHMARK_DATA_PATH = op.join(DATA_PATH, 'benchmark')
 
 
 #  Result parameters
 RESULT_PATH = op.join(ROOT, 'results')
 
 
+def get_path_in_data_tree(path: str, data_path: str) -> str:
+    """Same folder of the data folder in another data tree (e.g. the benchmark folder), organized as the data folder"""
+    return op.join(data_path, op.relpath(path, DATA_PATH))
@@ -38,9 +38,8 @@ def save_plot(plot_name):
         filepath_with_format = filepath + '.' + f
         if i >= 1:
             filepath_with_format = op.join(op.dirname(filepath_with_format), f, op.basename(filepath_with_format))
-        path = op.dirname(filepath_with_format)
-        if not op.exists(path):
-            os.makedirs(path)
+        #  The folders may be created at the same time by the workers that render the figures
+        os.makedirs(op.dirname(filepath_with_format), exist_ok=True)
         transparent = True if f == 'svg' else False
         plt.savefig(filepath_with_format, format=f, bbox_inches="tight",
                     transparent=transparent)
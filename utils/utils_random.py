@@ -0,0 +1,25 @@
+import numpy as np
+
+from utils.utils_run import random_seed
+
+#  Identifiers of the random streams, each stream is independent of the others
+CONTINUATION_STREAM = 1
+SAMPLING_STREAM = 2
+BENCHMARK_STREAM = 3
+METRICS_STREAM = 4
+
+
+def get_seed_sequence(*spawn_key: int) -> np.random.SeedSequence:
+    """Child of the seed sequence of the run, identified by its spawn_key (e.g. a stream and an ensemble member).
+    The child only depends on its spawn_key, thus random numbers do not depend on the order in which
+    ensemble members are processed, nor on the worker that processes them"""
+    return np.random.SeedSequence(random_seed, spawn_key=spawn_key)
+
+
+def get_generator(*spawn_key: int) -> np.random.Generator:
+    return np.random.default_rng(get_seed_sequence(*spawn_key))
+
+
+def get_spawn_key_from_hash(hash_str: str) -> int:
+    """Convert a (hexadecimal) hash into an integer that can be used in a spawn_key"""
+    return int(hash_str[:16], 16)
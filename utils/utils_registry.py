@@ -0,0 +1,30 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+@dataclass
+class Registry(object):
+    """In-process registry of objects that are expensive to load (e.g. calibrations).
+    When more than max_size objects are registered, the least recently used objects are dropped"""
+    max_size: int
+    _key_to_object: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False)
+
+    def get_or_create(self, key: Hashable, create_function: Callable[[], Any]) -> Any:
+        if key in self._key_to_object:
+            self._key_to_object.move_to_end(key)
+        else:
+            self._key_to_object[key] = create_function()
+            while len(self._key_to_object) > self.max_size:
+                self._key_to_object.popitem(last=False)
+        return self._key_to_object[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._key_to_object
+
+    def __len__(self) -> int:
+        return len(self._key_to_object)
+
+    def clear(self) -> None:
+        self._key_to_object.clear()
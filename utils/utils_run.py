@@ -3,6 +3,10 @@ import logging
 #  Run parameters
 random_seed = 42
 nb_bootstrap_samples = 1000
+#  If True, the parsed observation tables are also stored as binary snapshots (faster to load than the csv files)
+use_observation_snapshot = False
+#  If True, the loaded calibrations are also stored as binary snapshots (faster to load than the csv files)
+use_calibration_snapshot = False
 
 #  Some customized exceptions to catch run that crashed
 class CustomizedValueError(ValueError):
@@ -0,0 +1,34 @@
+import os
+import os.path as op
+from typing import Optional
+
+import numpy as np
+
+
+def load_snapshot(filepath: str, snapshot_filepath: str) -> Optional[dict[str, np.ndarray]]:
+    """Load the arrays of a binary snapshot of filepath. Return None if the snapshot does not exist
+    or if it is outdated, i.e. if filepath has been modified since the snapshot has been saved"""
+    if not op.exists(snapshot_filepath):
+        return None
+    with np.load(snapshot_filepath, allow_pickle=False) as data:
+        if int(data['mtime']) != os.stat(filepath).st_mtime_ns:
+            return None
+        return {key: data[key] for key in data.files if key != 'mtime'}
+
+
+def save_snapshot(filepath: str, snapshot_filepath: str, **arrays: np.ndarray) -> None:
+    """Save arrays loaded from filepath as a binary snapshot (the snapshot does not rely on pickle)"""
+    os.makedirs(op.dirname(snapshot_filepath), exist_ok=True)
+    #  Write in a temporary file first, so that a concurrent load never reads a partial file
+    tmp_filepath = f'{snapshot_filepath}.{os.getpid()}.tmp.npz'
+    np.savez(tmp_filepath, mtime=np.int64(os.stat(filepath).st_mtime_ns), **arrays)
+    os.replace(tmp_filepath, snapshot_filepath)
+
+
+def get_snapshot_filepath(filepath: str, path: str, snapshot_path: str, suffix: str = '') -> str:
+    """Snapshots mirror the tree of files of path in snapshot_path"""
+    relative_filepath = op.relpath(op.abspath(filepath), path)
+    if relative_filepath.startswith('..'):
+        #  File outside of path
+        relative_filepath = op.abspath(filepath).lstrip(os.sep)
+    return op.join(snapshot_path, relative_filepath + suffix + '.npz')
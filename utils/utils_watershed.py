@@ -37,8 +37,13 @@ watershed_name_to_prefix = {
     'Nakanbe_Wayen': 'barrages_WAYEN',
 }
 
+#  Watersheds whose csv file is not in the observation folder (e.g. the synthetic watersheds of the benchmark)
+watershed_name_to_csv_filepath = {}
+
 
 def get_csv_filepath(watershed_name: str):
+    if watershed_name in watershed_name_to_csv_filepath:
+        return watershed_name_to_csv_filepath[watershed_name]
     assert watershed_name in watershed_name_to_prefix, f'file does not exist for {watershed_name} '
     prefix = watershed_name_to_prefix[watershed_name]
     return op.join(OBSERVATION_PATH, "Christophe2024", f"{prefix}_Rainfall_Runoff.csv")